@@ -25,12 +25,13 @@ from copernicusmarine.core_functions.fields_query_builder import (
 )
 from copernicusmarine.core_functions.get import (
     create_get_template,
-    get_function,
+    get_batch_function,
 )
 from copernicusmarine.core_functions.models import ResponseGet
 from copernicusmarine.core_functions.request_structure import (
-    create_get_request,
+    create_get_requests,
 )
+from copernicusmarine.download_functions.archive_writer import STDOUT_ARCHIVE
 
 logger = logging.getLogger("copernicusmarine")
 blank_logger = logging.getLogger("copernicusmarine_blank_logger")
@@ -150,6 +151,12 @@ def cli_get() -> None:
     default=None,
     help=documentation_utils.GET["CREATE_FILE_LIST_HELP"],
 )
+@click.option(
+    "--output-archive",
+    type=str,
+    default=None,
+    help=documentation_utils.GET["OUTPUT_ARCHIVE_HELP"],
+)
 @click.option(
     "--sync",
     cls=MutuallyExclusiveOption,
@@ -189,6 +196,49 @@ def cli_get() -> None:
     default=False,
     help=documentation_utils.GET["INDEX_PARTS_HELP"],
 )
+@click.option(
+    "--minimum-longitude",
+    type=float,
+    default=None,
+    help=documentation_utils.GET["MINIMUM_LONGITUDE_HELP"],
+)
+@click.option(
+    "--maximum-longitude",
+    type=float,
+    default=None,
+    help=documentation_utils.GET["MAXIMUM_LONGITUDE_HELP"],
+)
+@click.option(
+    "--minimum-latitude",
+    type=click.FloatRange(min=-90, max=90),
+    default=None,
+    help=documentation_utils.GET["MINIMUM_LATITUDE_HELP"],
+)
+@click.option(
+    "--maximum-latitude",
+    type=click.FloatRange(min=-90, max=90),
+    default=None,
+    help=documentation_utils.GET["MAXIMUM_LATITUDE_HELP"],
+)
+@click.option(
+    "--start-datetime",
+    type=str,
+    default=None,
+    help=documentation_utils.GET["START_DATETIME_HELP"],
+)
+@click.option(
+    "--end-datetime",
+    type=str,
+    default=None,
+    help=documentation_utils.GET["END_DATETIME_HELP"],
+)
+@click.option(
+    "--platform-id",
+    "platform_ids",
+    type=str,
+    multiple=True,
+    help=documentation_utils.GET["PLATFORM_IDS_HELP"],
+)
 @click.option(
     "--dry-run",
     type=bool,
@@ -241,10 +291,18 @@ def get(
     regex: str | None,
     file_list: pathlib.Path | None,
     create_file_list: str | None,
+    output_archive: str | None,
     sync: bool,
     sync_delete: bool,
     skip_existing: bool,
     index_parts: bool,
+    minimum_longitude: float | None,
+    maximum_longitude: float | None,
+    minimum_latitude: float | None,
+    maximum_latitude: float | None,
+    start_datetime: str | None,
+    end_datetime: str | None,
+    platform_ids: tuple[str, ...],
     dry_run: bool,
     response_fields: str | None,
     max_concurrent_requests: int,
@@ -269,7 +327,7 @@ def get(
         create_get_template()
         return
 
-    get_request = create_get_request(
+    get_requests = create_get_requests(
         dataset_id=dataset_id,
         dataset_version=dataset_version,
         dataset_part=dataset_part,
@@ -284,6 +342,7 @@ def get(
         regex=regex,
         file_list=file_list,
         create_file_list=create_file_list,
+        output_archive=output_archive,
         sync=sync,
         sync_delete=sync_delete,
         skip_existing=skip_existing,
@@ -291,9 +350,22 @@ def get(
         dry_run=dry_run,
         max_concurrent_requests=max_concurrent_requests,
         disable_progress_bar=disable_progress_bar,
+        minimum_longitude=minimum_longitude,
+        maximum_longitude=maximum_longitude,
+        minimum_latitude=minimum_latitude,
+        maximum_latitude=maximum_latitude,
+        start_datetime=start_datetime,
+        end_datetime=end_datetime,
+        platform_ids=list(platform_ids),
     )
 
-    response = get_function(get_request, staging)
+    response = get_batch_function(get_requests, staging)
+    if (
+        get_requests[0].output_archive == STDOUT_ARCHIVE
+        and not get_requests[0].dry_run
+    ):
+        # The standard output is the archive
+        return
 
     if response_fields:
         fields_to_include = set(response_fields.replace(" ", "").split(","))
@@ -17,6 +17,8 @@ from copernicusmarine.command_line_interface.utils import (
     force_dataset_part_option,
     force_dataset_version_option,
     force_download_option,
+    parse_qc_flags,
+    parse_value_ranges,
     tqdm_disable_option,
 )
 from copernicusmarine.core_functions import documentation_utils
@@ -32,10 +34,12 @@ from copernicusmarine.core_functions.models import (
     DEFAULT_COORDINATES_SELECTION_METHOD,
     DEFAULT_COORDINATES_SELECTION_METHODS,
     DEFAULT_FILE_FORMATS,
+    DEFAULT_PARQUET_COMPRESSIONS,
     DEFAULT_VERTICAL_AXES,
     DEFAULT_VERTICAL_AXIS,
     CoordinatesSelectionMethod,
     FileFormat,
+    ParquetCompression,
     ResponseSubset,
     VerticalAxis,
 )
@@ -223,6 +227,20 @@ def cli_subset():
     help=documentation_utils.SUBSET["PLATFORM_IDS_HELP"],
     multiple=True,
 )
+@click.option(
+    "--qc-flag",
+    "qc_flags",
+    type=str,
+    help=documentation_utils.SUBSET["QC_FLAGS_HELP"],
+    multiple=True,
+)
+@click.option(
+    "--value-range",
+    "value_ranges",
+    type=str,
+    help=documentation_utils.SUBSET["VALUE_RANGES_HELP"],
+    multiple=True,
+)
 @click.option(
     "--coordinates-selection-method",
     type=click.Choice(DEFAULT_COORDINATES_SELECTION_METHODS),
@@ -248,6 +266,25 @@ def cli_subset():
     default=None,
     help=documentation_utils.SUBSET["FILE_FORMAT_HELP"],
 )
+@click.option(
+    "--parquet-partition-column",
+    "parquet_partition_columns",
+    type=str,
+    help=documentation_utils.SUBSET["PARQUET_PARTITION_COLUMNS_HELP"],
+    multiple=True,
+)
+@click.option(
+    "--parquet-row-group-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help=documentation_utils.SUBSET["PARQUET_ROW_GROUP_SIZE_HELP"],
+)
+@click.option(
+    "--parquet-compression",
+    type=click.Choice(DEFAULT_PARQUET_COMPRESSIONS),
+    default=None,
+    help=documentation_utils.SUBSET["PARQUET_COMPRESSION_HELP"],
+)
 @click.option(
     "--overwrite",
     is_flag=True,
@@ -320,6 +357,20 @@ def cli_subset():
     is_flag=True,
     help=documentation_utils.SUBSET["NETCDF3_COMPATIBLE_HELP"],
 )
+@click.option(
+    "--streaming",
+    type=bool,
+    default=False,
+    is_flag=True,
+    help=documentation_utils.SUBSET["STREAMING_HELP"],
+)
+@click.option(
+    "--prefilter-platforms",
+    type=bool,
+    default=False,
+    is_flag=True,
+    help=documentation_utils.SUBSET["PREFILTER_PLATFORMS_HELP"],
+)
 @click.option(
     "--chunk-size-limit",
     type=click.IntRange(min=-1),
@@ -376,11 +427,18 @@ def subset(
     start_datetime: str | None,
     end_datetime: str | None,
     platform_ids: list[str] | None,
+    qc_flags: tuple[str, ...],
+    value_ranges: tuple[str, ...],
     coordinates_selection_method: CoordinatesSelectionMethod,
     output_filename: str | None,
     file_format: FileFormat | None,
+    parquet_partition_columns: tuple[str, ...],
+    parquet_row_group_size: int | None,
+    parquet_compression: ParquetCompression | None,
     netcdf_compression_level: int,
     netcdf3_compatible: bool,
+    streaming: bool,
+    prefilter_platforms: bool,
     service: str | None,
     create_template: bool,
     request_file: pathlib.Path | None,
@@ -427,10 +485,15 @@ def subset(
         start_datetime=start_datetime,
         end_datetime=end_datetime,
         platform_ids=platform_ids,
+        qc_flags=parse_qc_flags(qc_flags),
+        value_ranges=parse_value_ranges(value_ranges),
         coordinates_selection_method=coordinates_selection_method,
         staging=staging,
         output_filename=output_filename,
         file_format=file_format,
+        parquet_partition_columns=list(parquet_partition_columns) or None,
+        parquet_row_group_size=parquet_row_group_size,
+        parquet_compression=parquet_compression,
         service=service,
         request_file=request_file,
         output_directory=output_directory,
@@ -442,6 +505,8 @@ def subset(
         disable_progress_bar=disable_progress_bar,
         netcdf_compression_level=netcdf_compression_level,
         netcdf3_compatible=netcdf3_compatible,
+        streaming=streaming,
+        prefilter_platforms=prefilter_platforms,
         chunk_size_limit=chunk_size_limit,
         raise_if_updating=raise_if_updating,
         minimum_longitude=minimum_longitude,
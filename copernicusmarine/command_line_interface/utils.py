@@ -8,6 +8,7 @@ from copernicusmarine.core_functions import documentation_utils
 from copernicusmarine.core_functions.click_custom_class import (
     CustomDeprecatedClickOption,
 )
+from copernicusmarine.core_functions.request_structure import ALL_VARIABLES
 
 
 class MutuallyExclusiveOption(Option):
@@ -105,3 +106,56 @@ force_download_option = click.option(
     cls=CustomDeprecatedClickOption,
     custom_deprecated=["--force-download"],
 )
+
+
+def parse_qc_flags(
+    qc_flags: tuple[str, ...],
+) -> dict[str, list[int]] | None:
+    """
+    Parse the ``--qc-flag`` options, e.g. ``1`` for all the variables or
+    ``TEMP:1`` for a variable.
+    """
+    if not qc_flags:
+        return None
+    qc_flags_by_variable: dict[str, list[int]] = {}
+    for qc_flag in qc_flags:
+        variable, _, flag = qc_flag.rpartition(":")
+        try:
+            qc_flags_by_variable.setdefault(
+                variable or ALL_VARIABLES, []
+            ).append(int(flag))
+        except ValueError:
+            raise UsageError(
+                f"Invalid QC flag '{qc_flag}'. "
+                "Expected a flag (e.g. '1') or a variable and a flag "
+                "(e.g. 'TEMP:1')."
+            )
+    return qc_flags_by_variable
+
+
+def parse_value_ranges(
+    value_ranges: tuple[str, ...],
+) -> dict[str, tuple[float | None, float | None]] | None:
+    """
+    Parse the ``--value-range`` options, e.g. ``TEMP:-2:35`` or
+    ``PSAL::40``.
+    """
+    if not value_ranges:
+        return None
+    value_ranges_by_variable = {}
+    for value_range in value_ranges:
+        try:
+            variable, minimum, maximum = value_range.rsplit(":", 2)
+            if not variable:
+                raise ValueError
+            value_ranges_by_variable[variable] = (
+                float(minimum) if minimum else None,
+                float(maximum) if maximum else None,
+            )
+        except ValueError:
+            raise UsageError(
+                f"Invalid value range '{value_range}'. "
+                "Expected a variable, a minimum and a maximum "
+                "(e.g. 'TEMP:-2:35'), a bound can be left empty."
+            )
+    return value_ranges_by_variable
@@ -0,0 +1,175 @@
+import contextlib
+import logging
+import math
+import threading
+import time
+from typing import Callable, Iterator
+
+from copernicusmarine.core_functions.environment_variables import (
+    COPERNICUSMARINE_ADAPTIVE_CONCURRENCY,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+THROTTLING_STATUS_CODES = (429, 503)
+# Same as the default number of threads of boto3
+DEFAULT_INITIAL_CONCURRENCY = 10
+MAXIMUM_ADAPTIVE_CONCURRENCY = 64
+# Throughput is measured over windows of this duration
+MEASUREMENT_INTERVAL_SECONDS = 2.0
+# The limit is only raised if the throughput improved by this ratio
+MINIMUM_THROUGHPUT_IMPROVEMENT = 0.05
+MULTIPLICATIVE_DECREASE_FACTOR = 0.5
+
+
+class AdaptiveConcurrencyController:
+    """
+    Limit of concurrent requests adapted with an AIMD scheme.
+
+    At the end of each measurement window, the limit is increased by one
+    if the limit was reached and the throughput (completed requests per
+    second) improved compared to the previous window. It is cut by half
+    when the server throttles the requests (429, 503) or times out, at
+    most once per window so that a burst of errors counts only once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        maximum_limit: int = MAXIMUM_ADAPTIVE_CONCURRENCY,
+        minimum_limit: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.minimum_limit = minimum_limit
+        self.maximum_limit = max(maximum_limit, minimum_limit)
+        self._limit = min(
+            max(initial_limit, minimum_limit), self.maximum_limit
+        )
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._window_start = clock()
+        self._window_completed = 0
+        self._window_limit_reached = False
+        self._previous_throughput: float | None = None
+        self._last_decrease: float | None = None
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Hold one of the concurrent requests allowed by the limit.
+        """
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._window_limit_reached = True
+                self._condition.wait()
+            self._in_flight += 1
+            if self._in_flight >= self._limit:
+                self._window_limit_reached = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._window_completed += 1
+                self._update_limit()
+                self._condition.notify_all()
+
+    def record_throttling(self) -> None:
+        with self._condition:
+            now = self._clock()
+            if (
+                self._last_decrease is not None
+                and now - self._last_decrease < MEASUREMENT_INTERVAL_SECONDS
+            ):
+                return
+            self._last_decrease = now
+            new_limit = max(
+                math.floor(self._limit * MULTIPLICATIVE_DECREASE_FACTOR),
+                self.minimum_limit,
+            )
+            if new_limit != self._limit:
+                logger.debug(
+                    f"Server is throttling, reducing the number of "
+                    f"concurrent requests to {new_limit}"
+                )
+            self._limit = new_limit
+            self._start_window(now, previous_throughput=None)
+
+    def _update_limit(self) -> None:
+        now = self._clock()
+        elapsed = now - self._window_start
+        if elapsed < MEASUREMENT_INTERVAL_SECONDS:
+            return
+        throughput = self._window_completed / elapsed
+        if (
+            self._window_limit_reached
+            and self._limit < self.maximum_limit
+            and (
+                self._previous_throughput is None
+                or throughput
+                > self._previous_throughput
+                * (1 + MINIMUM_THROUGHPUT_IMPROVEMENT)
+            )
+        ):
+            self._limit += 1
+            logger.debug(
+                f"Increasing the number of concurrent requests "
+                f"to {self._limit}"
+            )
+        self._start_window(now, previous_throughput=throughput)
+
+    def _start_window(
+        self, now: float, previous_throughput: float | None
+    ) -> None:
+        self._window_start = now
+        self._window_completed = 0
+        self._window_limit_reached = False
+        self._previous_throughput = previous_throughput
+
+
+_adaptive_concurrency_controller: AdaptiveConcurrencyController | None = None
+_controller_lock = threading.Lock()
+
+
+def get_adaptive_concurrency_controller(
+    initial_limit: int = DEFAULT_INITIAL_CONCURRENCY,
+) -> AdaptiveConcurrencyController | None:
+    """
+    Controller shared by all the requests of the process, created with
+    ``initial_limit`` the first time. None unless
+    ``COPERNICUSMARINE_ADAPTIVE_CONCURRENCY`` is set to "True".
+    """
+    global _adaptive_concurrency_controller
+    if not COPERNICUSMARINE_ADAPTIVE_CONCURRENCY:
+        return None
+    with _controller_lock:
+        if _adaptive_concurrency_controller is None:
+            _adaptive_concurrency_controller = AdaptiveConcurrencyController(
+                initial_limit
+            )
+        return _adaptive_concurrency_controller
+
+
+def concurrency_slot(
+    initial_limit: int = DEFAULT_INITIAL_CONCURRENCY,
+) -> contextlib.AbstractContextManager:
+    """
+    Slot of the shared controller, or nothing if it is not activated.
+    """
+    controller = get_adaptive_concurrency_controller(initial_limit)
+    if controller is None:
+        return contextlib.nullcontext()
+    return controller.slot()
+
+
+def record_throttling() -> None:
+    """
+    Tell the shared controller, if any, that the server is throttling.
+    """
+    if _adaptive_concurrency_controller is not None:
+        _adaptive_concurrency_controller.record_throttling()
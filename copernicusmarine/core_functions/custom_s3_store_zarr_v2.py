@@ -6,6 +6,9 @@ import botocore.config
 import botocore.exceptions
 import botocore.session
 
+from copernicusmarine.core_functions.adaptive_concurrency import (
+    concurrency_slot,
+)
 from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
 
 logger = logging.getLogger("copernicusmarine")
@@ -59,10 +62,11 @@ class CustomS3StoreZarrV2(MutableMapping):
         def fn():
             full_key = f"{self._root_path}/{key}"
             try:
-                resp = self._get_session().get_object(
-                    bucket_name=self._bucket, object_key=full_key
-                )
-                res = resp["Body"].read()
+                with concurrency_slot():
+                    resp = self._get_session().get_object(
+                        bucket_name=self._bucket, object_key=full_key
+                    )
+                    res = resp["Body"].read()
                 return res
             except botocore.exceptions.ClientError as e:
                 raise KeyError(key) from e
@@ -10,6 +10,9 @@ from zarr.abc.store import ByteRequest, Store
 from zarr.core.buffer import Buffer, BufferPrototype, default_buffer_prototype
 from zarr.core.common import BytesLike
 
+from copernicusmarine.core_functions.adaptive_concurrency import (
+    concurrency_slot,
+)
 from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
 
 logger = logging.getLogger("copernicusmarine")
@@ -83,11 +86,12 @@ class CustomS3StoreZarrV3(Store):
         def fn():
             full_key = f"{self._root_path}/{key}"
             try:
-                resp = self._get_session().get_object(
-                    bucket_name=self._bucket,
-                    object_key=full_key,
-                )
-                res = resp["Body"].read()
+                with concurrency_slot():
+                    resp = self._get_session().get_object(
+                        bucket_name=self._bucket,
+                        object_key=full_key,
+                    )
+                    res = resp["Body"].read()
                 return prototype.buffer.from_bytes(res)
             except botocore.exceptions.ClientError as e:
                 status = e.response["ResponseMetadata"]["HTTPStatusCode"]
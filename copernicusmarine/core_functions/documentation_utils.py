@@ -213,6 +213,16 @@ SUBSET: dict[str, str] = {
         "Specify platform ID. Can be used multiple times. "
         "Only available for platform chunked datasets."
     ),
+    "QC_FLAGS_HELP": (
+        "Keep only the values with this QC flag, for all the variables "
+        "(e.g. ``1``) or for one variable (e.g. ``TEMP:1``). Can be used "
+        "multiple times. Only available for sparse datasets."
+    ),
+    "VALUE_RANGES_HELP": (
+        "Keep only the values of a variable within a range, e.g. "
+        "``TEMP:-2:35``. A bound can be left empty, e.g. ``PSAL::40``. "
+        "Can be used multiple times. Only available for sparse datasets."
+    ),
     "COORDINATES_SELECTION_METHOD_HELP": (
         "If ``inside``, the "
         "selection retrieved will be inside the requested range. If ``strict-"
@@ -238,6 +248,24 @@ SUBSET: dict[str, str] = {
         "For gridded datasets, the following formats are available: netcdf, zarr, csv. "
         "For sparse datasets, the following formats are available: csv, netcdf, parquet."  # noqa
     ),
+    "PARQUET_PARTITION_COLUMNS_HELP": (
+        "Partition the Parquet output by this column: the output is then a "
+        "directory of Hive partitions, e.g. "
+        "``platform_type=PF/platform_id=6901234/``. Can be used multiple "
+        "times, the partitions being nested in the given order. Possible "
+        "columns: platform_type, platform_id, variable, value_qc, "
+        "is_depth_from_producer, institution, doi, product_doi, and the "
+        "year and month of the time. Only available for sparse datasets."
+    ),
+    "PARQUET_ROW_GROUP_SIZE_HELP": (
+        "Maximum number of rows of the row groups of the Parquet output. "
+        "By default, the one of pyarrow (about one million rows). "
+        "Only available for sparse datasets."
+    ),
+    "PARQUET_COMPRESSION_HELP": (
+        "Compression codec of the Parquet output. Default is snappy. "
+        "Only available for sparse datasets."
+    ),
     "MOTU_API_REQUEST_HELP": (
         "Option to pass a complete MOTU API request as a string. Caution, user has to "
         """replace double quotes " with single quotes ' in the request."""
@@ -249,6 +277,22 @@ SUBSET: dict[str, str] = {
     "NETCDF3_COMPATIBLE_HELP": (
         "Enable downloading the dataset in a netCDF3 compatible format."
     ),
+    "STREAMING_HELP": (
+        "Download the chunks of a sparse dataset to a temporary directory "
+        "and transform them one at a time, instead of loading the whole "
+        "subset in memory. The rows are then sorted within each chunk only. "
+        "Only available for sparse datasets."
+    ),
+    "PREFILTER_PLATFORMS_HELP": (
+        "Without requested platform IDs, request only the platforms whose "
+        "files in the index files of the original files of a sparse dataset "
+        "(INSITU datasets) can have data in the requested area and time range. "
+        "The index files are downloaded once and cached, which can be a large "
+        "download for the global products. The platforms not in the index "
+        "files are always requested, but a platform whose data was updated "
+        "after the index files may be missed. Only available for sparse "
+        "datasets."
+    ),
     "CHUNK_SIZE_LIMIT_HELP": (
         "Limit the size of the chunks in the dask array. Default is set to -1 which "
         "behaves similarly to 'chunks=auto' from ``xarray``. Positive integer"
@@ -305,6 +349,15 @@ GET: dict[str, str] = {
         "name specified should end with '.txt' or '.csv'. If specified, no other "
         "action will be performed."
     ),
+    "OUTPUT_ARCHIVE_HELP": (
+        "Option to write the downloaded files into a single archive instead of "
+        "one file each. It writes the archive to the specified output directory "
+        "(default to current directory). The archive name should end with "
+        "'.tar', '.tar.zst' (requires the 'zstandard' package) or '.zip'. "
+        "Use '-' to write a tar archive to the standard output, for example to "
+        "pipe it to another command. Not compatible with the sync and skip "
+        "existing options."
+    ),
     "SYNC_HELP": (
         "Option to synchronize the local directory with the remote directory. See the "
         "documentation for more details. Requires to set ``--dataset-version``."
@@ -316,6 +369,35 @@ GET: dict[str, str] = {
     "INDEX_PARTS_HELP": (
         "Option to get the index files of an INSITU dataset."
     ),
+    "MINIMUM_LONGITUDE_HELP": (
+        "Minimum longitude of the files to download. Only for INSITU datasets: "
+        "the files are selected with the index files instead of listing them."
+    ),
+    "MAXIMUM_LONGITUDE_HELP": (
+        "Maximum longitude of the files to download. Only for INSITU datasets: "
+        "the files are selected with the index files instead of listing them."
+    ),
+    "MINIMUM_LATITUDE_HELP": (
+        "Minimum latitude of the files to download. Only for INSITU datasets: "
+        "the files are selected with the index files instead of listing them."
+    ),
+    "MAXIMUM_LATITUDE_HELP": (
+        "Maximum latitude of the files to download. Only for INSITU datasets: "
+        "the files are selected with the index files instead of listing them."
+    ),
+    "START_DATETIME_HELP": (
+        "Start datetime of the files to download. Only for INSITU datasets: "
+        "the files are selected with the index files instead of listing them."
+    ),
+    "END_DATETIME_HELP": (
+        "End datetime of the files to download. Only for INSITU datasets: "
+        "the files are selected with the index files instead of listing them."
+    ),
+    "PLATFORM_IDS_HELP": (
+        "Platform ID of the files to download. Can be used multiple times. "
+        "Only for INSITU datasets: "
+        "the files are selected with the index files instead of listing them."
+    ),
     "NO_DIRECTORIES_HELP": (
         "If True, downloaded files will not be organized into directories."
     ),
@@ -44,6 +44,14 @@ COPERNICUSMARINE_HTTPS_RETRIES = os.getenv(
     "COPERNICUSMARINE_HTTPS_RETRIES", "5"
 )
 
+COPERNICUSMARINE_MAX_BYTES_PER_SECOND = os.getenv(
+    "COPERNICUSMARINE_MAX_BYTES_PER_SECOND"
+)
+
+COPERNICUSMARINE_MAX_REQUESTS_PER_SECOND = os.getenv(
+    "COPERNICUSMARINE_MAX_REQUESTS_PER_SECOND"
+)
+
 PROXY_HTTPS = os.getenv("HTTPS_PROXY", "")
 PROXY_HTTP = os.getenv("HTTP_PROXY", "")
 
@@ -54,3 +62,24 @@ COPERNICUSMARINE_CONFIG_URL = os.getenv(
 COPERNICUSMARINE_USE_THREADS = (
     os.getenv("COPERNICUSMARINE_USE_THREADS", "True") == "True"
 )
+
+COPERNICUSMARINE_SPARSE_NETCDF_PROCESSES = os.getenv(
+    "COPERNICUSMARINE_SPARSE_NETCDF_PROCESSES"
+)
+
+COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_TTL = os.getenv(
+    "COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_TTL", "600"
+)
+
+COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_CACHE = (
+    os.getenv("COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_CACHE", "False")
+    == "True"
+)
+
+COPERNICUSMARINE_SYNC_MANIFEST = (
+    os.getenv("COPERNICUSMARINE_SYNC_MANIFEST", "False") == "True"
+)
+
+COPERNICUSMARINE_ADAPTIVE_CONCURRENCY = (
+    os.getenv("COPERNICUSMARINE_ADAPTIVE_CONCURRENCY", "False") == "True"
+)
@@ -12,9 +12,13 @@ from copernicusmarine.core_functions.services_utils import (
     RetrievalService,
     get_retrieval_service,
 )
-from copernicusmarine.core_functions.utils import get_unique_filepath
+from copernicusmarine.core_functions.utils import (
+    get_unique_filepath,
+    run_concurrently,
+)
 from copernicusmarine.download_functions.download_original_files import (
     download_original_files,
+    download_original_files_batch,
 )
 
 logger = logging.getLogger("copernicusmarine")
@@ -39,21 +43,67 @@ def get_function(
     )
 
 
-def _run_get_request(
-    get_request: GetRequest,
-    create_file_list: str | None,
-    marine_datastore_config: MarineDataStoreConfig,
-    max_concurrent_requests: int,
-    disable_progress_bar: bool,
+def get_batch_function(
+    get_requests: list[GetRequest],
+    staging: bool,
 ) -> ResponseGet:
-    logger.debug("Checking dataset metadata...")
+    """
+    Run several get requests at once: the metadata of the datasets is
+    fetched concurrently and their files are downloaded by one pool of
+    workers. Returns one response for all the requests.
+
+    With a single request, same as :func:`get_function`.
+    """
+    if len(get_requests) == 1:
+        return get_function(get_requests[0], staging)
+    marine_datastore_config = get_config_and_check_version_get(staging)
+    if staging:
+        logger.warning(
+            "Detecting staging flag for get command. "
+            "Data will come from the staging environment."
+        )
+    max_concurrent_requests = max(
+        get_request.max_concurrent_requests for get_request in get_requests
+    )
+    logger.debug("Checking datasets metadata...")
+    run_concurrently(
+        _set_dataset_url,
+        [
+            (get_request, marine_datastore_config)
+            for get_request in get_requests
+        ],
+        max_concurrent_requests,
+        tdqm_bar_configuration={"disable": True},
+    )
+    return download_original_files_batch(
+        get_requests[0].username,
+        get_requests,
+        max_concurrent_requests,
+        any(get_request.disable_progress_bar for get_request in get_requests),
+    )
+
 
+def _set_dataset_url(
+    get_request: GetRequest,
+    marine_datastore_config: MarineDataStoreConfig,
+) -> None:
     retrieval_service: RetrievalService = get_retrieval_service(
         request=get_request,
         command_type=CommandType.GET,
         marine_datastore_config=marine_datastore_config,
     )
     get_request.dataset_url = retrieval_service.uri
+
+
+def _run_get_request(
+    get_request: GetRequest,
+    create_file_list: str | None,
+    marine_datastore_config: MarineDataStoreConfig,
+    max_concurrent_requests: int,
+    disable_progress_bar: bool,
+) -> ResponseGet:
+    logger.debug("Checking dataset metadata...")
+    _set_dataset_url(get_request, marine_datastore_config)
     downloaded_files = download_original_files(
         get_request.username,
         get_request,
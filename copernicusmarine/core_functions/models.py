@@ -26,6 +26,10 @@ DEFAULT_COORDINATES_SELECTION_METHODS = list(
     get_args(CoordinatesSelectionMethod)
 )
 
+ParquetCompression = Literal["snappy", "gzip", "brotli", "lz4", "zstd", "none"]
+DEFAULT_PARQUET_COMPRESSION: ParquetCompression = "snappy"
+DEFAULT_PARQUET_COMPRESSIONS = list(get_args(ParquetCompression))
+
 VerticalAxis = Literal["depth", "elevation"]
 DEFAULT_VERTICAL_AXIS: VerticalAxis = "depth"
 DEFAULT_VERTICAL_AXES = list(get_args(VerticalAxis))
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+from copernicusmarine.core_functions.environment_variables import (
+    COPERNICUSMARINE_MAX_BYTES_PER_SECOND,
+    COPERNICUSMARINE_MAX_REQUESTS_PER_SECOND,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+
+class TokenBucket:
+    """
+    Token bucket refilled with ``rate`` tokens per second, holding at
+    most one second of tokens.
+
+    Taking more tokens than available puts the bucket in debt: the
+    caller sleeps until the debt is paid back. Hence the callers are
+    served in turn and the average rate never exceeds ``rate``, even
+    when a single call takes more tokens than the bucket can hold.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = max(rate, 1.0)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> None:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._tokens + (now - self._last_refill) * self.rate,
+                self.capacity,
+            )
+            self._last_refill = now
+            self._tokens -= amount
+            waiting_time = -self._tokens / self.rate
+        if waiting_time > 0:
+            self._sleep(waiting_time)
+
+
+def _parse_rate(name: str, value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        rate = float(value)
+    except ValueError:
+        rate = 0
+    if rate <= 0:
+        logger.warning(f"Ignoring {name}={value}: expected a positive number.")
+        return None
+    return rate
+
+
+_MAX_BYTES_PER_SECOND = _parse_rate(
+    "COPERNICUSMARINE_MAX_BYTES_PER_SECOND",
+    COPERNICUSMARINE_MAX_BYTES_PER_SECOND,
+)
+_MAX_REQUESTS_PER_SECOND = _parse_rate(
+    "COPERNICUSMARINE_MAX_REQUESTS_PER_SECOND",
+    COPERNICUSMARINE_MAX_REQUESTS_PER_SECOND,
+)
+# Shared by all the sessions, threads and stores of the process
+_bytes_bucket = (
+    TokenBucket(_MAX_BYTES_PER_SECOND) if _MAX_BYTES_PER_SECOND else None
+)
+_requests_bucket = (
+    TokenBucket(_MAX_REQUESTS_PER_SECOND) if _MAX_REQUESTS_PER_SECOND else None
+)
+
+
+def is_rate_limited() -> bool:
+    return _bytes_bucket is not None or _requests_bucket is not None
+
+
+def limit_request() -> None:
+    """
+    Wait until a request can be sent without exceeding
+    ``COPERNICUSMARINE_MAX_REQUESTS_PER_SECOND``.
+    """
+    if _requests_bucket is not None:
+        _requests_bucket.acquire()
+
+
+def limit_bytes(number_of_bytes: int) -> None:
+    """
+    Wait until ``number_of_bytes`` received bytes fit in
+    ``COPERNICUSMARINE_MAX_BYTES_PER_SECOND``.
+    """
+    if _bytes_bucket is not None and number_of_bytes > 0:
+        _bytes_bucket.acquire(number_of_bytes)
+
+
+class RateLimitedBody:
+    """
+    Wrap the body of a GetObject response, or the raw urllib3 response
+    of a streamed ``requests`` response, so that the bytes read from it
+    count towards ``COPERNICUSMARINE_MAX_BYTES_PER_SECOND``.
+    """
+
+    def __init__(self, body: Any) -> None:
+        self._body = body
+
+    def read(self, amt: int | None = None) -> bytes:
+        chunk = self._body.read(amt)
+        limit_bytes(len(chunk))
+        return chunk
+
+    def iter_chunks(self, chunk_size: int = 1024) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.iter_chunks()
+
+    def stream(self, *args: Any, **kwargs: Any) -> Iterator[bytes]:
+        # Used by the iter_content of requests
+        for chunk in self._body.stream(*args, **kwargs):
+            limit_bytes(len(chunk))
+            yield chunk
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._body, name)
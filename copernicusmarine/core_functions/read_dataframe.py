@@ -6,7 +6,10 @@ from copernicusmarine.catalogue_parser.models import (
 )
 from copernicusmarine.core_functions.exceptions import ServiceNotSupported
 from copernicusmarine.core_functions.request_structure import SubsetRequest
-from copernicusmarine.core_functions.services_utils import RetrievalService
+from copernicusmarine.core_functions.services_utils import (
+    RetrievalService,
+    get_original_files_url,
+)
 from copernicusmarine.core_functions.subset import (
     retrieve_metadata_and_check_request,
 )
@@ -43,6 +46,9 @@ def read_dataframe_function(
             service=retrieval_service.service,
             product_doi=retrieval_service.product_doi,
             disable_progress_bar=subset_request.disable_progress_bar,
+            original_files_url=get_original_files_url(
+                retrieval_service.dataset_part
+            ),
         )
     else:
         dataset, _, _ = get_dataset_and_parameters(
@@ -31,12 +31,20 @@ from copernicusmarine.core_functions.models import (
     DEFAULT_COORDINATES_SELECTION_METHOD,
     DEFAULT_FILE_EXTENSIONS,
     DEFAULT_FILE_FORMAT,
+    DEFAULT_PARQUET_COMPRESSION,
     DEFAULT_VERTICAL_AXIS,
     CoordinatesSelectionMethod,
     FileFormat,
+    ParquetCompression,
     VerticalAxis,
 )
 from copernicusmarine.core_functions.utils import datetime_parser
+from copernicusmarine.download_functions.archive_writer import (
+    ARCHIVE_EXTENSIONS,
+    STDOUT_ARCHIVE,
+    TAR_ZSTD_EXTENSIONS,
+    is_zstd_available,
+)
 from copernicusmarine.download_functions.subset_parameters import (
     DepthParameters,
     GeographicalParameters,
@@ -58,6 +66,24 @@ MAPPING_REQUEST_FILES_AND_REQUEST_OPTIONS: dict[str, str] = {
 
 SubsetRequest_ = TypeVar("SubsetRequest_", bound="SubsetRequest")
 
+# Key of the QC flags of the variables without their own QC flags
+ALL_VARIABLES = "*"
+
+# Output columns of the sparse datasets that the Parquet output can be
+# partitioned by, the year and month being computed from the time
+PARQUET_PARTITION_COLUMNS = [
+    "platform_type",
+    "platform_id",
+    "variable",
+    "value_qc",
+    "is_depth_from_producer",
+    "institution",
+    "doi",
+    "product_doi",
+    "year",
+    "month",
+]
+
 
 class SubsetRequest(BaseModel):
     dataset_id: str
@@ -75,17 +101,24 @@ class SubsetRequest(BaseModel):
     start_datetime: datetime | None = None
     end_datetime: datetime | None = None
     platform_ids: list[str] | None = None
+    qc_flags: dict[str, list[int]] | None = None
+    value_ranges: dict[str, tuple[float | None, float | None]] | None = None
     coordinates_selection_method: CoordinatesSelectionMethod = (
         DEFAULT_COORDINATES_SELECTION_METHOD
     )
     output_filename: str | None = None
     file_format: FileFormat = DEFAULT_FILE_FORMAT
+    parquet_partition_columns: list[str] | None = None
+    parquet_row_group_size: int | None = None
+    parquet_compression: ParquetCompression = DEFAULT_PARQUET_COMPRESSION
     service: str | None = None
     output_directory: pathlib.Path = pathlib.Path(".")
     overwrite: bool = False
     skip_existing: bool = False
     netcdf_compression_level: int = 0
     netcdf3_compatible: bool = False
+    streaming: bool = False
+    prefilter_platforms: bool = False
     dry_run: bool = False
     raise_if_updating: bool = False
     disable_progress_bar: bool = False
@@ -120,6 +153,41 @@ class SubsetRequest(BaseModel):
             return v.to_pydatetime().astimezone(UTC)
         return v.astimezone(UTC)
 
+    @field_validator("qc_flags", mode="before")
+    @classmethod
+    def parse_qc_flags(
+        cls, v: list[int] | dict[str, list[int]] | None
+    ) -> dict[str, list[int]] | None:
+        if isinstance(v, (list, tuple)):
+            return {ALL_VARIABLES: list(v)}
+        return v
+
+    @field_validator("parquet_partition_columns")
+    @classmethod
+    def check_parquet_partition_columns(
+        cls, v: list[str] | None
+    ) -> list[str] | None:
+        for column in v or []:
+            if column not in PARQUET_PARTITION_COLUMNS:
+                raise ValueError(
+                    f"Cannot partition the Parquet output by '{column}'. "
+                    f"Possible columns: {', '.join(PARQUET_PARTITION_COLUMNS)}."
+                )
+        if v and len(set(v)) != len(v):
+            raise ValueError(
+                "The Parquet partition columns must be given only once."
+            )
+        return v
+
+    @field_validator("parquet_row_group_size")
+    @classmethod
+    def check_parquet_row_group_size(cls, v: int | None) -> int | None:
+        if v is not None and v < 1:
+            raise ValueError(
+                "The Parquet row group size must be a positive integer."
+            )
+        return v
+
     @classmethod
     def from_file(
         cls: Type[SubsetRequest_],
@@ -262,11 +330,16 @@ def create_subset_request(
     start_datetime: datetime | pd.Timestamp | str | None = None,
     end_datetime: datetime | pd.Timestamp | str | None = None,
     platform_ids: list[str] | None = None,
+    qc_flags: list[int] | dict[str, list[int]] | None = None,
+    value_ranges: (dict[str, tuple[float | None, float | None]] | None) = None,
     coordinates_selection_method: CoordinatesSelectionMethod = (
         DEFAULT_COORDINATES_SELECTION_METHOD
     ),
     output_filename: str | None = None,
     file_format: FileFormat | None = None,
+    parquet_partition_columns: list[str] | None = None,
+    parquet_row_group_size: int | None = None,
+    parquet_compression: ParquetCompression | None = None,
     service: str | None = None,
     request_file: pathlib.Path | None = None,
     output_directory: pathlib.Path | None = None,
@@ -279,6 +352,8 @@ def create_subset_request(
     staging: bool = False,
     netcdf_compression_level: int = 0,
     netcdf3_compatible: bool = False,
+    streaming: bool = False,
+    prefilter_platforms: bool = False,
     chunk_size_limit: int = 0,
     raise_if_updating: bool = False,
     minimum_longitude: float | None = None,
@@ -402,8 +477,13 @@ def create_subset_request(
         "start_datetime": start_datetime,
         "end_datetime": end_datetime,
         "platform_ids": platform_ids,
+        "qc_flags": qc_flags,
+        "value_ranges": value_ranges,
         "output_filename": output_filename,
         "file_format": file_format,
+        "parquet_partition_columns": parquet_partition_columns,
+        "parquet_row_group_size": parquet_row_group_size,
+        "parquet_compression": parquet_compression,
         "service": service,
         "output_directory": output_directory,
         "chunk_size_limit": chunk_size_limit,
@@ -419,6 +499,10 @@ def create_subset_request(
         ] = netcdf_compression_level
     if netcdf3_compatible:
         request_update_dict["netcdf3_compatible"] = netcdf3_compatible
+    if streaming:
+        request_update_dict["streaming"] = streaming
+    if prefilter_platforms:
+        request_update_dict["prefilter_platforms"] = prefilter_platforms
     if coordinates_selection_method != DEFAULT_COORDINATES_SELECTION_METHOD:
         request_update_dict[
             "coordinates_selection_method"
@@ -528,6 +612,17 @@ def get_geographical_inputs(
             )
 
 
+GET_REQUEST_INDEX_FILTER_OPTIONS = [
+    "minimum_longitude",
+    "maximum_longitude",
+    "minimum_latitude",
+    "maximum_latitude",
+    "start_datetime",
+    "end_datetime",
+    "platform_ids",
+]
+
+
 class GetRequest(BaseModel):
     dataset_id: str
     username: str
@@ -548,7 +643,40 @@ class GetRequest(BaseModel):
     skip_existing: bool = False
     disable_progress_bar: bool = False
     create_file_list: str | None = None
+    output_archive: str | None = None
     max_concurrent_requests: int = 15
+    minimum_longitude: float | None = None
+    maximum_longitude: float | None = None
+    minimum_latitude: float | None = None
+    maximum_latitude: float | None = None
+    start_datetime: datetime | None = None
+    end_datetime: datetime | None = None
+    platform_ids: list[str] | None = None
+
+    @field_validator("start_datetime", "end_datetime", mode="before")
+    @classmethod
+    def parse_datetime(
+        cls, v: datetime | pd.Timestamp | str | None
+    ) -> datetime | None:
+        return SubsetRequest.parse_datetime(v)
+
+    def uses_index_files(self) -> bool:
+        """
+        Whether the files are selected from the index files
+        of the dataset instead of listing it.
+        """
+        return any(
+            value is not None and value != []
+            for value in (
+                self.minimum_longitude,
+                self.maximum_longitude,
+                self.minimum_latitude,
+                self.maximum_latitude,
+                self.start_datetime,
+                self.end_datetime,
+                self.platform_ids,
+            )
+        )
 
     def update(self, new_dict: dict) -> "GetRequest":
         filtered_dict = {
@@ -578,13 +706,17 @@ class GetRequest(BaseModel):
                 "index_parts",
             ]:
                 new_value = bool(value) if value is not None else None
+            elif key in GET_REQUEST_INDEX_FILTER_OPTIONS:
+                new_value = value
             else:
                 new_value = str(value) if value else None
             type_enforced_dict[key] = new_value
         self.__dict__.update(type_enforced_dict)
 
     def from_file(self, filepath: pathlib.Path):
-        json_file = json.load(open(filepath))
+        self.from_dict(json.load(open(filepath)))
+
+    def from_dict(self, json_file: dict):
         json_with_mapped_options = {}
         for key, val in json_file.items():
             if key in MAPPING_REQUEST_FILES_AND_REQUEST_OPTIONS:
@@ -593,6 +725,12 @@ class GetRequest(BaseModel):
             else:
                 json_with_mapped_options[key] = val
         self.__dict__.update(json_with_mapped_options)
+        # Otherwise the options of the file are lost by ``update``
+        self.__pydantic_fields_set__.update(
+            key
+            for key in json_with_mapped_options
+            if key in type(self).model_fields
+        )
         self.enforce_types()
         full_regex = self.regex
         if self.filter:
@@ -630,25 +768,35 @@ def create_get_request(
     dry_run: bool,
     max_concurrent_requests: int,
     disable_progress_bar: bool,
+    minimum_longitude: float | None = None,
+    maximum_longitude: float | None = None,
+    minimum_latitude: float | None = None,
+    maximum_latitude: float | None = None,
+    start_datetime: datetime | str | None = None,
+    end_datetime: datetime | str | None = None,
+    platform_ids: list[str] | None = None,
+    output_archive: str | None = None,
+    request_content: dict | None = None,
+    credentials_checked: bool = False,
 ) -> GetRequest:
-    logger.debug("Checking username and password...")
-    if request_file:
+    """
+    ``request_content`` replaces the content of the request file, for the
+    requests of a request file with a list of requests. If
+    ``credentials_checked``, ``username`` is the already checked user.
+    """
+    if request_file and request_content is None:
         with open(request_file) as json_file:
-            json_content = json.load(json_file)
-        if "username" in json_content and not username:
-            username = json_content["username"]
-        if "password" in json_content and not password:
-            password = json_content["password"]
-        if "credentials_file" in json_content and not credentials_file:
-            credentials_file = pathlib.Path(json_content["credentials_file"])
-
-    username, _ = get_and_check_username_password(
-        username, password, credentials_file
-    )
+            request_content = json.load(json_file)
+    if not credentials_checked:
+        logger.debug("Checking username and password...")
+        username, _ = _get_and_check_username_password_of_request(
+            username, password, credentials_file, request_content
+        )
+    assert username is not None
     get_request = GetRequest(dataset_id=dataset_id or "", username=username)
 
-    if request_file:
-        get_request.from_file(request_file)
+    if request_content is not None:
+        get_request.from_dict(request_content)
         if dataset_id:
             get_request.dataset_id = dataset_id
     (
@@ -659,7 +807,7 @@ def create_get_request(
         dataset_version or get_request.dataset_version,
     )
 
-    request_update_dict = {
+    request_update_dict: dict[str, Any] = {
         "output_directory": output_directory,
         "username": username,
         "max_concurrent_requests": max_concurrent_requests,
@@ -705,14 +853,168 @@ def create_get_request(
                 f"Got '{create_file_list}' instead."
             )
         request_update_dict["create_file_list"] = create_file_list
+    if output_archive is not None:
+        _check_output_archive(output_archive)
+        if sync or sync_delete or skip_existing:
+            raise ValueError(
+                "The files written into an archive cannot be synchronized "
+                "or skipped. Please remove the sync and skip existing options."
+            )
+        request_update_dict["output_archive"] = output_archive
     if file_list:
         direct_download_files = get_direct_download_files(file_list)
         if direct_download_files:
             get_request.direct_download = direct_download_files
     if create_file_list or dry_run:
         request_update_dict["dry_run"] = True
+    index_filter_options = {
+        "minimum_longitude": minimum_longitude,
+        "maximum_longitude": maximum_longitude,
+        "minimum_latitude": minimum_latitude,
+        "maximum_latitude": maximum_latitude,
+        "start_datetime": start_datetime,
+        "end_datetime": end_datetime,
+        "platform_ids": list(platform_ids) if platform_ids else None,
+    }
+    for option, value in index_filter_options.items():
+        # From the request file if not set as an argument
+        request_update_dict[option] = (
+            value if value is not None else getattr(get_request, option)
+        )
+
+    get_request = get_request.update(request_update_dict)
+    if get_request.uses_index_files():
+        if get_request.index_parts:
+            raise ValueError(
+                "The index files cannot be downloaded while filtering "
+                "the files with them. Please remove the index parts option."
+            )
+        if get_request.direct_download:
+            raise ValueError(
+                "The files cannot be filtered with the index files "
+                "of the dataset when a file list is given."
+            )
+    return get_request
+
+
+def create_get_requests(
+    request_file: pathlib.Path | None,
+    dataset_id: str | None,
+    dataset_version: str | None,
+    dataset_part: str | None,
+    username: str | None,
+    password: str | None,
+    credentials_file: pathlib.Path | None,
+    **kwargs: Any,
+) -> list[GetRequest]:
+    """
+    Same as :func:`create_get_request` but the request file can contain
+    a list of requests. The other arguments then apply to all of them.
+    """
+    request_content = None
+    if request_file:
+        with open(request_file) as json_file:
+            request_content = json.load(json_file)
+    if not isinstance(request_content, list):
+        return [
+            create_get_request(
+                request_file=request_file,
+                dataset_id=dataset_id,
+                dataset_version=dataset_version,
+                dataset_part=dataset_part,
+                username=username,
+                password=password,
+                credentials_file=credentials_file,
+                request_content=request_content,
+                **kwargs,
+            )
+        ]
+    if dataset_id or dataset_version or dataset_part:
+        raise ValueError(
+            "The dataset ID, version and part cannot be set as arguments "
+            "when the request file contains a list of requests. "
+            "Please set them in each request of the request file."
+        )
+    if not request_content or not all(
+        isinstance(content, dict) for content in request_content
+    ):
+        raise ValueError(
+            f"The request file {request_file} must contain one request "
+            "or a non-empty list of requests."
+        )
+    for option in ("create_file_list", "output_archive"):
+        if kwargs.get(option) or any(
+            content.get(option) for content in request_content
+        ):
+            raise ValueError(
+                f"The option {option} cannot be used when the request file "
+                "contains a list of requests."
+            )
+    for option in ("username", "password", "credentials_file"):
+        if any(option in content for content in request_content):
+            raise ValueError(
+                f"The option {option} cannot be set in the requests of a "
+                "list of requests. Please set the credentials as arguments, "
+                "with the environment variables or in the credentials file."
+            )
+    logger.debug("Checking username and password...")
+    username, _ = get_and_check_username_password(
+        username, password, credentials_file
+    )
+    return [
+        create_get_request(
+            request_file=request_file,
+            dataset_id=None,
+            dataset_version=None,
+            dataset_part=None,
+            username=username,
+            password=password,
+            credentials_file=credentials_file,
+            request_content=content,
+            credentials_checked=True,
+            **kwargs,
+        )
+        for content in request_content
+    ]
 
-    return get_request.update(request_update_dict)
+
+def _get_and_check_username_password_of_request(
+    username: str | None,
+    password: str | None,
+    credentials_file: pathlib.Path | None,
+    request_content: dict | None,
+) -> tuple[str, str]:
+    if request_content:
+        if "username" in request_content and not username:
+            username = request_content["username"]
+        if "password" in request_content and not password:
+            password = request_content["password"]
+        if "credentials_file" in request_content and not credentials_file:
+            credentials_file = pathlib.Path(
+                request_content["credentials_file"]
+            )
+    return get_and_check_username_password(
+        username, password, credentials_file
+    )
+
+
+def _check_output_archive(output_archive: str) -> None:
+    if output_archive != STDOUT_ARCHIVE and not output_archive.endswith(
+        ARCHIVE_EXTENSIONS
+    ):
+        raise ValueError(
+            "The output archive must be a "
+            f"{', '.join(repr(extension) for extension in ARCHIVE_EXTENSIONS)}"
+            f" file or '{STDOUT_ARCHIVE}'. Got '{output_archive}' instead."
+        )
+    if (
+        output_archive.endswith(TAR_ZSTD_EXTENSIONS)
+        and not is_zstd_available()
+    ):
+        raise ValueError(
+            "The package 'zstandard' is required to write "
+            "'.tar.zst' archives. Please install it."
+        )
 
 
 def filter_to_regex(filter: str) -> str:
@@ -0,0 +1,257 @@
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable
+
+from s3transfer.utils import S3_RETRYABLE_DOWNLOAD_ERRORS
+
+from copernicusmarine.core_functions.transfer_scheduler import (
+    TransferScheduler,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+PART_FILE_SUFFIX = ".part"
+PART_STATE_FILE_SUFFIX = ".part.json"
+# Same as the default multipart chunk size of boto3
+RESUMABLE_DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+RESUMABLE_DOWNLOAD_ATTEMPTS = 5
+_WRITE_BLOCK_SIZE = 1024 * 1024
+
+
+def download_file_resumable(
+    s3_client: Any,
+    bucket_name: str,
+    object_key: str,
+    file_path: str,
+    size: int,
+    etag: str,
+    max_concurrency: int,
+    part_size: int = RESUMABLE_DOWNLOAD_CHUNK_SIZE,
+    transfer_scheduler: TransferScheduler | None = None,
+) -> datetime | None:
+    """
+    Download the object with ranged GET requests into ``file_path.part``
+    and keep the completed ranges in ``file_path.part.json``.
+
+    If the download is interrupted, the next one with the same ETag and
+    size only requests the missing ranges. Each request is conditioned
+    on the ETag so that the parts of two versions of the object are never
+    mixed. Once complete, the file is renamed to ``file_path``.
+
+    The ranges are downloaded in parallel, up to ``max_concurrency``
+    or, with a scheduler, as long as it has connections to spare.
+
+    Returns the last modified date read from the GetObject responses.
+    """
+    part_file_path = file_path + PART_FILE_SUFFIX
+    state_file_path = file_path + PART_STATE_FILE_SUFFIX
+    completed_ranges = _load_completed_ranges(
+        part_file_path, state_file_path, size, etag
+    )
+    if completed_ranges:
+        logger.info(f"Resuming the download of {file_path}")
+    else:
+        with open(part_file_path, "wb") as part_file:
+            part_file.truncate(size)
+    ranges_to_download = _get_missing_ranges(completed_ranges, size, part_size)
+
+    lock = threading.Lock()
+    get_last_modified: list[datetime] = []
+
+    def _download_range(start: int, end: int) -> None:
+        last_modified = _download_range_to_part_file(
+            s3_client,
+            bucket_name,
+            object_key,
+            part_file_path,
+            start,
+            end,
+            etag,
+        )
+        with lock:
+            if last_modified:
+                get_last_modified.append(last_modified)
+            completed_ranges.append([start, end])
+            _save_completed_ranges(
+                state_file_path, completed_ranges, size, etag
+            )
+
+    if max_concurrency <= 1 or len(ranges_to_download) <= 1:
+        for start, end in ranges_to_download:
+            _download_range(start, end)
+    else:
+        _download_ranges_concurrently(
+            _download_range,
+            ranges_to_download,
+            max_concurrency,
+            transfer_scheduler,
+        )
+
+    if os.path.getsize(part_file_path) != size or _get_missing_ranges(
+        completed_ranges, size, part_size
+    ):
+        raise ValueError(
+            f"The download of {file_path} is incomplete. Please try again."
+        )
+    os.replace(part_file_path, file_path)
+    os.remove(state_file_path)
+    return get_last_modified[0] if get_last_modified else None
+
+
+def _download_ranges_concurrently(
+    download_range: Callable[[int, int], None],
+    ranges: list[tuple[int, int]],
+    max_concurrency: int,
+    transfer_scheduler: TransferScheduler | None,
+) -> None:
+    """
+    One range at a time uses the connection of the file transfer,
+    each additional one needs an extra connection from the scheduler.
+    """
+    # future -> whether it holds an extra connection of the scheduler
+    pending_futures: dict[concurrent.futures.Future, bool] = {}
+
+    def _finish(future: concurrent.futures.Future) -> None:
+        if pending_futures.pop(future) and transfer_scheduler:
+            transfer_scheduler.release_connection()
+        future.result()
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_concurrency
+    ) as executor:
+        try:
+            for start, end in ranges:
+                while True:
+                    if not pending_futures:
+                        uses_extra_connection = False
+                        break
+                    if len(pending_futures) < max_concurrency and (
+                        transfer_scheduler is None
+                        or transfer_scheduler.try_acquire_extra_connection()
+                    ):
+                        uses_extra_connection = transfer_scheduler is not None
+                        break
+                    done_futures, _ = concurrent.futures.wait(
+                        pending_futures,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                    for future in done_futures:
+                        _finish(future)
+                pending_futures[
+                    executor.submit(download_range, start, end)
+                ] = uses_extra_connection
+            for future in concurrent.futures.as_completed(
+                list(pending_futures)
+            ):
+                _finish(future)
+        finally:
+            concurrent.futures.wait(pending_futures)
+            for future, uses_extra_connection in pending_futures.items():
+                if uses_extra_connection and transfer_scheduler:
+                    transfer_scheduler.release_connection()
+
+
+def _download_range_to_part_file(
+    s3_client: Any,
+    bucket_name: str,
+    object_key: str,
+    part_file_path: str,
+    start: int,
+    end: int,
+    etag: str,
+) -> datetime | None:
+    for attempt in range(1, RESUMABLE_DOWNLOAD_ATTEMPTS + 1):
+        try:
+            response = s3_client.get_object(
+                Bucket=bucket_name,
+                Key=object_key,
+                Range=f"bytes={start}-{end - 1}",
+                IfMatch=etag,
+            )
+            with open(part_file_path, "r+b") as part_file:
+                part_file.seek(start)
+                for block in response["Body"].iter_chunks(_WRITE_BLOCK_SIZE):
+                    part_file.write(block)
+                if part_file.tell() != end:
+                    raise ValueError(
+                        f"Received {part_file.tell() - start} bytes "
+                        f"instead of {end - start}."
+                    )
+                part_file.flush()
+                # The range is only saved as completed once on disk
+                os.fsync(part_file.fileno())
+            return response.get("LastModified")
+        except (*S3_RETRYABLE_DOWNLOAD_ERRORS, ValueError) as exception:
+            if attempt == RESUMABLE_DOWNLOAD_ATTEMPTS:
+                raise
+            logger.debug(
+                f"Retrying the range {start}-{end} of {object_key}: "
+                f"{exception}"
+            )
+    return None
+
+
+def _load_completed_ranges(
+    part_file_path: str, state_file_path: str, size: int, etag: str
+) -> list[list[int]]:
+    try:
+        with open(state_file_path) as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        return []
+    if (
+        state.get("etag") != etag
+        or state.get("size") != size
+        or not os.path.exists(part_file_path)
+        or os.path.getsize(part_file_path) != size
+    ):
+        logger.debug(f"Discarding the partial download {part_file_path}")
+        return []
+    return [list(completed_range) for completed_range in state["ranges"]]
+
+
+def _save_completed_ranges(
+    state_file_path: str,
+    completed_ranges: list[list[int]],
+    size: int,
+    etag: str,
+) -> None:
+    completed_ranges[:] = _merge_ranges(completed_ranges)
+    temporary_state_file_path = state_file_path + ".tmp"
+    with open(temporary_state_file_path, "w") as state_file:
+        json.dump(
+            {"etag": etag, "size": size, "ranges": completed_ranges},
+            state_file,
+        )
+    os.replace(temporary_state_file_path, state_file_path)
+
+
+def _merge_ranges(ranges: list[list[int]]) -> list[list[int]]:
+    merged_ranges: list[list[int]] = []
+    for start, end in sorted(ranges):
+        if merged_ranges and start <= merged_ranges[-1][1]:
+            merged_ranges[-1][1] = max(merged_ranges[-1][1], end)
+        else:
+            merged_ranges.append([start, end])
+    return merged_ranges
+
+
+def _get_missing_ranges(
+    completed_ranges: list[list[int]], size: int, part_size: int
+) -> list[tuple[int, int]]:
+    """
+    Split what is not completed yet in ranges of at most ``part_size``.
+    """
+    missing_ranges = []
+    position = 0
+    for start, end in [*_merge_ranges(completed_ranges), [size, size]]:
+        while position < start:
+            range_end = min(position + part_size, start)
+            missing_ranges.append((position, range_end))
+            position = range_end
+        position = max(position, end)
+    return missing_ranges
@@ -355,6 +355,20 @@ def _get_retrieval_service_from_dataset_version(
     )
 
 
+def get_original_files_url(dataset_part: CopernicusMarinePart) -> str | None:
+    """
+    The URL of the original files of the dataset part, if it has some.
+    """
+    return next(
+        (
+            service.uri
+            for service in dataset_part.services
+            if service.service_name == CopernicusMarineServiceNames.FILES
+        ),
+        None,
+    )
+
+
 def _get_dataset_start_date_from_service(
     service: CopernicusMarineService,
 ) -> str | int | float | None:
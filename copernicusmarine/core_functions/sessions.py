@@ -1,16 +1,24 @@
 import logging
 import ssl
+from datetime import datetime
 from typing import Any, Literal
 
 import boto3
 import botocore
 import botocore.config
+import botocore.exceptions
 import certifi
 import requests
 import requests.auth
-from boto3.s3.transfer import TransferConfig
+import urllib3.exceptions
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
 from requests.adapters import HTTPAdapter, Retry
+from s3transfer.subscribers import BaseSubscriber
 
+from copernicusmarine.core_functions.adaptive_concurrency import (
+    THROTTLING_STATUS_CODES,
+    record_throttling,
+)
 from copernicusmarine.core_functions.environment_variables import (
     COPERNICUSMARINE_DISABLE_SSL_CONTEXT,
     COPERNICUSMARINE_HTTPS_RETRIES,
@@ -21,6 +29,19 @@ from copernicusmarine.core_functions.environment_variables import (
     PROXY_HTTP,
     PROXY_HTTPS,
 )
+from copernicusmarine.core_functions.rate_limiter import (
+    RateLimitedBody,
+    is_rate_limited,
+    limit_bytes,
+    limit_request,
+)
+from copernicusmarine.core_functions.resumable_download import (
+    RESUMABLE_DOWNLOAD_CHUNK_SIZE,
+    download_file_resumable,
+)
+from copernicusmarine.core_functions.transfer_scheduler import (
+    TransferScheduler,
+)
 from copernicusmarine.core_functions.utils import (
     construct_query_params_for_marine_data_store_monitoring,
     create_custom_query_function,
@@ -59,11 +80,17 @@ def get_configured_boto3_session(
     operation_type: list[Literal["ListObjectsV2", "HeadObject", "GetObject"]],
     username: str | None = None,
     return_ressources: bool = False,
+    max_pool_connections: int | None = None,
 ) -> tuple[Any, Any]:
     config_boto3 = botocore.config.Config(
         signature_version=botocore.UNSIGNED,
         retries={"max_attempts": 10, "mode": "adaptive"},
     )
+    if max_pool_connections:
+        # The client is shared by this number of threads
+        config_boto3 = config_boto3.merge(
+            botocore.config.Config(max_pool_connections=max_pool_connections)
+        )
     s3_session = boto3.Session()
     s3_client = s3_session.client(
         "s3",
@@ -77,6 +104,17 @@ def get_configured_boto3_session(
             f"before-call.s3.{operation}",
             create_custom_query_function(username),
         )
+    s3_client.meta.events.register(
+        "needs-retry.s3", _record_throttling_before_retry
+    )
+    if is_rate_limited():
+        # Every attempt counts, retries included
+        s3_client.meta.events.register(
+            "before-send.s3", _limit_request_before_send
+        )
+        s3_client.meta.events.register(
+            "after-call.s3.GetObject", _limit_bytes_of_body
+        )
     if not return_ressources:
         return s3_client, None
     s3_resource = boto3.resource(
@@ -87,6 +125,37 @@ def get_configured_boto3_session(
     return s3_client, s3_resource
 
 
+def _record_throttling_before_retry(
+    response: tuple[Any, dict] | None = None,
+    caught_exception: Exception | None = None,
+    **kwargs,
+) -> None:
+    """
+    Tell the adaptive concurrency controller about the responses
+    of the server that mean that it is overloaded.
+    """
+    if (
+        response is not None
+        and response[0].status_code in THROTTLING_STATUS_CODES
+    ) or isinstance(
+        caught_exception,
+        (
+            botocore.exceptions.ReadTimeoutError,
+            botocore.exceptions.ConnectTimeoutError,
+        ),
+    ):
+        record_throttling()
+
+
+def _limit_request_before_send(**kwargs) -> None:
+    limit_request()
+
+
+def _limit_bytes_of_body(parsed: dict, **kwargs) -> None:
+    if "Body" in parsed:
+        parsed["Body"] = RateLimitedBody(parsed["Body"])
+
+
 class ConfiguredBoto3Session:
     def __init__(
         self,
@@ -96,12 +165,14 @@ class ConfiguredBoto3Session:
         ],
         username: str | None = None,
         need_resources: bool = False,
+        max_pool_connections: int | None = None,
     ):
         self.s3_client, self.s3_resource = get_configured_boto3_session(
             endpoint_url,
             operation_type,
             username,
             return_ressources=need_resources,
+            max_pool_connections=max_pool_connections,
         )
         self.use_threads = COPERNICUSMARINE_USE_THREADS
 
@@ -117,14 +188,85 @@ class ConfiguredBoto3Session:
         self.close()
 
     def download_file(
-        self, bucket_name: str, object_key: str, file_path: str
-    ) -> None:
-        self.s3_client.download_file(
-            bucket_name,
-            object_key,
-            file_path,
-            Config=TransferConfig(use_threads=self.use_threads),
+        self,
+        bucket_name: str,
+        object_key: str,
+        file_path: str,
+        size: int | None = None,
+        etag: str | None = None,
+        transfer_scheduler: TransferScheduler | None = None,
+    ) -> datetime | None:
+        """
+        Download the object to ``file_path``.
+
+        If the size (and ETag) of the object are already known, they are
+        given to the transfer manager so that it does not send a HEAD
+        request before downloading. Objects bigger than one part are
+        downloaded with resumable ranged requests, see
+        :func:`~copernicusmarine.core_functions.resumable_download.download_file_resumable`.
+
+        With a transfer scheduler, the size of the parts depends on the
+        size of the object and the parts are downloaded in parallel only
+        with the connections the scheduler has to spare.
+
+        Returns the last modified date read from the GetObject response.
+        """  # noqa
+        if transfer_scheduler and size is not None:
+            part_size = transfer_scheduler.get_part_size(size)
+            transfer_config = TransferConfig(
+                multipart_threshold=part_size,
+                multipart_chunksize=part_size,
+                use_threads=self.use_threads,
+            )
+        else:
+            part_size = RESUMABLE_DOWNLOAD_CHUNK_SIZE
+            transfer_config = TransferConfig(use_threads=self.use_threads)
+        if size is not None and etag and size > part_size:
+            if not self.use_threads:
+                max_concurrency = 1
+            elif transfer_scheduler:
+                max_concurrency = transfer_scheduler.max_connections
+            else:
+                max_concurrency = transfer_config.max_request_concurrency
+            return download_file_resumable(
+                self.s3_client,
+                bucket_name,
+                object_key,
+                file_path,
+                size=size,
+                etag=etag,
+                max_concurrency=max_concurrency,
+                part_size=part_size,
+                transfer_scheduler=transfer_scheduler,
+            )
+        get_last_modified: list[datetime] = []
+
+        def _save_last_modified(parsed, **kwargs):
+            if parsed.get("LastModified"):
+                get_last_modified.append(parsed["LastModified"])
+
+        self.s3_client.meta.events.register(
+            "after-call.s3.GetObject", _save_last_modified
         )
+        try:
+            with create_transfer_manager(
+                self.s3_client, transfer_config
+            ) as transfer_manager:
+                transfer_manager.download(
+                    bucket_name,
+                    object_key,
+                    file_path,
+                    subscribers=(
+                        [_ProvideObjectMetadataSubscriber(size, etag)]
+                        if size is not None
+                        else None
+                    ),
+                ).result()
+        finally:
+            self.s3_client.meta.events.unregister(
+                "after-call.s3.GetObject", _save_last_modified
+            )
+        return get_last_modified[0] if get_last_modified else None
 
     def get_object(self, bucket_name: str, object_key: str) -> Any:
         response = self.s3_client.get_object(
@@ -133,6 +275,46 @@ class ConfiguredBoto3Session:
         return response
 
 
+class _ProvideObjectMetadataSubscriber(BaseSubscriber):
+    def __init__(self, size: int, etag: str | None):
+        self._size = size
+        self._etag = etag
+
+    def on_queued(self, future, **kwargs):
+        future.meta.provide_transfer_size(self._size)
+        if self._etag and hasattr(future.meta, "provide_object_etag"):
+            future.meta.provide_object_etag(self._etag)
+
+
+class _ThrottlingAwareRetry(Retry):
+    """
+    Same as ``Retry`` but it tells the adaptive concurrency controller
+    about the responses of the server that mean that it is overloaded,
+    and the retried requests count towards the request-rate limit.
+    """
+
+    def increment(
+        self, method=None, url=None, response=None, error=None, *args, **kwargs
+    ):
+        if (
+            response is not None and response.status in THROTTLING_STATUS_CODES
+        ) or isinstance(
+            error,
+            (
+                urllib3.exceptions.ReadTimeoutError,
+                urllib3.exceptions.ConnectTimeoutError,
+            ),
+        ):
+            record_throttling()
+        return super().increment(method, url, response, error, *args, **kwargs)
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        # Every attempt counts, retries included, like the before-send
+        # hook of boto3
+        limit_request()
+
+
 # TODO: add tests
 # example: with https://httpbin.org/delay/10 or
 # https://medium.com/@mpuig/testing-robust-requests-with-python-a06537d97771
@@ -157,7 +339,7 @@ class ConfiguredRequestsSession(requests.Session):
             self.mount(
                 "https://",
                 HTTPAdapter(
-                    max_retries=Retry(
+                    max_retries=_ThrottlingAwareRetry(
                         total=retries,
                         backoff_factor=1,
                         status_forcelist=[
@@ -176,7 +358,14 @@ class ConfiguredRequestsSession(requests.Session):
 
     def request(self, *args, **kwargs):
         kwargs.setdefault("timeout", self.timeout)
-        return super().request(*args, **kwargs)
+        limit_request()
+        response = super().request(*args, **kwargs)
+        if is_rate_limited():
+            if kwargs.get("stream"):
+                response.raw = RateLimitedBody(response.raw)
+            else:
+                limit_bytes(len(response.content))
+        return response
 
 
 def get_configured_requests_session(
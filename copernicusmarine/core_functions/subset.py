@@ -17,6 +17,7 @@ from copernicusmarine.core_functions.models import CommandType, ResponseSubset
 from copernicusmarine.core_functions.request_structure import SubsetRequest
 from copernicusmarine.core_functions.services_utils import (
     RetrievalService,
+    get_original_files_url,
     get_retrieval_service,
 )
 from copernicusmarine.core_functions.utils import (
@@ -69,6 +70,18 @@ def retrieve_metadata_and_check_request(
         command_type=CommandType.SUBSET,
         marine_datastore_config=marine_datastore_config,
     )
+    if retrieval_service.service_format != (
+        CopernicusMarineServiceFormat.SQLITE
+    ):
+        for option_name, option in [
+            ("streaming", subset_request.streaming),
+            ("prefilter_platforms", subset_request.prefilter_platforms),
+        ]:
+            if option:
+                logger.warning(
+                    f"The {option_name} option is only available for sparse "
+                    "datasets. It is ignored."
+                )
 
     check_requested_area_time_valid(
         subset_request=subset_request,
@@ -146,6 +159,7 @@ def download_zarr_or_sparse(
             retrieval_service.product_doi,
             retrieval_service.product_id,
             subset_request.disable_progress_bar,
+            get_original_files_url(retrieval_service.dataset_part),
         )
     else:
         raise ValueError("Dataset is missing some metadata. Cannot subset")
@@ -0,0 +1,101 @@
+import contextlib
+import logging
+import math
+import threading
+from typing import Iterator
+
+from copernicusmarine.core_functions.adaptive_concurrency import (
+    AdaptiveConcurrencyController,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+# Same as the default multipart chunk size of boto3
+MINIMUM_PART_SIZE = 8 * 1024 * 1024
+MAXIMUM_PART_SIZE = 64 * 1024 * 1024
+# Same as the default number of threads per file of boto3,
+# so that a single file is downloaded as fast as before
+MINIMUM_NUMBER_OF_CONNECTIONS = 10
+# Parts per connection of the budget, to balance the ranges
+# of one file between the connections when it is the only one
+PARTS_PER_CONNECTION = 4
+
+
+class TransferScheduler:
+    """
+    Budget of connections shared by the files downloaded at the same time.
+
+    Each file transfer holds one connection while it runs. A file made
+    of several parts can download more of them in parallel, each one
+    with an extra connection, but only if the budget is not used up
+    and no file is waiting to start. Hence many small files get one
+    connection each, a few big files share the whole budget, and the
+    total number of connections never exceeds ``max_connections``.
+
+    With the adaptive concurrency controller, the budget follows its
+    current limit instead, and ``max_connections`` is at least its
+    maximum limit.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        controller: AdaptiveConcurrencyController | None = None,
+    ) -> None:
+        self.max_connections = max(
+            max_connections,
+            MINIMUM_NUMBER_OF_CONNECTIONS,
+            controller.maximum_limit if controller else 0,
+        )
+        self._controller = controller
+        self._connections_in_use = 0
+        self._waiting_transfers = 0
+        self._condition = threading.Condition()
+
+    def _get_budget(self) -> int:
+        if self._controller is None:
+            return self.max_connections
+        return max(self._controller.limit, MINIMUM_NUMBER_OF_CONNECTIONS)
+
+    def get_part_size(self, size: int) -> int:
+        """
+        Size of the ranges to download an object of ``size`` bytes.
+        """
+        part_size = math.ceil(
+            size / (self.max_connections * PARTS_PER_CONNECTION)
+        )
+        return min(max(part_size, MINIMUM_PART_SIZE), MAXIMUM_PART_SIZE)
+
+    @contextlib.contextmanager
+    def transfer(self) -> Iterator[None]:
+        """
+        Hold the connection of a file transfer, waiting for one if needed.
+        """
+        with self._condition:
+            self._waiting_transfers += 1
+            try:
+                while self._connections_in_use >= self._get_budget():
+                    # The limit of the controller can also increase
+                    self._condition.wait(timeout=1)
+            finally:
+                self._waiting_transfers -= 1
+            self._connections_in_use += 1
+        try:
+            yield
+        finally:
+            self.release_connection()
+
+    def try_acquire_extra_connection(self) -> bool:
+        with self._condition:
+            if (
+                self._connections_in_use < self._get_budget()
+                and not self._waiting_transfers
+            ):
+                self._connections_in_use += 1
+                return True
+            return False
+
+    def release_connection(self) -> None:
+        with self._condition:
+            self._connections_in_use -= 1
+            self._condition.notify()
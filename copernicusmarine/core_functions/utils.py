@@ -2,9 +2,19 @@ import calendar
 import concurrent.futures
 import logging
 import pathlib
+import queue
 import re
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import Any, Callable, Iterator, Literal, Sequence, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Sequence,
+    TypeVar,
+)
 
 import numpy
 import xarray
@@ -13,6 +23,10 @@ from dateutil.parser._parser import ParserError
 from requests import PreparedRequest
 from tqdm import tqdm
 
+from copernicusmarine.core_functions.adaptive_concurrency import (
+    AdaptiveConcurrencyController,
+    get_adaptive_concurrency_controller,
+)
 from copernicusmarine.core_functions.environment_variables import (
     COPERNICUSMARINE_USE_THREADS,
 )
@@ -170,11 +184,18 @@ def run_concurrently(
                 out.append(func(*function_argument))
                 pbar.update(1)
         else:
+            controller = get_adaptive_concurrency_controller(
+                max_concurrent_requests
+            )
             with concurrent.futures.ThreadPoolExecutor(
-                max_workers=max_concurrent_requests
+                max_workers=_get_number_of_workers(
+                    max_concurrent_requests, controller
+                )
             ) as executor:
                 future_to_url = (
-                    executor.submit(func, *function_argument)
+                    executor.submit(
+                        _run_in_slot, controller, func, function_argument
+                    )
                     for function_argument in function_arguments
                 )
                 for future in concurrent.futures.as_completed(future_to_url):
@@ -184,6 +205,166 @@ def run_concurrently(
     return out
 
 
+def run_concurrently_from_iterable(
+    func: Callable[..., _T],
+    function_arguments: Iterable[tuple[Any, ...]],
+    max_concurrent_requests: int,
+    tdqm_bar_configuration: dict = {},
+) -> list[_T]:
+    """
+    Same as :func:`run_concurrently` but the arguments are consumed lazily:
+    the first tasks start before the iterable is exhausted and at most
+    twice ``max_concurrent_requests`` tasks are pending at the same time.
+    The total of the progress bar grows with the submitted tasks.
+    """
+    out = []
+    with tqdm(total=0, **tdqm_bar_configuration) as pbar:
+
+        def _increase_total() -> None:
+            pbar.total += 1
+            pbar.refresh()
+
+        if max_concurrent_requests <= 0 or not COPERNICUSMARINE_USE_THREADS:
+            for function_argument in function_arguments:
+                _increase_total()
+                out.append(func(*function_argument))
+                pbar.update(1)
+            return out
+        controller = get_adaptive_concurrency_controller(
+            max_concurrent_requests
+        )
+        number_of_workers = _get_number_of_workers(
+            max_concurrent_requests, controller
+        )
+        maximum_pending_tasks = 2 * number_of_workers
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=number_of_workers
+        ) as executor:
+            pending_futures: set[concurrent.futures.Future] = set()
+            for function_argument in function_arguments:
+                if len(pending_futures) >= maximum_pending_tasks:
+                    done_futures, pending_futures = concurrent.futures.wait(
+                        pending_futures,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                    for future in done_futures:
+                        out.append(future.result())
+                        pbar.update(1)
+                pending_futures.add(
+                    executor.submit(
+                        _run_in_slot, controller, func, function_argument
+                    )
+                )
+                _increase_total()
+            for future in concurrent.futures.as_completed(pending_futures):
+                out.append(future.result())
+                pbar.update(1)
+    return out
+
+
+def _get_number_of_workers(
+    max_concurrent_requests: int,
+    controller: AdaptiveConcurrencyController | None,
+) -> int:
+    """
+    With the adaptive controller, there are enough threads for its
+    maximum limit and the controller decides how many of them run.
+    """
+    if controller is None:
+        return max_concurrent_requests
+    return max(max_concurrent_requests, controller.maximum_limit)
+
+
+def _run_in_slot(
+    controller: AdaptiveConcurrencyController | None,
+    func: Callable[..., _T],
+    function_argument: tuple[Any, ...],
+) -> _T:
+    if controller is None:
+        return func(*function_argument)
+    with controller.slot():
+        return func(*function_argument)
+
+
+def iterate_concurrently(
+    iterable_functions: Sequence[Callable[[], Iterable[_T]]],
+    max_concurrent_requests: int,
+) -> Iterator[_T]:
+    """
+    Consume the iterables returned by the functions in parallel threads
+    and yield their items as soon as they are produced, in no particular
+    order. The number of items waiting to be consumed is bounded.
+    """
+    if (
+        max_concurrent_requests <= 0
+        or not COPERNICUSMARINE_USE_THREADS
+        or len(iterable_functions) <= 1
+    ):
+        for iterable_function in iterable_functions:
+            yield from iterable_function()
+        return
+
+    produced_items: queue.Queue = queue.Queue(
+        maxsize=2 * max_concurrent_requests
+    )
+    stop_event = threading.Event()
+    iterable_done = object()
+
+    def _put(item: Any) -> None:
+        while not stop_event.is_set():
+            try:
+                produced_items.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _produce(iterable_function: Callable[[], Iterable[_T]]) -> None:
+        try:
+            if stop_event.is_set():
+                return
+            for item in iterable_function():
+                if stop_event.is_set():
+                    return
+                _put((item, None))
+        except Exception as exception:
+            _put((None, exception))
+        finally:
+            _put(iterable_done)
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(max_concurrent_requests, len(iterable_functions))
+    ) as executor:
+        for iterable_function in iterable_functions:
+            executor.submit(_produce, iterable_function)
+        remaining_iterables = len(iterable_functions)
+        try:
+            while remaining_iterables:
+                produced_item = produced_items.get()
+                if produced_item is iterable_done:
+                    remaining_iterables -= 1
+                    continue
+                item, exception = produced_item
+                if exception is not None:
+                    raise exception
+                yield item
+        finally:
+            stop_event.set()
+
+
+def batched(iterable: Iterable[_T], size: int) -> Iterator[list[_T]]:
+    """
+    Same as ``itertools.batched`` (Python 3.12) but yield lists.
+    """
+    batch: list[_T] = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def run_multiprocessors(
     func: Callable[..., _T],
     function_arguments: Sequence[tuple[Any, ...]],
@@ -0,0 +1,177 @@
+import io
+import logging
+import pathlib
+import shutil
+import sys
+import tarfile
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+from typing import IO, Any
+
+from copernicusmarine.core_functions.models import S3FileInfo
+
+logger = logging.getLogger("copernicusmarine")
+
+STDOUT_ARCHIVE = "-"
+TAR_EXTENSIONS = (".tar",)
+TAR_ZSTD_EXTENSIONS = (".tar.zst", ".tzst")
+ZIP_EXTENSIONS = (".zip",)
+ARCHIVE_EXTENSIONS = TAR_EXTENSIONS + TAR_ZSTD_EXTENSIONS + ZIP_EXTENSIONS
+# Objects smaller than this stay in memory until they are archived,
+# bigger ones are spooled to a temporary file
+ARCHIVE_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+_COPY_BLOCK_SIZE = 1024 * 1024
+# PAX headers of the tar entries
+PAX_HEADER_S3_URL = "COPERNICUSMARINE.s3_url"
+PAX_HEADER_ETAG = "COPERNICUSMARINE.etag"
+PAX_HEADER_LAST_MODIFIED = "COPERNICUSMARINE.last_modified"
+
+
+def is_zstd_available() -> bool:
+    return _get_zstd_compressor_factory() is not None
+
+
+def _get_zstd_compressor_factory() -> Any:
+    try:
+        from compression import zstd  # type: ignore # Python 3.14
+
+        return lambda fileobj: zstd.ZstdFile(fileobj, mode="w")
+    except ImportError:
+        pass
+    try:
+        import zstandard  # type: ignore
+
+        return lambda fileobj: zstandard.ZstdCompressor().stream_writer(
+            fileobj, closefd=False
+        )
+    except ImportError:
+        return None
+
+
+class ArchiveWriter:
+    """
+    Write the downloaded objects one after the other into a tar archive
+    (optionally compressed with zstd), a zip archive, or a tar stream
+    on the standard output.
+
+    The archive is only appended to: the entries are never read back,
+    so the archive can be a pipe. The metadata of the objects (S3 URL,
+    ETag, last modified date) is kept in the PAX headers of the tar
+    entries and in the comment of the zip entries.
+    """
+
+    def __init__(self, archive: str, output_directory: pathlib.Path):
+        self.archive = archive
+        self._output_directory = output_directory
+        self._file: IO[bytes] | None = None
+        self._compressor: Any = None
+        self._tar: tarfile.TarFile | None = None
+        self._zip: zipfile.ZipFile | None = None
+
+    def __enter__(self) -> "ArchiveWriter":
+        if self.archive == STDOUT_ARCHIVE:
+            self._tar = tarfile.open(
+                fileobj=sys.stdout.buffer,
+                mode="w|",
+                format=tarfile.PAX_FORMAT,
+            )
+            return self
+        archive_path = self._output_directory / self.archive
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(archive_path, "wb")
+        if self.archive.endswith(ZIP_EXTENSIONS):
+            self._zip = zipfile.ZipFile(self._file, mode="w")
+        elif self.archive.endswith(TAR_ZSTD_EXTENSIONS):
+            self._compressor = _get_zstd_compressor_factory()(self._file)
+            self._tar = tarfile.open(
+                fileobj=self._compressor,
+                mode="w|",
+                format=tarfile.PAX_FORMAT,
+            )
+        else:
+            self._tar = tarfile.open(
+                fileobj=self._file,
+                mode="w|",
+                format=tarfile.PAX_FORMAT,
+            )
+        logger.info(f"Writing the files into the archive {archive_path}")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._tar:
+            self._tar.close()
+        if self._zip:
+            self._zip.close()
+        if self._compressor:
+            self._compressor.close()
+        if self._file:
+            self._file.close()
+        elif self.archive == STDOUT_ARCHIVE:
+            sys.stdout.buffer.flush()
+
+    def add(self, s3_file: S3FileInfo, content: IO[bytes], size: int) -> None:
+        """
+        Append the object read from ``content`` (``size`` bytes).
+        """
+        name = self._get_entry_name(s3_file)
+        last_modified = _parse_last_modified(s3_file.last_modified)
+        if self._tar:
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = size
+            tar_info.mode = 0o644
+            tar_info.mtime = int(last_modified.timestamp())
+            tar_info.pax_headers = {
+                PAX_HEADER_S3_URL: s3_file.filename_in,
+                PAX_HEADER_ETAG: s3_file.etag,
+                PAX_HEADER_LAST_MODIFIED: s3_file.last_modified,
+            }
+            self._tar.addfile(tar_info, content)
+        elif self._zip:
+            zip_info = zipfile.ZipInfo(
+                name,
+                date_time=(
+                    max(last_modified.year, 1980),
+                    *last_modified.timetuple()[1:6],
+                ),
+            )
+            zip_info.file_size = size
+            zip_info.comment = (
+                f"{s3_file.filename_in} {s3_file.etag} "
+                f"{s3_file.last_modified}"
+            ).encode()
+            with self._zip.open(
+                zip_info, mode="w", force_zip64=True
+            ) as zip_entry:
+                shutil.copyfileobj(content, zip_entry, _COPY_BLOCK_SIZE)
+
+    def _get_entry_name(self, s3_file: S3FileInfo) -> str:
+        try:
+            return s3_file.filename_out.relative_to(
+                self._output_directory
+            ).as_posix()
+        except ValueError:
+            return s3_file.filename_out.name
+
+
+def _parse_last_modified(last_modified: str) -> datetime:
+    try:
+        return datetime.fromisoformat(last_modified)
+    except ValueError:
+        return datetime.now(tz=timezone.utc)
+
+
+def new_spooled_file() -> tempfile.SpooledTemporaryFile:
+    return tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_MAX_SIZE)
+
+
+def copy_to_spooled_file(body: Any, spooled_file: IO[bytes]) -> int:
+    """
+    Copy the body of a GetObject response, return the number of bytes.
+    """
+    size = 0
+    for chunk in body.iter_chunks(_COPY_BLOCK_SIZE):
+        spooled_file.write(chunk)
+        size += len(chunk)
+    spooled_file.seek(0, io.SEEK_SET)
+    return size
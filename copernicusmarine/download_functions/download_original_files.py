@@ -1,15 +1,28 @@
+import contextlib
+import functools
+import itertools
 import logging
 import os
 import pathlib
+import queue
 import re
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from itertools import chain
-from typing import Literal
+from typing import IO, Callable, Iterable, Iterator, Literal
 
 from botocore.client import ClientError
 from dateutil.tz import UTC
 from tqdm import tqdm
 
+from copernicusmarine.core_functions.adaptive_concurrency import (
+    get_adaptive_concurrency_controller,
+)
+from copernicusmarine.core_functions.environment_variables import (
+    COPERNICUSMARINE_SYNC_MANIFEST,
+)
 from copernicusmarine.core_functions.models import (
     FileGet,
     FileStatus,
@@ -24,16 +37,55 @@ from copernicusmarine.core_functions.request_structure import (
     overload_regex_with_additional_filter,
 )
 from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
+from copernicusmarine.core_functions.transfer_scheduler import (
+    TransferScheduler,
+)
 from copernicusmarine.core_functions.utils import (
+    batched,
     get_unique_filepath,
     human_readable_size,
+    iterate_concurrently,
     parse_access_dataset_url,
-    run_concurrently,
+    run_concurrently_from_iterable,
     timestamp_parser,
 )
+from copernicusmarine.download_functions.archive_writer import (
+    ArchiveWriter,
+    copy_to_spooled_file,
+    new_spooled_file,
+)
+from copernicusmarine.download_functions.file_matcher import FileMatcher
+from copernicusmarine.download_functions.index_files import (
+    INDEX_FILE_REGEX,
+    IndexFilter,
+    get_cached_index_file,
+    get_files_to_download_from_index_files,
+)
+from copernicusmarine.download_functions.listing_prefixes import (
+    get_listing_prefixes,
+)
+from copernicusmarine.download_functions.local_files_index import (
+    LocalFilesIndex,
+)
+from copernicusmarine.download_functions.sync_manifest import (
+    SYNC_MANIFEST_QUERY_SIZE,
+    SyncManifest,
+    SyncManifestEntry,
+)
 
 logger = logging.getLogger("copernicusmarine")
 
+MAXIMUM_LISTING_PARTITION_DEPTH = 2
+# Requests of a batch listed and downloaded at the same time
+BATCH_MAXIMUM_CONCURRENT_REQUESTS = 4
+# Files listed by the requests of a batch waiting to be downloaded
+BATCH_DOWNLOAD_QUEUE_SIZE = 10_000
+
+# Downloads the files of a request: endpoint, bucket, files, sync manifest
+_DownloadFunction = Callable[
+    [str, str, Iterable[S3FileInfo], SyncManifest | None], None
+]
+
 
 def download_original_files(
     username: str,
@@ -42,92 +94,424 @@ def download_original_files(
     disable_progress_bar: bool,
     create_file_list: str | None,
 ) -> ResponseGet:
-    endpoint, bucket, path = parse_access_dataset_url(
-        str(get_request.dataset_url)
+    sync_manifest = (
+        SyncManifest(get_request.output_directory)
+        if COPERNICUSMARINE_SYNC_MANIFEST
+        and not get_request.dry_run
+        and not create_file_list
+        else None
     )
-    if get_request.direct_download:
-        files_headers = _download_header_for_direct_download(
-            files_to_download=get_request.direct_download,
-            endpoint_url=endpoint,
-            bucket=bucket,
-            path=path,
-            sync=get_request.sync,
-            directory_out=get_request.output_directory,
+    try:
+        return _download_original_files(
             username=username,
-            no_directories=get_request.no_directories,
-            overwrite=get_request.overwrite,
-            skip_existing=get_request.skip_existing,
+            get_request=get_request,
+            max_concurrent_requests=max_concurrent_requests,
+            disable_progress_bar=disable_progress_bar,
+            create_file_list=create_file_list,
+            sync_manifest=sync_manifest,
         )
-    else:
-        files_headers = S3FilesDescriptor(endpoint=endpoint, bucket=bucket)
-    if (
-        not get_request.direct_download
-        or files_headers.files_not_found
-        or get_request.regex
-    ):
-        if files_headers.files_not_found:
-            files_not_found_regex = "|".join(
-                [
-                    re.escape(file_not_found)
-                    for file_not_found in files_headers.files_not_found
-                ]
-            )
-            get_request.regex = overload_regex_with_additional_filter(
-                files_not_found_regex, get_request.regex
-            )
-        if get_request.index_parts:
-            _, _, path = parse_access_dataset_url(
-                str(get_request.dataset_url), only_dataset_root_path=True
+    finally:
+        if sync_manifest:
+            sync_manifest.close()
+
+
+def download_original_files_batch(
+    username: str,
+    get_requests: list[GetRequest],
+    max_concurrent_requests: int,
+    disable_progress_bar: bool,
+) -> ResponseGet:
+    """
+    Download the files of several requests with one pool of workers.
+
+    A few requests are listed at the same time and their files are
+    merged into one queue where the files of the first requests come
+    first. Hence the workers move on to the next requests while the last
+    files of the previous ones are downloaded and the link is never idle
+    between two requests.
+    """
+    download_queue = _SharedDownloadQueue(len(get_requests))
+    # One manifest per output directory, shared by its requests
+    sync_manifests: dict[pathlib.Path, SyncManifest] = {}
+    if COPERNICUSMARINE_SYNC_MANIFEST:
+        for get_request in get_requests:
+            if (
+                not get_request.dry_run
+                and get_request.output_directory not in sync_manifests
+            ):
+                sync_manifests[get_request.output_directory] = SyncManifest(
+                    get_request.output_directory
+                )
+
+    def _run_request(priority: int, get_request: GetRequest) -> ResponseGet:
+        try:
+            return _download_original_files(
+                username=username,
+                get_request=get_request,
+                max_concurrent_requests=max_concurrent_requests,
+                # Only the progress bar of the downloads is shown
+                disable_progress_bar=True,
+                create_file_list=None,
+                sync_manifest=(
+                    None
+                    if get_request.dry_run
+                    else sync_manifests.get(get_request.output_directory)
+                ),
+                download=functools.partial(download_queue.download, priority),
             )
-        files_headers_listing = _download_header(
-            endpoint_url=endpoint,
-            bucket=bucket,
-            path=path,
-            regex=get_request.regex,
-            username=username,
-            sync=get_request.sync,
-            create_file_list=create_file_list,
-            directory_out=get_request.output_directory,
-            no_directories=get_request.no_directories,
-            skip_existing=get_request.skip_existing,
-            overwrite=get_request.overwrite,
-            disable_progress_bar=disable_progress_bar,
-            only_list_root_path=get_request.index_parts,
-        )
-        if files_headers_listing.create_file_list is True:
-            return ResponseGet(
-                files=[],
-                files_deleted=None,
-                files_not_found=None,
-                number_of_files_to_download=0,
-                status=StatusCode.FILE_LIST_CREATED,
-                message=StatusMessage.FILE_LIST_CREATED,
-                total_size=None,
+        except BaseException as e:
+            download_queue.abort(e)
+            raise
+        finally:
+            download_queue.request_done()
+
+    try:
+        responses = _run_batch(
+            get_requests,
+            _run_request,
+            download_queue,
+            username,
+            max_concurrent_requests,
+            disable_progress_bar,
+        )
+    finally:
+        for sync_manifest in sync_manifests.values():
+            sync_manifest.close()
+    return combine_responses_get(responses)
+
+
+def _run_batch(
+    get_requests: list[GetRequest],
+    run_request: Callable[[int, GetRequest], ResponseGet],
+    download_queue: "_SharedDownloadQueue",
+    username: str,
+    max_concurrent_requests: int,
+    disable_progress_bar: bool,
+) -> list[ResponseGet]:
+    with ThreadPoolExecutor(
+        max_workers=min(len(get_requests), BATCH_MAXIMUM_CONCURRENT_REQUESTS)
+    ) as executor:
+        futures = [
+            executor.submit(run_request, priority, get_request)
+            for priority, get_request in enumerate(get_requests)
+        ]
+        try:
+            download_queue.run(
+                username, max_concurrent_requests, disable_progress_bar
             )
-        if files_headers_listing:
-            files_headers.endpoint = files_headers_listing.endpoint
-            files_headers.bucket = files_headers_listing.bucket
-            files_headers.s3_files.extend(files_headers_listing.s3_files)
-            files_headers.total_size += files_headers_listing.total_size
-            files_headers.files_not_found.extend(
-                files_headers_listing.files_not_found
+        except BaseException as e:
+            download_queue.abort(e)
+            for future in futures:
+                future.cancel()
+            raise
+        if download_queue.error:
+            for future in futures:
+                future.cancel()
+            raise download_queue.error
+        return [future.result() for future in futures]
+
+
+class _BatchDownloadAborted(Exception):
+    pass
+
+
+class _QueuedFiles:
+    """
+    Files of one request waiting in the queue or being downloaded.
+    """
+
+    def __init__(self) -> None:
+        self._number_of_files = 0
+        self._condition = threading.Condition()
+
+    def add(self) -> None:
+        with self._condition:
+            self._number_of_files += 1
+
+    def done(self) -> None:
+        with self._condition:
+            self._number_of_files -= 1
+            if not self._number_of_files:
+                self._condition.notify_all()
+
+    def wait(self, aborted: threading.Event) -> None:
+        with self._condition:
+            while self._number_of_files and not aborted.is_set():
+                self._condition.wait(timeout=0.1)
+
+
+class _SharedDownloadQueue:
+    """
+    Priority queue of the files listed by the requests of a batch,
+    consumed by one pool of workers.
+    """
+
+    def __init__(self, number_of_requests: int) -> None:
+        self._number_of_requests = number_of_requests
+        self._number_of_finished_requests = 0
+        self._queue: queue.PriorityQueue = queue.PriorityQueue(
+            maxsize=BATCH_DOWNLOAD_QUEUE_SIZE
+        )
+        self._sequence = itertools.count()
+        self._aborted = threading.Event()
+        self._lock = threading.Lock()
+        self.error: BaseException | None = None
+
+    def download(
+        self,
+        priority: int,
+        endpoint_url: str,
+        bucket: str,
+        s3_files: Iterable[S3FileInfo],
+        sync_manifest: SyncManifest | None,
+    ) -> None:
+        """
+        Queue the files of a request and wait until they are downloaded.
+        """
+        queued_files = _QueuedFiles()
+        for s3_file in s3_files:
+            queued_files.add()
+            item = (endpoint_url, bucket, s3_file, sync_manifest, queued_files)
+            sequence = next(self._sequence)
+            while True:
+                if self._aborted.is_set():
+                    raise _BatchDownloadAborted()
+                try:
+                    self._queue.put((priority, sequence, item), timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+        queued_files.wait(self._aborted)
+        if self._aborted.is_set():
+            raise _BatchDownloadAborted()
+
+    def request_done(self) -> None:
+        with self._lock:
+            self._number_of_finished_requests += 1
+
+    def abort(self, error: BaseException) -> None:
+        with self._lock:
+            if self.error is None and not isinstance(
+                error, _BatchDownloadAborted
+            ):
+                self.error = error
+        self._aborted.set()
+
+    def run(
+        self,
+        username: str,
+        max_concurrent_requests: int,
+        disable_progress_bar: bool,
+    ) -> None:
+        """
+        Download the queued files until all the requests are done.
+        """
+        created_directories: set[pathlib.Path] = set()
+        transfer_scheduler = TransferScheduler(
+            max_concurrent_requests,
+            get_adaptive_concurrency_controller(max_concurrent_requests),
+        )
+
+        def _download_arguments() -> Iterator[tuple]:
+            for (
+                endpoint_url,
+                bucket,
+                s3_file,
+                sync_manifest,
+                queued_files,
+            ) in self._iter_queued_files():
+                _create_parent_directory(s3_file, created_directories)
+                yield (
+                    username,
+                    endpoint_url,
+                    bucket,
+                    s3_file,
+                    sync_manifest,
+                    transfer_scheduler,
+                    queued_files,
+                )
+
+        run_concurrently_from_iterable(
+            self._download_one_file,
+            _download_arguments(),
+            max_concurrent_requests,
+            tdqm_bar_configuration={
+                "disable": disable_progress_bar,
+                "desc": "Downloading files",
+            },
+        )
+
+    def _iter_queued_files(self) -> Iterator[tuple]:
+        # A request is done only once its files are downloaded: when all
+        # the requests are done, no file can be added to the queue
+        while not self._aborted.is_set():
+            try:
+                _, _, item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                with self._lock:
+                    if (
+                        self._number_of_finished_requests
+                        == self._number_of_requests
+                    ):
+                        return
+                continue
+            yield item
+
+    def _download_one_file(
+        self,
+        username: str,
+        endpoint_url: str,
+        bucket: str,
+        s3_file: S3FileInfo,
+        sync_manifest: SyncManifest | None,
+        transfer_scheduler: TransferScheduler,
+        queued_files: _QueuedFiles,
+    ) -> None:
+        try:
+            _download_one_file(
+                username,
+                endpoint_url,
+                bucket,
+                s3_file,
+                sync_manifest,
+                transfer_scheduler,
             )
+        except BaseException as e:
+            self.abort(e)
+            raise
+        finally:
+            queued_files.done()
 
-    logger.info(
-        "Total size of the download: %s.",
-        human_readable_size(files_headers.total_size / 1024 / 1024),
+
+def combine_responses_get(responses: list[ResponseGet]) -> ResponseGet:
+    """
+    One response for the requests of a batch.
+    """
+    statuses = {response.status for response in responses}
+    if len(statuses) == 1:
+        status, message = responses[0].status, responses[0].message
+    else:
+        status, message = StatusCode.SUCCESS, StatusMessage.SUCCESS
+    files_deleted = list(
+        chain.from_iterable(
+            response.files_deleted or [] for response in responses
+        )
+    )
+    files_not_found = list(
+        chain.from_iterable(
+            response.files_not_found or [] for response in responses
+        )
+    )
+    return ResponseGet(
+        files=list(
+            chain.from_iterable(response.files for response in responses)
+        ),
+        files_deleted=files_deleted or None,
+        files_not_found=files_not_found or None,
+        number_of_files_to_download=sum(
+            response.number_of_files_to_download for response in responses
+        ),
+        total_size=sum(response.total_size or 0 for response in responses),
+        status=status,
+        message=message,
     )
 
-    files_headers = _create_filenames_out(
-        files_information=files_headers,
-        output_directory=get_request.output_directory,
-        no_directories=get_request.no_directories,
+
+def _download_original_files(
+    username: str,
+    get_request: GetRequest,
+    max_concurrent_requests: int,
+    disable_progress_bar: bool,
+    create_file_list: str | None,
+    sync_manifest: SyncManifest | None,
+    download: _DownloadFunction | None = None,
+) -> ResponseGet:
+    endpoint, bucket, path = parse_access_dataset_url(
+        str(get_request.dataset_url)
     )
+    if get_request.output_archive and not get_request.dry_run:
+        # The entries of the archive never clash with the local files
+        get_request = get_request.model_copy(update={"overwrite": True})
+    local_files_index = LocalFilesIndex()
+    files_headers = S3FilesDescriptor(endpoint=endpoint, bucket=bucket)
+    s3_files = _get_s3_files(
+        files_headers=files_headers,
+        get_request=get_request,
+        endpoint_url=endpoint,
+        bucket=bucket,
+        path=path,
+        username=username,
+        disable_progress_bar=disable_progress_bar,
+        local_files_index=local_files_index,
+        sync_manifest=sync_manifest,
+    )
+
+    if create_file_list:
+        for s3_file in s3_files:
+            files_headers.add_s3_file(s3_file)
+        _create_file_list(
+            files_headers=files_headers,
+            create_file_list=create_file_list,
+            directory_out=get_request.output_directory,
+            overwrite=get_request.overwrite,
+        )
+        return ResponseGet(
+            files=[],
+            files_deleted=None,
+            files_not_found=None,
+            number_of_files_to_download=0,
+            status=StatusCode.FILE_LIST_CREATED,
+            message=StatusMessage.FILE_LIST_CREATED,
+            total_size=None,
+        )
+
+    if get_request.dry_run:
+        for s3_file in s3_files:
+            files_headers.add_s3_file(s3_file)
+        _log_total_size(files_headers)
+    elif get_request.output_archive:
+        download_files_to_archive(
+            username,
+            endpoint,
+            bucket,
+            _add_s3_files_and_yield_the_ones_to_download(
+                s3_files, files_headers
+            ),
+            ArchiveWriter(
+                get_request.output_archive, get_request.output_directory
+            ),
+            max_concurrent_requests,
+            disable_progress_bar,
+        )
+    elif download:
+        download(
+            endpoint,
+            bucket,
+            _add_s3_files_and_yield_the_ones_to_download(
+                s3_files, files_headers
+            ),
+            sync_manifest,
+        )
+    else:
+        # Downloads start as soon as the first files are listed
+        download_files(
+            username,
+            endpoint,
+            bucket,
+            _add_s3_files_and_yield_the_ones_to_download(
+                s3_files, files_headers
+            ),
+            max_concurrent_requests,
+            disable_progress_bar,
+            sync_manifest,
+        )
 
     if get_request.sync_delete:
         files_headers = _get_files_to_delete_with_sync(
             files_information=files_headers,
             output_directory=get_request.output_directory,
+            local_files_index=local_files_index,
+            sync_manifest=sync_manifest,
         )
         if files_headers.files_to_delete:
             logger.info("Some files will be deleted due to sync delete:")
@@ -141,30 +525,277 @@ def download_original_files(
                 files_headers, get_request, "NO_DATA_TO_DOWNLOAD"
             )
 
-    response = create_response_get_from_files_headers(
-        files_headers, get_request, "SUCCESS"
+    return create_response_get_from_files_headers(
+        files_headers,
+        get_request,
+        "DRY_RUN" if get_request.dry_run else "SUCCESS",
     )
 
-    if get_request.dry_run:
-        response.status = StatusCode.DRY_RUN
-        response.message = StatusMessage.DRY_RUN
-        return response
-    filenames_in = []
-    filenames_out = []
-    for s3_file in files_headers.s3_files:
+
+def _get_s3_files(
+    files_headers: S3FilesDescriptor,
+    get_request: GetRequest,
+    endpoint_url: str,
+    bucket: str,
+    path: str,
+    username: str,
+    disable_progress_bar: bool,
+    local_files_index: LocalFilesIndex,
+    sync_manifest: SyncManifest | None = None,
+) -> Iterator[S3FileInfo]:
+    """
+    Yield the files targeted by the request as soon as they are known,
+    with their final local path.
+
+    The files of the file list (if any) come first,
+    then the ones found by listing the remote server.
+    The files not found are added to ``files_headers``.
+    With filters on the index files, only the selected files
+    are requested: the dataset is not listed.
+    """
+    if get_request.uses_index_files():
+        s3_files: Iterator[S3FileInfo] = _download_header_for_direct_download(
+            files_to_download=_get_files_from_index_files(
+                get_request=get_request,
+                bucket=bucket,
+                path=path,
+                username=username,
+                disable_progress_bar=disable_progress_bar,
+            ),
+            files_not_found=files_headers.files_not_found,
+            endpoint_url=endpoint_url,
+            bucket=bucket,
+            path=path,
+            sync=get_request.sync,
+            directory_out=get_request.output_directory,
+            username=username,
+            no_directories=get_request.no_directories,
+            overwrite=get_request.overwrite,
+            skip_existing=get_request.skip_existing,
+            local_files_index=local_files_index,
+            max_concurrent_requests=get_request.max_concurrent_requests,
+            sync_manifest=sync_manifest,
+        )
+    elif get_request.direct_download:
+        s3_files = chain(
+            _download_header_for_direct_download(
+                files_to_download=get_request.direct_download,
+                files_not_found=files_headers.files_not_found,
+                endpoint_url=endpoint_url,
+                bucket=bucket,
+                path=path,
+                sync=get_request.sync,
+                directory_out=get_request.output_directory,
+                username=username,
+                no_directories=get_request.no_directories,
+                overwrite=get_request.overwrite,
+                skip_existing=get_request.skip_existing,
+                local_files_index=local_files_index,
+                max_concurrent_requests=get_request.max_concurrent_requests,
+                sync_manifest=sync_manifest,
+            ),
+            _get_s3_files_from_listing(
+                files_headers=files_headers,
+                get_request=get_request,
+                endpoint_url=endpoint_url,
+                bucket=bucket,
+                path=path,
+                username=username,
+                disable_progress_bar=disable_progress_bar,
+                local_files_index=local_files_index,
+                sync_manifest=sync_manifest,
+            ),
+        )
+    else:
+        s3_files = _get_s3_files_from_listing(
+            files_headers=files_headers,
+            get_request=get_request,
+            endpoint_url=endpoint_url,
+            bucket=bucket,
+            path=path,
+            username=username,
+            disable_progress_bar=disable_progress_bar,
+            local_files_index=local_files_index,
+            sync_manifest=sync_manifest,
+        )
+    for s3_file in s3_files:
+        if not s3_file.overwrite and not s3_file.ignore:
+            s3_file.filename_out = local_files_index.get_unique_filepath(
+                filepath=s3_file.filename_out,
+            )
+        yield s3_file
+
+
+def _get_s3_files_from_listing(
+    files_headers: S3FilesDescriptor,
+    get_request: GetRequest,
+    endpoint_url: str,
+    bucket: str,
+    path: str,
+    username: str,
+    disable_progress_bar: bool,
+    local_files_index: LocalFilesIndex,
+    sync_manifest: SyncManifest | None = None,
+) -> Iterator[S3FileInfo]:
+    # Evaluated lazily: it needs the direct download to be done
+    if (
+        get_request.direct_download
+        and not files_headers.files_not_found
+        and not get_request.regex
+    ):
+        return
+    if files_headers.files_not_found:
+        files_not_found_regex = "|".join(
+            [
+                re.escape(file_not_found)
+                for file_not_found in files_headers.files_not_found
+            ]
+        )
+        get_request.regex = overload_regex_with_additional_filter(
+            files_not_found_regex, get_request.regex
+        )
+    if get_request.index_parts:
+        _, _, path = parse_access_dataset_url(
+            str(get_request.dataset_url), only_dataset_root_path=True
+        )
+    yield from _download_header(
+        endpoint_url=endpoint_url,
+        bucket=bucket,
+        path=path,
+        regex=get_request.regex,
+        username=username,
+        sync=get_request.sync,
+        directory_out=get_request.output_directory,
+        no_directories=get_request.no_directories,
+        skip_existing=get_request.skip_existing,
+        overwrite=get_request.overwrite,
+        disable_progress_bar=disable_progress_bar,
+        local_files_index=local_files_index,
+        max_concurrent_requests=get_request.max_concurrent_requests,
+        only_list_root_path=get_request.index_parts,
+        sync_manifest=sync_manifest,
+    )
+
+
+def get_cached_index_files(
+    username: str, dataset_url: str, disable_progress_bar: bool
+) -> list[pathlib.Path]:
+    """
+    Local copies of the index files at the root of the dataset folder,
+    such as ``index_history.txt`` for the INSITU datasets. Empty for the
+    other datasets.
+    """
+    endpoint_url, bucket, dataset_root_path = parse_access_dataset_url(
+        dataset_url, only_dataset_root_path=True
+    )
+    index_files_on_server = [
+        index_file
+        for index_file in _list_files_on_marine_data_lake_s3(
+            username,
+            endpoint_url,
+            bucket,
+            dataset_root_path,
+            False,
+            disable_progress_bar,
+            regex=INDEX_FILE_REGEX,
+        )
+        if re.search(INDEX_FILE_REGEX, index_file[0])
+    ]
+    if not index_files_on_server:
+        return []
+    with ConfiguredBoto3Session(
+        endpoint_url, ["GetObject", "HeadObject"], username
+    ) as session:
+        return [
+            get_cached_index_file(session, bucket, filename, size, etag)
+            for filename, size, _, etag in index_files_on_server
+        ]
+
+
+def _get_files_from_index_files(
+    get_request: GetRequest,
+    bucket: str,
+    path: str,
+    username: str,
+    disable_progress_bar: bool,
+) -> list[str]:
+    _, _, dataset_root_path = parse_access_dataset_url(
+        str(get_request.dataset_url), only_dataset_root_path=True
+    )
+    index_files = get_cached_index_files(
+        username, str(get_request.dataset_url), disable_progress_bar
+    )
+    if not index_files:
+        raise ValueError(
+            f"No index files found for the dataset {get_request.dataset_id}."
+            " Filtering with the area, the time range or the platforms "
+            "is only available for INSITU datasets."
+        )
+    files_to_download = get_files_to_download_from_index_files(
+        index_files=index_files,
+        index_filter=IndexFilter(
+            minimum_longitude=get_request.minimum_longitude,
+            maximum_longitude=get_request.maximum_longitude,
+            minimum_latitude=get_request.minimum_latitude,
+            maximum_latitude=get_request.maximum_latitude,
+            start_datetime=get_request.start_datetime,
+            end_datetime=get_request.end_datetime,
+            platform_ids=get_request.platform_ids,
+        ),
+        dataset_id=get_request.dataset_id,
+        bucket=bucket,
+        dataset_root_path=dataset_root_path,
+        path=path,
+        regex=get_request.regex,
+    )
+    logger.info(
+        f"{len(files_to_download)} files selected with the index files."
+    )
+    return files_to_download
+
+
+def _add_s3_files_and_yield_the_ones_to_download(
+    s3_files: Iterator[S3FileInfo],
+    files_headers: S3FilesDescriptor,
+) -> Iterator[S3FileInfo]:
+    for s3_file in s3_files:
+        files_headers.add_s3_file(s3_file)
         if not s3_file.ignore:
-            filenames_in.append(s3_file.filename_in)
-            filenames_out.append(s3_file.filename_out)
-    download_files(
-        username,
-        endpoint,
-        bucket,
-        filenames_in,
-        filenames_out,
-        max_concurrent_requests,
-        disable_progress_bar,
+            yield s3_file
+    _log_total_size(files_headers)
+
+
+def _log_total_size(files_headers: S3FilesDescriptor) -> None:
+    logger.info(
+        "Total size of the download: %s.",
+        human_readable_size(files_headers.total_size / 1024 / 1024),
     )
-    return response
+
+
+def _create_file_list(
+    files_headers: S3FilesDescriptor,
+    create_file_list: str,
+    directory_out: pathlib.Path,
+    overwrite: bool,
+) -> None:
+    download_filename = directory_out / create_file_list
+    if not overwrite:
+        download_filename = get_unique_filepath(
+            directory_out / create_file_list,
+        )
+    with open(download_filename, "w") as file_out:
+        if create_file_list.endswith(".csv"):
+            file_out.write("filename,size,last_modified_datetime,etag\n")
+        for s3_file in files_headers.s3_files:
+            if s3_file.ignore:
+                continue
+            if create_file_list.endswith(".csv"):
+                file_out.write(
+                    f"{s3_file.filename_in},{s3_file.size},"
+                    f"{s3_file.last_modified},{s3_file.etag}\n"
+                )
+            else:
+                file_out.write(f"{s3_file.filename_in}\n")
 
 
 def create_response_get_from_files_headers(
@@ -236,12 +867,27 @@ def create_response_get_from_files_headers(
 def _get_files_to_delete_with_sync(
     files_information: S3FilesDescriptor,
     output_directory: pathlib.Path,
+    local_files_index: LocalFilesIndex,
+    sync_manifest: SyncManifest | None = None,
 ) -> S3FilesDescriptor:
     if not files_information.s3_files:
         return files_information
     filenames_out = {
         s3_file.filename_out for s3_file in files_information.s3_files
     }
+    dataset_url = (
+        "/".join(files_information.s3_files[0].filename_in.split("/")[:6])
+        + "/"
+    )
+    if sync_manifest and sync_manifest.is_synced(dataset_url):
+        for local_file in _remove_deleted_files_from_sync_manifest(
+            files_information, dataset_url, sync_manifest
+        ):
+            if local_file not in filenames_out and local_files_index.is_file(
+                local_file
+            ):
+                files_information.files_to_delete.append(local_file)
+        return files_information
     product_structure = _local_path_from_s3_url(
         files_information.s3_files[0].filename_in, pathlib.Path("")
     ).parts
@@ -249,53 +895,168 @@ def _get_files_to_delete_with_sync(
     dataset_id = product_structure[1]
     dataset_level_local_folder = output_directory / product_id / dataset_id
 
-    for local_file in dataset_level_local_folder.glob("**/*"):
-        if local_file.is_file() and local_file not in filenames_out:
+    for local_file in local_files_index.iter_files(dataset_level_local_folder):
+        if local_file not in filenames_out:
             files_information.files_to_delete.append(local_file)
+    if sync_manifest:
+        # The local files are now the remote ones, the next syncs
+        # of the dataset can rely on the manifest only
+        _remove_deleted_files_from_sync_manifest(
+            files_information, dataset_url, sync_manifest
+        )
+        sync_manifest.set_synced(dataset_url)
     return files_information
 
 
+def _remove_deleted_files_from_sync_manifest(
+    files_information: S3FilesDescriptor,
+    dataset_url: str,
+    sync_manifest: SyncManifest,
+) -> list[pathlib.Path]:
+    """
+    Remove from the manifest the files of the dataset that are not
+    on the server anymore and return their local paths.
+    """
+    s3_urls = {s3_file.filename_in for s3_file in files_information.s3_files}
+    removed_entries = [
+        entry
+        for entry in sync_manifest.get_entries_with_prefix(dataset_url)
+        if entry.key not in s3_urls
+    ]
+    sync_manifest.remove(entry.key for entry in removed_entries)
+    return [sync_manifest.get_local_path(entry) for entry in removed_entries]
+
+
 def download_files(
     username: str,
     endpoint_url: str,
     bucket: str,
-    filenames_in: list[str],
-    filenames_out: list[pathlib.Path],
+    s3_files: Iterable[S3FileInfo],
     max_concurrent_requests: int,
     disable_progress_bar: bool,
+    sync_manifest: SyncManifest | None = None,
 ) -> None:
-    for filename_out in filenames_out:
-        parent_dir = pathlib.Path(filename_out).parent
-        if not parent_dir.is_dir():
-            pathlib.Path.mkdir(parent_dir, parents=True)
-    if max_concurrent_requests:
-        run_concurrently(
-            _download_one_file,
-            [
-                (username, endpoint_url, bucket, in_file, str(out_file))
-                for in_file, out_file in zip(
-                    filenames_in,
-                    filenames_out,
-                )
-            ],
-            max_concurrent_requests,
-            tdqm_bar_configuration={
-                "disable": disable_progress_bar,
-                "desc": "Downloading files",
-            },
-        )
-    else:
+    """
+    Download the files while they are produced by ``s3_files``.
+
+    The files share a budget of connections: the parts of big files are
+    downloaded in parallel only when no other file is waiting to start.
+    """
+    created_directories: set[pathlib.Path] = set()
+    transfer_scheduler = TransferScheduler(
+        max_concurrent_requests,
+        get_adaptive_concurrency_controller(max_concurrent_requests),
+    )
+
+    def _download_arguments() -> Iterator[tuple]:
+        for s3_file in s3_files:
+            _create_parent_directory(s3_file, created_directories)
+            yield (
+                username,
+                endpoint_url,
+                bucket,
+                s3_file,
+                sync_manifest,
+                transfer_scheduler,
+            )
+
+    if not max_concurrent_requests:
         logger.info("Downloading files one by one...")
-        with tqdm(
-            total=len(filenames_in),
-            disable=disable_progress_bar,
-            desc="Downloading files",
-        ) as pbar:
-            for in_file, out_file in zip(filenames_in, filenames_out):
-                _download_one_file(
-                    username, endpoint_url, bucket, in_file, str(out_file)
+    run_concurrently_from_iterable(
+        _download_one_file,
+        _download_arguments(),
+        max_concurrent_requests,
+        tdqm_bar_configuration={
+            "disable": disable_progress_bar,
+            "desc": "Downloading files",
+        },
+    )
+
+
+def download_files_to_archive(
+    username: str,
+    endpoint_url: str,
+    bucket: str,
+    s3_files: Iterable[S3FileInfo],
+    archive_writer: ArchiveWriter,
+    max_concurrent_requests: int,
+    disable_progress_bar: bool,
+) -> None:
+    """
+    Download the files while they are produced by ``s3_files`` and write
+    them into the archive in the same order.
+
+    The files are downloaded concurrently into spooled temporary files
+    (in memory while they are small). At most twice
+    ``max_concurrent_requests`` files are downloaded ahead of the one
+    being written, which bounds the memory and the disk used.
+    """
+    number_of_workers = max(max_concurrent_requests, 1)
+    pending_downloads: deque[tuple[S3FileInfo, Future]] = deque()
+    local = threading.local()
+    sessions: list[ConfiguredBoto3Session] = []
+    sessions_lock = threading.Lock()
+
+    def _get_session() -> ConfiguredBoto3Session:
+        if not hasattr(local, "session"):
+            local.session = ConfiguredBoto3Session(
+                endpoint_url,
+                ["GetObject"],
+                username,
+                max_pool_connections=number_of_workers,
+            )
+            with sessions_lock:
+                sessions.append(local.session)
+        return local.session
+
+    def _download_to_spooled_file(
+        s3_file: S3FileInfo,
+    ) -> tuple[IO[bytes], int]:
+        response = _get_session().get_object(
+            bucket, s3_file.filename_in.replace(f"s3://{bucket}/", "")
+        )
+        spooled_file = new_spooled_file()
+        try:
+            size = copy_to_spooled_file(response["Body"], spooled_file)
+        except BaseException:
+            spooled_file.close()
+            raise
+        return spooled_file, size
+
+    def _write_oldest_download() -> None:
+        s3_file, future = pending_downloads.popleft()
+        spooled_file, size = future.result()
+        with spooled_file:
+            archive_writer.add(s3_file, spooled_file, size)
+        progress_bar.update()
+
+    with (
+        tqdm(
+            disable=disable_progress_bar, desc="Downloading files"
+        ) as progress_bar,
+        ThreadPoolExecutor(max_workers=number_of_workers) as executor,
+        archive_writer,
+    ):
+        try:
+            for s3_file in s3_files:
+                pending_downloads.append(
+                    (
+                        s3_file,
+                        executor.submit(_download_to_spooled_file, s3_file),
+                    )
                 )
-                pbar.update(1)
+                if len(pending_downloads) > 2 * number_of_workers:
+                    _write_oldest_download()
+            while pending_downloads:
+                _write_oldest_download()
+        finally:
+            for _, future in pending_downloads:
+                if future.cancel():
+                    continue
+                with contextlib.suppress(BaseException):
+                    future.result()[0].close()
+            for session in sessions:
+                session.close()
 
 
 def _download_header(
@@ -305,16 +1066,16 @@ def _download_header(
     regex: str | None,
     username: str,
     sync: bool,
-    create_file_list: str | None,
     directory_out: pathlib.Path,
     no_directories: bool,
     overwrite: bool,
     skip_existing: bool,
     disable_progress_bar: bool,
+    local_files_index: LocalFilesIndex,
+    max_concurrent_requests: int = 0,
     only_list_root_path: bool = False,
-) -> S3FilesDescriptor:
-    files_headers = S3FilesDescriptor(endpoint=endpoint_url, bucket=bucket)
-
+    sync_manifest: SyncManifest | None = None,
+) -> Iterator[S3FileInfo]:
     raw_filenames = _list_files_on_marine_data_lake_s3(
         username,
         endpoint_url,
@@ -322,67 +1083,56 @@ def _download_header(
         path,
         not only_list_root_path,
         disable_progress_bar,
+        max_concurrent_requests,
+        regex,
     )
 
-    for filename, size, last_modified_datetime, etag in raw_filenames:
-        if not regex or re.search(regex, filename):
-            file_to_append = S3FileInfo(
-                filename_in=filename,
-                size=float(size),
-                last_modified=last_modified_datetime.isoformat(),
+    file_matcher = FileMatcher(regex)
+    matching_filenames = (
+        raw_filename
+        for raw_filename in raw_filenames
+        if file_matcher.search(raw_filename[0])
+    )
+    # To sync with a manifest, its entries are queried in bulk
+    use_sync_manifest = sync and sync_manifest is not None
+    for matching_filenames_batch in batched(
+        matching_filenames,
+        SYNC_MANIFEST_QUERY_SIZE if use_sync_manifest else 1,
+    ):
+        prefetched_sync_manifest_entries = (
+            sync_manifest.prefetch(
+                [filename for filename, _, _, _ in matching_filenames_batch]
+            )
+            if sync_manifest and use_sync_manifest
+            else None
+        )
+        for (
+            filename,
+            size,
+            last_modified_datetime,
+            etag,
+        ) in matching_filenames_batch:
+            yield _create_s3_file_info(
+                filename=filename,
+                size=size,
+                last_modified_datetime=last_modified_datetime,
                 etag=etag,
-                ignore=_check_should_be_ignored(
-                    filename,
-                    size,
-                    last_modified_datetime,
-                    directory_out,
-                    skip_existing,
-                    sync,
-                    no_directories,
-                ),
-                overwrite=_check_should_be_overwritten(
-                    filename,
-                    size,
-                    last_modified_datetime,
-                    directory_out,
-                    sync,
-                    overwrite,
-                    no_directories,
+                directory_out=directory_out,
+                no_directories=no_directories,
+                local_files_index=local_files_index,
+                skip_existing=skip_existing,
+                sync=sync,
+                overwrite=overwrite,
+                sync_manifest=sync_manifest,
+                prefetched_sync_manifest_entries=(
+                    prefetched_sync_manifest_entries
                 ),
             )
-            files_headers.add_s3_file(file_to_append)
-
-    if create_file_list and create_file_list.endswith(".txt"):
-        download_filename = directory_out / create_file_list
-        if not overwrite:
-            download_filename = get_unique_filepath(
-                directory_out / create_file_list,
-            )
-        with open(download_filename, "w") as file_out:
-            for s3_file in files_headers.s3_files:
-                if not s3_file.ignore:
-                    file_out.write(f"{s3_file.filename_in}\n")
-        files_headers.create_file_list = True
-    elif create_file_list and create_file_list.endswith(".csv"):
-        download_filename = directory_out / create_file_list
-        if not overwrite:
-            download_filename = get_unique_filepath(
-                directory_out / create_file_list,
-            )
-        with open(download_filename, "w") as file_out:
-            file_out.write("filename,size,last_modified_datetime,etag\n")
-            for s3_file in files_headers.s3_files:
-                if not s3_file.ignore:
-                    file_out.write(
-                        f"{s3_file.filename_in},{s3_file.size},"
-                        f"{s3_file.last_modified},{s3_file.etag}\n"
-                    )
-        files_headers.create_file_list = True
-    return files_headers
 
 
 def _download_header_for_direct_download(
     files_to_download: list[str],
+    files_not_found: list[str],
     endpoint_url: str,
     bucket: str,
     path: str,
@@ -392,60 +1142,80 @@ def _download_header_for_direct_download(
     no_directories: bool,
     overwrite: bool,
     skip_existing: bool,
-) -> S3FilesDescriptor:
-    files_headers = S3FilesDescriptor(endpoint=endpoint_url, bucket=bucket)
+    local_files_index: LocalFilesIndex,
+    max_concurrent_requests: int = 0,
+    sync_manifest: SyncManifest | None = None,
+) -> Iterator[S3FileInfo]:
+    """
+    Yield the files of the file list found on the server.
 
+    The HEAD requests share one client and run in parallel, the files
+    are yielded as soon as they are resolved, in no particular order.
+    """
     split_path = path.split("/")
     root_folder = split_path[0]
     product_id = split_path[1]
     dataset_id_with_tag = split_path[2]
 
+    full_paths: list[tuple[str, str]] = []
     for file_to_download in files_to_download:
         file_path = file_to_download.split(f"{dataset_id_with_tag}/")[-1]
         if not file_path:
             logger.warning(
                 f"{file_to_download} does not seem to be valid. Skipping."
             )
-            files_headers.files_not_found.append(file_to_download)
+            files_not_found.append(file_to_download)
             continue
         full_path = (
             f"s3://{bucket}/{root_folder}/{product_id}/"
             f"{dataset_id_with_tag}/{file_path}"
         )
-        size_last_modified_and_etag = _get_file_size_last_modified_and_etag(
-            endpoint_url, bucket, full_path, username
-        )
-        if size_last_modified_and_etag:
-            size, last_modified, etag = size_last_modified_and_etag
-            file_to_append = S3FileInfo(
-                filename_in=full_path,
-                size=size,
-                last_modified=last_modified.isoformat(),
-                etag=etag,
-                ignore=_check_should_be_ignored(
-                    full_path,
-                    size,
-                    last_modified,
-                    directory_out,
-                    skip_existing,
-                    sync,
-                    no_directories,
-                ),
-                overwrite=_check_should_be_overwritten(
+        full_paths.append((file_to_download, full_path))
+
+    found_files = False
+    with ConfiguredBoto3Session(
+        endpoint_url,
+        ["HeadObject"],
+        username,
+        max_pool_connections=max_concurrent_requests,
+    ) as session:
+        for (
+            file_to_download,
+            full_path,
+            size_last_modified_and_etag,
+        ) in iterate_concurrently(
+            [
+                functools.partial(
+                    _get_file_header_for_direct_download,
+                    session,
+                    bucket,
+                    file_to_download,
                     full_path,
-                    size,
-                    last_modified,
-                    directory_out,
-                    sync,
-                    overwrite,
-                    no_directories,
-                ),
-            )
-            files_headers.add_s3_file(file_to_append)
-        else:
-            files_headers.files_not_found.append(file_to_download)
+                )
+                for file_to_download, full_path in full_paths
+            ],
+            max_concurrent_requests,
+        ):
+            if size_last_modified_and_etag:
+                size, last_modified, etag = size_last_modified_and_etag
+                found_files = True
+                yield _create_s3_file_info(
+                    filename=full_path,
+                    size=size,
+                    last_modified_datetime=last_modified,
+                    etag=etag,
+                    directory_out=directory_out,
+                    no_directories=no_directories,
+                    local_files_index=local_files_index,
+                    skip_existing=skip_existing,
+                    sync=sync,
+                    overwrite=overwrite,
+                    sync_manifest=sync_manifest,
+                )
+            else:
+                files_not_found.append(file_to_download)
 
-    if not files_headers.s3_files:
+    if not found_files:
         logger.warning(
             "No files found to download for direct download. "
             "Please check the files to download. "
@@ -453,29 +1223,103 @@ def _download_header_for_direct_download(
             "and compare them with the requested files."
         )
 
-    return files_headers
 
+def _get_file_header_for_direct_download(
+    session: ConfiguredBoto3Session,
+    bucket: str,
+    file_to_download: str,
+    full_path: str,
+) -> list[tuple[str, str, tuple[int, datetime, str] | None]]:
+    return [
+        (
+            file_to_download,
+            full_path,
+            _get_file_size_last_modified_and_etag(session, bucket, full_path),
+        )
+    ]
 
-def _check_already_exists(
+
+def _create_s3_file_info(
     filename: str,
+    size: int,
+    last_modified_datetime: datetime,
+    etag: str,
     directory_out: pathlib.Path,
     no_directories: bool,
-) -> bool:
+    local_files_index: LocalFilesIndex,
+    skip_existing: bool,
+    sync: bool,
+    overwrite: bool,
+    sync_manifest: SyncManifest | None = None,
+    prefetched_sync_manifest_entries: (
+        dict[str, SyncManifestEntry | None] | None
+    ) = None,
+) -> S3FileInfo:
     filename_out = _create_filename_out(
         filename, directory_out, no_directories
     )
-    return filename_out.is_file()
+    sync_manifest_entry = (
+        sync_manifest.get(filename, prefetched_sync_manifest_entries)
+        if sync_manifest and sync
+        else None
+    )
+    if (
+        sync_manifest is not None
+        and sync_manifest_entry
+        and sync_manifest.get_local_path(sync_manifest_entry) != filename_out
+    ):
+        sync_manifest_entry = None
+    s3_file = S3FileInfo(
+        filename_in=filename,
+        filename_out=filename_out,
+        size=float(size),
+        last_modified=last_modified_datetime.isoformat(),
+        etag=etag,
+        ignore=_check_should_be_ignored(
+            filename_out,
+            size,
+            last_modified_datetime,
+            etag,
+            local_files_index,
+            skip_existing,
+            sync,
+            sync_manifest_entry,
+        ),
+        overwrite=_check_should_be_overwritten(
+            filename_out,
+            size,
+            last_modified_datetime,
+            etag,
+            local_files_index,
+            sync,
+            overwrite,
+            sync_manifest_entry,
+        ),
+    )
+    if sync_manifest and sync and s3_file.ignore and not sync_manifest_entry:
+        # Up to date according to its size and modification time
+        sync_manifest.record(s3_file)
+    return s3_file
+
+
+def _check_already_exists(
+    filename_out: pathlib.Path,
+    local_files_index: LocalFilesIndex,
+) -> bool:
+    return local_files_index.is_file(filename_out)
 
 
 def _check_needs_to_be_synced(
-    filename: str,
+    filename_out: pathlib.Path,
     size: int,
     last_modified_datetime: datetime,
-    directory_out: pathlib.Path,
-    no_directories: bool,
+    etag: str,
+    local_files_index: LocalFilesIndex,
+    sync_manifest_entry: SyncManifestEntry | None = None,
 ) -> bool:
     """
-    Follow the logic of s5cmd:
+    If the file was recorded in the sync manifest, compare the ETags.
+    Otherwise, follow the logic of s5cmd:
 
     mod time    |  size        |  should sync
     ------------|--------------|-------------
@@ -485,18 +1329,23 @@ def _check_needs_to_be_synced(
     src <= dst  |  src == dst  |  ❌
 
     """
-    filename_out = _create_filename_out(
-        filename, directory_out, no_directories
+    if sync_manifest_entry and local_files_index.is_file(filename_out):
+        return (
+            sync_manifest_entry.etag != etag
+            or sync_manifest_entry.size != size
+        )
+    size_and_modification_time = (
+        local_files_index.get_size_and_modification_time(filename_out)
     )
-    if not filename_out.is_file():
+    if size_and_modification_time is None:
         return True
     else:
-        file_stats = filename_out.stat()
-        if file_stats.st_size != size:
+        local_size, local_modification_time = size_and_modification_time
+        if local_size != size:
             return True
         else:
             last_created_datetime_out = timestamp_parser(
-                file_stats.st_mtime, unit="s"
+                local_modification_time, unit="s"
             )
             # boto3.s3_resource.Object.last_modified is without microsecond
             # boto3.paginate s3_object["LastModified"] is with microsecond
@@ -507,49 +1356,53 @@ def _check_needs_to_be_synced(
 
 
 def _check_should_be_ignored(
-    filename: str,
+    filename_out: pathlib.Path,
     size: int,
     last_modified_datetime: datetime,
-    directory_out: pathlib.Path,
+    etag: str,
+    local_files_index: LocalFilesIndex,
     skip_existing: bool,
     sync: bool,
-    no_directories: bool,
+    sync_manifest_entry: SyncManifestEntry | None = None,
 ) -> bool:
     return (
         skip_existing
-        and _check_already_exists(filename, directory_out, no_directories)
+        and _check_already_exists(filename_out, local_files_index)
     ) or (
         sync
         and not _check_needs_to_be_synced(
-            filename,
+            filename_out,
             size,
             last_modified_datetime,
-            directory_out,
-            no_directories,
+            etag,
+            local_files_index,
+            sync_manifest_entry,
         )
     )
 
 
 def _check_should_be_overwritten(
-    filename: str,
+    filename_out: pathlib.Path,
     size: int,
     last_modified_datetime: datetime,
-    directory_out: pathlib.Path,
+    etag: str,
+    local_files_index: LocalFilesIndex,
     sync: bool,
     overwrite: bool,
-    no_directories: bool,
+    sync_manifest_entry: SyncManifestEntry | None = None,
 ) -> bool:
     return (
         overwrite
-        and _check_already_exists(filename, directory_out, no_directories)
+        and _check_already_exists(filename_out, local_files_index)
         or (
             sync
             and _check_needs_to_be_synced(
-                filename,
+                filename_out,
                 size,
                 last_modified_datetime,
-                directory_out,
-                no_directories,
+                etag,
+                local_files_index,
+                sync_manifest_entry,
             )
         )
     )
@@ -568,9 +1421,21 @@ def _list_files_on_marine_data_lake_s3(
     prefix: str,
     recursive: bool,
     disable_progress_bar: bool,
-) -> list[tuple[str, int, datetime, str]]:
+    max_concurrent_requests: int = 0,
+    regex: str | None = None,
+) -> Iterator[tuple[str, int, datetime, str]]:
+    """
+    Yield the files page by page, while the listing goes on.
+
+    A recursive listing is restricted to the prefixes that the regex
+    can match, if any, and split on their sub-folders
+    that are listed concurrently, hence the files are not sorted.
+    """
     with ConfiguredBoto3Session(
-        endpoint_url, ["ListObjectsV2", "HeadObject"], username
+        endpoint_url,
+        ["ListObjectsV2", "HeadObject"],
+        username,
+        max_pool_connections=max_concurrent_requests,
     ) as session:
         if not prefix.endswith("/"):
             try:
@@ -582,80 +1447,165 @@ def _list_files_on_marine_data_lake_s3(
                 else:
                     raise
 
-        paginator = session.s3_client.get_paginator("list_objects")
-        page_iterator = paginator.paginate(
-            Bucket=bucket,
-            Prefix=prefix,
-            Delimiter="/" if not recursive else "",
-        )
-    logger.info("Listing files on remote server...")
-    s3_objects = chain(
-        *map(
-            lambda page: page.get("Contents", []),
-            tqdm(page_iterator, disable=disable_progress_bar),
-        )
-    )
-    files_already_found: list[tuple[str, int, datetime, str]] = []
-    for s3_object in s3_objects:
-        files_already_found.append(
-            (
-                f"s3://{bucket}/" + s3_object["Key"],
-                s3_object["Size"],
-                s3_object["LastModified"].astimezone(tz=UTC),
-                s3_object["ETag"],
+        logger.info("Listing files on remote server...")
+        if recursive:
+            pages = _list_objects_partitioned(
+                session,
+                bucket,
+                get_listing_prefixes(regex, bucket, prefix),
+                max_concurrent_requests,
             )
-        )
-    return files_already_found
+        else:
+            pages = (
+                contents
+                for contents, _ in _list_objects(
+                    session, bucket, prefix, delimiter="/"
+                )
+            )
+        for contents in tqdm(pages, disable=disable_progress_bar):
+            for s3_object in contents:
+                yield (
+                    f"s3://{bucket}/" + s3_object["Key"],
+                    s3_object["Size"],
+                    s3_object["LastModified"].astimezone(tz=UTC),
+                    s3_object["ETag"],
+                )
+
+
+def _list_objects(
+    session: ConfiguredBoto3Session,
+    bucket: str,
+    prefix: str,
+    delimiter: str = "",
+) -> Iterator[tuple[list[dict], list[str]]]:
+    """
+    Yield the objects and the sub-prefixes of each page of the listing.
+    """
+    paginator = session.s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(
+        Bucket=bucket, Prefix=prefix, Delimiter=delimiter
+    ):
+        yield page.get("Contents", []), [
+            common_prefix["Prefix"]
+            for common_prefix in page.get("CommonPrefixes", [])
+        ]
+
+
+def _list_objects_partitioned(
+    session: ConfiguredBoto3Session,
+    bucket: str,
+    prefixes: list[str],
+    max_concurrent_requests: int,
+) -> Iterator[list[dict]]:
+    """
+    Discover the sub-prefixes with delimiter listings (typically the year
+    then month folders of native datasets), until there are enough of
+    them to keep the workers busy, then list them recursively in parallel.
+    Files found while discovering the sub-prefixes are yielded on the way.
+    """
+    partitions = prefixes
+    for _ in range(MAXIMUM_LISTING_PARTITION_DEPTH):
+        if len(partitions) >= max_concurrent_requests:
+            break
+        sub_partitions: list[str] = []
+        for contents, common_prefixes in iterate_concurrently(
+            [
+                functools.partial(
+                    _list_objects, session, bucket, partition, "/"
+                )
+                for partition in partitions
+            ],
+            max_concurrent_requests,
+        ):
+            if contents:
+                yield contents
+            sub_partitions.extend(common_prefixes)
+        partitions = sub_partitions
+        if not partitions:
+            return
+    for contents, _ in iterate_concurrently(
+        [
+            functools.partial(_list_objects, session, bucket, partition)
+            for partition in partitions
+        ],
+        max_concurrent_requests,
+    ):
+        yield contents
 
 
 def _get_file_size_last_modified_and_etag(
-    endpoint_url: str, bucket: str, file_in: str, username: str
+    session: ConfiguredBoto3Session, bucket: str, file_in: str
 ) -> tuple[int, datetime, str] | None:
-    with ConfiguredBoto3Session(
-        endpoint_url, ["HeadObject"], username
-    ) as session:
-        try:
-            s3_object = session.s3_client.head_object(
-                Bucket=bucket,
-                Key=file_in.replace(f"s3://{bucket}/", ""),
-            )
-            return (
-                s3_object["ContentLength"],
-                s3_object["LastModified"].astimezone(tz=UTC),
-                s3_object["ETag"],
+    try:
+        s3_object = session.s3_client.head_object(
+            Bucket=bucket,
+            Key=file_in.replace(f"s3://{bucket}/", ""),
+        )
+        return (
+            s3_object["ContentLength"],
+            s3_object["LastModified"].astimezone(tz=UTC),
+            s3_object["ETag"],
+        )
+    except ClientError as e:
+        if "404" in str(e):
+            logger.warning(
+                f"File {file_in} not found on the server. Skipping."
             )
-        except ClientError as e:
-            if "404" in str(e):
-                logger.warning(
-                    f"File {file_in} not found on the server. Skipping."
-                )
-                return None
-            else:
-                raise e
+            return None
+        else:
+            raise e
+
+
+def _create_parent_directory(
+    s3_file: S3FileInfo, created_directories: set[pathlib.Path]
+) -> None:
+    parent_dir = s3_file.filename_out.parent
+    if parent_dir not in created_directories:
+        parent_dir.mkdir(parents=True, exist_ok=True)
+        created_directories.add(parent_dir)
 
 
 def _download_one_file(
     username,
     endpoint_url: str,
     bucket: str,
-    file_in: str,
-    file_out: str,
+    s3_file: S3FileInfo,
+    sync_manifest: SyncManifest | None = None,
+    transfer_scheduler: TransferScheduler | None = None,
 ) -> None:
-    with ConfiguredBoto3Session(
+    file_out = str(s3_file.filename_out)
+    with (
+        transfer_scheduler.transfer()
+        if transfer_scheduler
+        else contextlib.nullcontext()
+    ), ConfiguredBoto3Session(
         endpoint_url,
         ["GetObject", "HeadObject"],
         username,
-        need_resources=True,
+        max_pool_connections=(
+            transfer_scheduler.max_connections if transfer_scheduler else None
+        ),
     ) as session:
-        last_modified_date_epoch = session.s3_resource.Object(
-            bucket, file_in.replace(f"s3://{bucket}/", "")
-        ).last_modified.timestamp()
-
-        session.download_file(
+        # The listing already gave us the size, the ETag and the last
+        # modified date: no need for a HEAD request before downloading
+        get_last_modified = session.download_file(
             bucket,
-            file_in.replace(f"s3://{bucket}/", ""),
+            s3_file.filename_in.replace(f"s3://{bucket}/", ""),
             file_out,
+            size=int(s3_file.size),
+            etag=s3_file.etag or None,
+            transfer_scheduler=transfer_scheduler,
         )
+    if sync_manifest:
+        sync_manifest.record(s3_file)
+    if s3_file.last_modified:
+        last_modified_date_epoch = datetime.fromisoformat(
+            s3_file.last_modified
+        ).timestamp()
+    elif get_last_modified:
+        last_modified_date_epoch = get_last_modified.timestamp()
+    else:
+        return
 
     try:
         os.utime(
@@ -673,27 +1623,6 @@ def _download_one_file(
 # /////////////////////////////
 
 
-def _create_filenames_out(
-    files_information: S3FilesDescriptor,
-    output_directory: pathlib.Path = pathlib.Path("."),
-    no_directories=False,
-) -> S3FilesDescriptor:
-    for s3_file in files_information.s3_files:
-        filename_in = s3_file.filename_in
-        filename_out = _create_filename_out(
-            filename_in,
-            output_directory,
-            no_directories,
-        )
-        if not s3_file.overwrite and not s3_file.ignore:
-            filename_out = get_unique_filepath(
-                filepath=filename_out,
-            )
-        s3_file.filename_out = filename_out
-
-    return files_information
-
-
 def _create_filename_out(
     file_path: str,
     output_directory: pathlib.Path,
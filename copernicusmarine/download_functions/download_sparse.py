@@ -1,10 +1,16 @@
+import concurrent.futures
+import itertools
 import logging
+import multiprocessing
 import pathlib
 import shutil
+import tempfile
 import warnings
-from collections import defaultdict
+from collections import deque
 from copy import deepcopy
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, Iterable, Iterator, Sequence
 
 import numpy as np
 import pandas as pd
@@ -12,14 +18,19 @@ import xarray as xr
 from arcosparse import (
     Entity,
     UserConfiguration,
-    get_entities,
     subset_and_return_dataframe,
+    subset_and_save,
 )
+from botocore.exceptions import BotoCoreError, ClientError
 
 from copernicusmarine.catalogue_parser.models import CopernicusMarineService
+from copernicusmarine.core_functions.adaptive_concurrency import (
+    get_adaptive_concurrency_controller,
+)
 from copernicusmarine.core_functions.environment_variables import (
     COPERNICUSMARINE_DISABLE_SSL_CONTEXT,
     COPERNICUSMARINE_SET_SSL_CERTIFICATE_PATH,
+    COPERNICUSMARINE_SPARSE_NETCDF_PROCESSES,
 )
 from copernicusmarine.core_functions.exceptions import (
     NotEnoughPlatformMetadata,
@@ -32,19 +43,38 @@ from copernicusmarine.core_functions.models import (  # TimeExtent,
     StatusMessage,
     VerticalAxis,
 )
-from copernicusmarine.core_functions.request_structure import SubsetRequest
+from copernicusmarine.core_functions.request_structure import (
+    ALL_VARIABLES,
+    SubsetRequest,
+)
 from copernicusmarine.core_functions.sessions import TRUST_ENV
 from copernicusmarine.core_functions.temporary_path_saver import (
     TemporaryPathSaver,
 )
 from copernicusmarine.core_functions.utils import (
     construct_query_params_for_marine_data_store_monitoring,
-    datetime_parser,
     datetime_to_isoformat,
     datetime_to_timestamp,
     get_unique_directorypath,
     get_unique_filepath,
-    timestamp_parser,
+)
+from copernicusmarine.download_functions.download_original_files import (
+    get_cached_index_files,
+)
+from copernicusmarine.download_functions.index_files import (
+    IndexFilter,
+    get_overlap_mask,
+    get_platforms_coverage,
+)
+from copernicusmarine.download_functions.platforms_metadata import (
+    PlatformsMetadata,
+    get_platforms_metadata,
+)
+from copernicusmarine.download_functions.sparse_streaming import (
+    CSVAppender,
+    ParquetAppender,
+    PlatformSpool,
+    concat_blocks,
 )
 from copernicusmarine.download_functions.utils import (
     build_filename_from_request,
@@ -54,6 +84,17 @@ from copernicusmarine.versioner import __version__ as toolbox_version
 
 logger = logging.getLogger("copernicusmarine")
 
+SPARSE_MAX_CONCURRENT_REQUESTS = 20
+# Starting processes is only worth it with enough platforms per process
+NETCDF_MINIMUM_PLATFORMS_PER_PROCESS = 8
+# The processes are not forked from the current one, whose threads
+# (connection pools, progress bars) could hold locks
+NETCDF_PROCESSES_START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
 COLUMNS_RENAME = {
     "entity_id": "platform_id",
     "entity_type": "platform_type",
@@ -79,6 +120,9 @@ COLUMNS_ORDER_DEPTH = [
 COLUMNS_ORDER_ELEVATION = deepcopy(COLUMNS_ORDER_DEPTH)
 COLUMNS_ORDER_ELEVATION[COLUMNS_ORDER_ELEVATION.index("depth")] = "elevation"
 
+# Above, the whole area is requested rather than the platforms one by one
+PREFILTER_MAXIMUM_PLATFORMS = 200
+
 SORTING = {
     "variable": True,
     "platform_id": True,
@@ -96,6 +140,7 @@ def download_sparse(
     product_doi: str | None,
     product_id: str | None,
     disable_progress_bar: bool,
+    original_files_url: str | None = None,
 ) -> ResponseSubset:
 
     if subset_request.dry_run:
@@ -106,6 +151,7 @@ def download_sparse(
             service,
             product_doi,
             disable_progress_bar,
+            original_files_url,
             dry_run=True,
         )
         response = _get_response_subset(
@@ -118,6 +164,19 @@ def download_sparse(
         response.message = StatusMessage.DRY_RUN
         return response
 
+    if subset_request.streaming:
+        return _download_sparse_streaming(
+            username,
+            subset_request,
+            metadata_url,
+            service,
+            axis_coordinate_id_mapping,
+            product_doi,
+            product_id,
+            disable_progress_bar,
+            original_files_url,
+        )
+
     df, variables, platform_ids = _read_dataframe_sparse(
         username,
         subset_request,
@@ -125,6 +184,7 @@ def download_sparse(
         service,
         product_doi,
         disable_progress_bar,
+        original_files_url,
     )
     response = _get_response_subset(
         subset_request,
@@ -133,27 +193,13 @@ def download_sparse(
         axis_coordinate_id_mapping=axis_coordinate_id_mapping,
     )
     output_path = response.file_path
-    if subset_request.skip_existing and output_path.exists():
-        response.file_status = FileStatus.IGNORED
+    if not _prepare_output_path(subset_request, response):
         return response
-    elif (
-        subset_request.overwrite
-        and output_path.exists()
-        and output_path.is_dir()
-    ):
-        shutil.rmtree(output_path)
-
-    if subset_request.output_directory:
-        subset_request.output_directory.mkdir(parents=True, exist_ok=True)
     if df.empty:
         return response
 
     if subset_request.file_format == "netcdf":
-        user_configuration = _get_user_configuration(username)
-        platforms_metadata = {
-            entity.entity_id: entity
-            for entity in get_entities(metadata_url, user_configuration)
-        }
+        platforms_metadata = get_platforms_metadata(metadata_url).entities
         file_names = _dataframe_to_netcdf_per_platform(
             df=df,
             vertical_axis=subset_request.vertical_axis,
@@ -166,16 +212,229 @@ def download_sparse(
             netcdf3_compatible=subset_request.netcdf3_compatible,
         )
         response.file_names = file_names
+    elif subset_request.file_format == "parquet":
+        with TemporaryPathSaver(
+            output_path,
+            is_directory=bool(subset_request.parquet_partition_columns),
+        ) as tmp_path:
+            with _get_parquet_appender(
+                tmp_path, subset_request
+            ) as parquet_appender:
+                parquet_appender.append(df)
     else:
         with TemporaryPathSaver(output_path) as tmp_path:
-            if subset_request.file_format == "parquet":
-                df.to_parquet(tmp_path, index=False)
-            else:
-                df.to_csv(tmp_path, index=False)
+            df.assign(time=_datetimes_to_isoformat(df["time"])).to_csv(
+                tmp_path, index=False
+            )
+
+    return response
+
+
+def _prepare_output_path(
+    subset_request: SubsetRequest, response: ResponseSubset
+) -> bool:
+    """
+    Return False if the existing output is skipped.
+    """
+    output_path = response.file_path
+    if subset_request.skip_existing and output_path.exists():
+        response.file_status = FileStatus.IGNORED
+        return False
+    elif (
+        subset_request.overwrite
+        and output_path.exists()
+        and output_path.is_dir()
+    ):
+        shutil.rmtree(output_path)
+
+    if subset_request.output_directory:
+        subset_request.output_directory.mkdir(parents=True, exist_ok=True)
+    return True
+
+
+def _download_sparse_streaming(
+    username: str,
+    subset_request: SubsetRequest,
+    metadata_url: str,
+    service: CopernicusMarineService,
+    axis_coordinate_id_mapping: dict[str, str],
+    product_doi: str | None,
+    product_id: str | None,
+    disable_progress_bar: bool,
+    original_files_url: str | None = None,
+) -> ResponseSubset:
+    """
+    Same as download_sparse without ever holding the whole result.
+
+    arcosparse saves each downloaded chunk in its own Parquet file in a
+    temporary directory next to the output. The chunks are then
+    transformed one at a time and appended to the CSV or Parquet file,
+    or routed to the platforms that are written to NetCDF one at a time.
+    The rows are sorted within each chunk only.
+    """
+    user_configuration = _get_user_configuration(username)
+    cached_platforms_metadata = get_platforms_metadata(metadata_url)
+    platforms_metadata = cached_platforms_metadata.entities
+    variables, platform_ids = _get_variables_and_platform_ids(
+        subset_request, cached_platforms_metadata, service
+    )
+    response = _get_response_subset(
+        subset_request,
+        variables=variables,
+        platform_ids=platform_ids,
+        axis_coordinate_id_mapping=axis_coordinate_id_mapping,
+    )
+    output_path = response.file_path
+    if not _prepare_output_path(subset_request, response):
+        return response
+
+    with tempfile.TemporaryDirectory(
+        prefix=f".{output_path.name}.", dir=output_path.parent
+    ) as spool_directory:
+        chunk_files = _save_chunks(
+            subset_request,
+            variables,
+            _get_entity_ids_to_subset(
+                subset_request,
+                platform_ids,
+                cached_platforms_metadata,
+                _get_platforms_coverage(
+                    username,
+                    subset_request,
+                    original_files_url,
+                    disable_progress_bar,
+                ),
+            ),
+            metadata_url,
+            user_configuration,
+            disable_progress_bar,
+            pathlib.Path(spool_directory) / "chunks",
+        )
+        chunks = _read_chunks(
+            chunk_files, subset_request, platforms_metadata, product_doi
+        )
+        # Nothing is written if no value is kept, like in memory
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            logger.info(
+                "No data found for the given parameters. "
+                "Please check your request and try again."
+            )
+            return response
+        chunks = itertools.chain([first_chunk], chunks)
 
+        if subset_request.file_format == "netcdf":
+            platform_spool = PlatformSpool(
+                pathlib.Path(spool_directory) / "platforms"
+            )
+            for chunk in chunks:
+                platform_spool.add(chunk)
+            platform_spool.flush()
+            response.file_names = _platforms_to_netcdf(
+                (
+                    (platform_id, _sort_dataframe(platform_df))
+                    for platform_id, platform_df in platform_spool.platforms()
+                ),
+                len(platform_spool),
+                _get_platform_netcdf_writer(
+                    vertical_axis=subset_request.vertical_axis,
+                    platforms_metadata=platforms_metadata,
+                    subset_request=subset_request,
+                    product_id=product_id,
+                    service=service,
+                    netcdf_compression_level=(
+                        subset_request.netcdf_compression_level
+                    ),
+                    netcdf3_compatible=subset_request.netcdf3_compatible,
+                ),
+                output_path,
+            )
+        elif subset_request.file_format == "parquet":
+            with TemporaryPathSaver(
+                output_path,
+                is_directory=bool(subset_request.parquet_partition_columns),
+            ) as tmp_path:
+                with _get_parquet_appender(
+                    tmp_path, subset_request
+                ) as parquet_appender:
+                    for chunk in chunks:
+                        parquet_appender.append(chunk)
+        else:
+            with TemporaryPathSaver(output_path) as tmp_path:
+                csv_appender = CSVAppender(tmp_path)
+                for chunk in chunks:
+                    csv_appender.append(
+                        chunk.assign(
+                            time=_datetimes_to_isoformat(chunk["time"])
+                        )
+                    )
     return response
 
 
+def _save_chunks(
+    subset_request: SubsetRequest,
+    variables: list[str],
+    entity_ids: list[str] | None,
+    metadata_url: str,
+    user_configuration: UserConfiguration,
+    disable_progress_bar: bool,
+    chunks_directory: pathlib.Path,
+) -> list[pathlib.Path]:
+    """
+    Let arcosparse save each downloaded chunk in its own Parquet file.
+
+    Returns the chunk files, none if no entity is requested.
+    """
+    # see https://github.com/pandas-dev/pandas/issues/55928
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=FutureWarning)
+        if entity_ids is not None:
+            subset_and_save(
+                **_get_arcosparse_subset_arguments(
+                    subset_request,
+                    variables,
+                    entity_ids,
+                    metadata_url,
+                    user_configuration,
+                    disable_progress_bar,
+                ),
+                output_path=chunks_directory,
+            )
+    return sorted(chunks_directory.glob("*.parquet"))
+
+
+def _read_chunks(
+    chunk_files: list[pathlib.Path],
+    subset_request: SubsetRequest,
+    platforms_metadata: dict[str, Entity],
+    product_doi: str | None,
+) -> Iterator[pd.DataFrame]:
+    """
+    The filtered and transformed chunks, read one at a time.
+    """
+    for chunk_file in chunk_files:
+        chunk = _filter_values(pd.read_parquet(chunk_file), subset_request)
+        if chunk.empty:
+            continue
+        yield _transform_dataframe(
+            chunk,
+            subset_request.vertical_axis,
+            platforms_metadata,
+            product_doi,
+        )
+
+
+def _get_parquet_appender(
+    path: pathlib.Path, subset_request: SubsetRequest
+) -> ParquetAppender:
+    return ParquetAppender(
+        path,
+        partition_columns=subset_request.parquet_partition_columns,
+        row_group_size=subset_request.parquet_row_group_size,
+        compression=subset_request.parquet_compression,
+    )
+
+
 def read_dataframe_sparse(
     username: str,
     subset_request: SubsetRequest,
@@ -183,6 +442,7 @@ def read_dataframe_sparse(
     service: CopernicusMarineService,
     product_doi: str | None,
     disable_progress_bar: bool,
+    original_files_url: str | None = None,
 ) -> pd.DataFrame:
     df, _, _ = _read_dataframe_sparse(
         username,
@@ -191,7 +451,10 @@ def read_dataframe_sparse(
         service,
         product_doi,
         disable_progress_bar,
+        original_files_url,
     )
+    if not df.empty:
+        df["time"] = _datetimes_to_isoformat(df["time"])
     return df
 
 
@@ -202,6 +465,7 @@ def _read_dataframe_sparse(
     service: CopernicusMarineService,
     product_doi: str | None,
     disable_progress_bar: bool,
+    original_files_url: str | None = None,
     dry_run: bool = False,
 ) -> tuple[pd.DataFrame, list[str], list[str]]:
     """
@@ -210,14 +474,92 @@ def _read_dataframe_sparse(
     Returns also the variables and the platform_ids
     """
     user_configuration = _get_user_configuration(username)
-    platforms_metadata = {
-        entity.entity_id: entity
-        for entity in get_entities(metadata_url, user_configuration)
-    }
+    cached_platforms_metadata = get_platforms_metadata(metadata_url)
+    platforms_metadata = cached_platforms_metadata.entities
+    variables, platform_ids = _get_variables_and_platform_ids(
+        subset_request, cached_platforms_metadata, service
+    )
+    if dry_run:
+        return pd.DataFrame(), variables, platform_ids
+    entity_ids = _get_entity_ids_to_subset(
+        subset_request,
+        platform_ids,
+        cached_platforms_metadata,
+        _get_platforms_coverage(
+            username, subset_request, original_files_url, disable_progress_bar
+        ),
+    )
+    if entity_ids is None:
+        logger.info(
+            "No data found for the given parameters. "
+            "Please check your request and try again."
+        )
+        return pd.DataFrame(), variables, platform_ids
+    if subset_request.streaming:
+        # The whole raw result of arcosparse is never held in memory,
+        # only the transformed chunks
+        with tempfile.TemporaryDirectory(
+            prefix=".copernicusmarine."
+        ) as spool_directory:
+            chunks = list(
+                _read_chunks(
+                    _save_chunks(
+                        subset_request,
+                        variables,
+                        entity_ids,
+                        metadata_url,
+                        user_configuration,
+                        disable_progress_bar,
+                        pathlib.Path(spool_directory) / "chunks",
+                    ),
+                    subset_request,
+                    platforms_metadata,
+                    product_doi,
+                )
+            )
+        df = concat_blocks(chunks) if chunks else pd.DataFrame()
+    else:
+        # see https://github.com/pandas-dev/pandas/issues/55928
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=FutureWarning)
+            df = subset_and_return_dataframe(
+                **_get_arcosparse_subset_arguments(
+                    subset_request,
+                    variables,
+                    entity_ids,
+                    metadata_url,
+                    user_configuration,
+                    disable_progress_bar,
+                )
+            )
+            df = _filter_values(df, subset_request)
+            df = _transform_dataframe(
+                df,
+                subset_request.vertical_axis,
+                platforms_metadata,
+                product_doi,
+            )
+    if df.empty:
+        logger.info(
+            "No data found for the given parameters. "
+            "Please check your request and try again."
+        )
+    return (
+        df,
+        variables,
+        platform_ids,
+    )
+
+
+def _get_variables_and_platform_ids(
+    subset_request: SubsetRequest,
+    platforms_metadata: PlatformsMetadata,
+    service: CopernicusMarineService,
+) -> tuple[list[str], list[str]]:
     if subset_request.platform_ids:
         platform_ids = _get_plaform_ids_to_subset(
             subset_request.platform_ids or [],
-            set(platforms_metadata.keys()),
+            platforms_metadata,
             service,
         )
     else:
@@ -225,73 +567,158 @@ def _read_dataframe_sparse(
     variables = subset_request.variables or [
         variable.short_name for variable in service.variables
     ]
-    if dry_run:
-        return pd.DataFrame(), variables, platform_ids
-    progress_bar_configuration = {
-        "disable": disable_progress_bar,
-        "bar_format": "{l_bar}{bar}| [{elapsed}<{remaining}]",
-    }
-    # see https://github.com/pandas-dev/pandas/issues/55928
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore", category=FutureWarning)
-        df = subset_and_return_dataframe(
-            minimum_latitude=subset_request.minimum_y,
-            maximum_latitude=subset_request.maximum_y,
-            minimum_longitude=subset_request.minimum_x,
-            maximum_longitude=subset_request.maximum_x,
-            minimum_elevation=(
-                -subset_request.maximum_depth
-                if subset_request.maximum_depth is not None
-                else None
-            ),
-            maximum_elevation=(
-                -subset_request.minimum_depth
-                if subset_request.minimum_depth is not None
-                else None
-            ),
-            minimum_time=(
-                subset_request.start_datetime.timestamp()
-                if subset_request.start_datetime is not None
-                else None
-            ),
-            maximum_time=(
-                subset_request.end_datetime.timestamp()
-                if subset_request.end_datetime is not None
-                else None
-            ),
-            variables=variables,
-            entities=platform_ids,
-            vertical_axis=subset_request.vertical_axis,
-            url_metadata=metadata_url,
-            user_configuration=user_configuration,
-            progress_bar_configuration=progress_bar_configuration,
-            columns_rename=COLUMNS_RENAME,
-        )
+    return variables, platform_ids
 
-        df = _transform_dataframe(
-            df,
-            subset_request.vertical_axis,
-            platforms_metadata,
-            product_doi,
+
+def _get_platforms_coverage(
+    username: str,
+    subset_request: SubsetRequest,
+    original_files_url: str | None,
+    disable_progress_bar: bool,
+) -> pd.DataFrame | None:
+    """
+    The bounds of the platforms, from the index files of the original
+    files of the dataset (INSITU datasets), if the pre-filter of the
+    platforms is requested with an area or a time range. None if they
+    are not available.
+    """
+    if (
+        not subset_request.prefilter_platforms
+        or original_files_url is None
+        or all(
+            bound is None
+            for bound in [
+                subset_request.minimum_x,
+                subset_request.maximum_x,
+                subset_request.minimum_y,
+                subset_request.maximum_y,
+                subset_request.start_datetime,
+                subset_request.end_datetime,
+            ]
         )
-    if df.empty:
-        logger.info(
-            "No data found for the given parameters. "
-            "Please check your request and try again."
+    ):
+        return None
+    try:
+        index_files = get_cached_index_files(
+            username, original_files_url, disable_progress_bar
         )
-    return (
-        df,
-        variables,
-        platform_ids,
+    except (BotoCoreError, ClientError) as exception:
+        logger.debug(
+            f"Cannot read the index files of {original_files_url}: "
+            f"{exception}"
+        )
+        return None
+    return get_platforms_coverage(index_files)
+
+
+def _get_entity_ids_to_subset(
+    subset_request: SubsetRequest,
+    platform_ids: list[str],
+    platforms_metadata: PlatformsMetadata,
+    platforms_coverage: pd.DataFrame | None,
+) -> list[str] | None:
+    """
+    The entities requested to arcosparse, all of them if empty.
+
+    Without requested platforms, the platforms whose bounds in
+    ``platforms_coverage`` (by platform code) are outside the requested
+    area and time range are left out, if few platforms remain. The
+    platforms that are not in ``platforms_coverage`` are kept.
+    None if no platform remains.
+    """
+    if platform_ids:
+        return platform_ids
+    if platforms_coverage is None or not platforms_metadata.entities:
+        return []
+    overlap_mask = get_overlap_mask(
+        platforms_coverage,
+        IndexFilter(
+            minimum_longitude=subset_request.minimum_x,
+            maximum_longitude=subset_request.maximum_x,
+            minimum_latitude=subset_request.minimum_y,
+            maximum_latitude=subset_request.maximum_y,
+            start_datetime=subset_request.start_datetime,
+            end_datetime=subset_request.end_datetime,
+        ),
+    )
+    excluded_platform_codes = set(platforms_coverage.index[~overlap_mask])
+    entity_ids = [
+        entity_id
+        for entity_id in platforms_metadata.entities
+        if entity_id.split("___")[0] not in excluded_platform_codes
+    ]
+    if not entity_ids:
+        return None
+    if len(entity_ids) > PREFILTER_MAXIMUM_PLATFORMS or len(entity_ids) == len(
+        platforms_metadata.entities
+    ):
+        return []
+    logger.debug(
+        f"Requesting the {len(entity_ids)} platform(s) "
+        "overlapping the requested area and time range"
+    )
+    return entity_ids
+
+
+def _get_arcosparse_subset_arguments(
+    subset_request: SubsetRequest,
+    variables: list[str],
+    platform_ids: list[str],
+    metadata_url: str,
+    user_configuration: UserConfiguration,
+    disable_progress_bar: bool,
+) -> dict[str, Any]:
+    return dict(
+        minimum_latitude=subset_request.minimum_y,
+        maximum_latitude=subset_request.maximum_y,
+        minimum_longitude=subset_request.minimum_x,
+        maximum_longitude=subset_request.maximum_x,
+        minimum_elevation=(
+            -subset_request.maximum_depth
+            if subset_request.maximum_depth is not None
+            else None
+        ),
+        maximum_elevation=(
+            -subset_request.minimum_depth
+            if subset_request.minimum_depth is not None
+            else None
+        ),
+        minimum_time=(
+            subset_request.start_datetime.timestamp()
+            if subset_request.start_datetime is not None
+            else None
+        ),
+        maximum_time=(
+            subset_request.end_datetime.timestamp()
+            if subset_request.end_datetime is not None
+            else None
+        ),
+        variables=variables,
+        entities=platform_ids,
+        vertical_axis=subset_request.vertical_axis,
+        url_metadata=metadata_url,
+        user_configuration=user_configuration,
+        progress_bar_configuration={
+            "disable": disable_progress_bar,
+            "bar_format": "{l_bar}{bar}| [{elapsed}<{remaining}]",
+        },
+        columns_rename=COLUMNS_RENAME,
     )
 
 
 def _get_user_configuration(username: str) -> UserConfiguration:
+    # arcosparse only takes a fixed number of concurrent requests:
+    # it is the current limit of the adaptive controller, if activated
+    controller = get_adaptive_concurrency_controller(
+        SPARSE_MAX_CONCURRENT_REQUESTS
+    )
     return UserConfiguration(
         disable_ssl=COPERNICUSMARINE_DISABLE_SSL_CONTEXT == "True",
         trust_env=TRUST_ENV,
         ssl_certificate_path=COPERNICUSMARINE_SET_SSL_CERTIFICATE_PATH,
-        max_concurrent_requests=20,
+        max_concurrent_requests=(
+            controller.limit if controller else SPARSE_MAX_CONCURRENT_REQUESTS
+        ),
         extra_params=construct_query_params_for_marine_data_store_monitoring(
             username
         ),
@@ -300,26 +727,18 @@ def _get_user_configuration(username: str) -> UserConfiguration:
 
 def _get_plaform_ids_to_subset(
     platform_ids: list[str],
-    platforms_metadata_names: set[str],
+    platforms_metadata: PlatformsMetadata,
     retrieval_service: CopernicusMarineService,
 ) -> list[str]:
     platforms_to_subset = []
-    if not platforms_metadata_names:
+    if not platforms_metadata.entities:
         raise NotEnoughPlatformMetadata()
-    platforms_names_with_types: set[str] = set()
-    platforms_without_types_mapping: dict[str, list] = defaultdict(list)
-    for platform_name in platforms_metadata_names:
-        platform_name_without_type = platform_name.split("___")[0]
-        platforms_without_types_mapping[platform_name_without_type].append(
-            platform_name
-        )
-        platforms_names_with_types.add(platform_name)
     for platform_id in platform_ids:
-        if platform_id in platforms_names_with_types:
+        if platform_id in platforms_metadata.entities:
             platforms_to_subset.append(platform_id)
-        if platform_id in platforms_without_types_mapping:
+        if platform_id in platforms_metadata.entity_ids_by_platform_id:
             platforms_to_subset.extend(
-                platforms_without_types_mapping[platform_id]
+                platforms_metadata.entity_ids_by_platform_id[platform_id]
             )
     if not platforms_to_subset:
         raise WrongPlatformID(
@@ -386,6 +805,45 @@ def _get_response_subset(
     )
 
 
+def _filter_values(
+    df: pd.DataFrame, subset_request: SubsetRequest
+) -> pd.DataFrame:
+    """
+    Keep the rows with the requested QC flags and within the requested
+    value ranges of their variable, before any other transformation so
+    that the dropped rows cost nothing more.
+    """
+    qc_flags = subset_request.qc_flags or {}
+    value_ranges = subset_request.value_ranges or {}
+    if df.empty or not (qc_flags or value_ranges):
+        return df
+    variable_codes, variables = pd.factorize(df["variable"])
+    value_qc = df["value_qc"].to_numpy()
+    values = df["value"].to_numpy()
+    keep = np.ones(len(df), dtype=bool)
+    for code, variable in enumerate(variables):
+        flags = qc_flags.get(variable, qc_flags.get(ALL_VARIABLES))
+        minimum, maximum = value_ranges.get(variable, (None, None))
+        if flags is None and minimum is None and maximum is None:
+            continue
+        rows = np.flatnonzero(variable_codes == code)
+        keep_rows = np.ones(len(rows), dtype=bool)
+        if flags is not None:
+            keep_rows &= np.isin(value_qc[rows], flags)
+        if minimum is not None:
+            keep_rows &= values[rows] >= minimum
+        if maximum is not None:
+            keep_rows &= values[rows] <= maximum
+        keep[rows] = keep_rows
+    if keep.all():
+        return df
+    logger.debug(
+        f"Dropped {len(df) - int(keep.sum())} of {len(df)} values "
+        "by QC flag and value range"
+    )
+    return df.take(np.flatnonzero(keep)).reset_index(drop=True)
+
+
 def _transform_dataframe(
     df: pd.DataFrame,
     vertical_axis: VerticalAxis,
@@ -395,43 +853,72 @@ def _transform_dataframe(
     """
     Transform the dataframe to match the expected format to be consistent with MyOceanPro
     and Copernicus Marine Services.
+
+    There are few platforms for many rows: the values derived from the
+    platforms are computed once per platform then spread to the rows.
+    The columns with few distinct values are categoricals and the flags
+    are small integers to keep the dataframe compact.
     """  # noqa
     if df.empty:
         return df
+    platform_codes, platform_ids = pd.factorize(
+        df["platform_id"], use_na_sentinel=False
+    )
+    platforms = [
+        platforms_metadata.get(platform_id) for platform_id in platform_ids
+    ]
     # Needs to be done before striping the type to the platform_id
-    df["institution"] = df["platform_id"].apply(
-        lambda x: (
-            platforms_metadata[x].institution
-            if x in platforms_metadata
-            else None
-        )
+    df["institution"] = _spread_to_rows(
+        [platform.institution if platform else None for platform in platforms],
+        platform_codes,
     )
-    df["doi"] = df["platform_id"].apply(
-        lambda x: (
-            platforms_metadata[x].doi if x in platforms_metadata else None
-        )
+    df["doi"] = _spread_to_rows(
+        [platform.doi if platform else None for platform in platforms],
+        platform_codes,
     )
 
-    df["product_doi"] = (
-        f"https://doi.org/{product_doi}"
-        if product_doi and "https://" not in product_doi
-        else product_doi
+    df["product_doi"] = _spread_to_rows(
+        [
+            (
+                f"https://doi.org/{product_doi}"
+                if product_doi and "https://" not in product_doi
+                else product_doi
+            )
+        ],
+        np.zeros(len(df), dtype=np.intp),
     )
 
     # From "platform___type" to "platform" since the type is in
     # column platform_type
-    df["platform_id"] = df["platform_id"].str.split("___").str[0]
-
-    df["time"] = df["time"].apply(
-        lambda x: datetime_to_isoformat(timestamp_parser(x, unit="s"))
+    platform_ids_without_type = np.array(
+        [
+            (
+                platform_id.split("___")[0]
+                if isinstance(platform_id, str)
+                else platform_id
+            )
+            for platform_id in platform_ids
+        ],
+        dtype=object,
     )
+    df["platform_id"] = _spread_to_rows(
+        platform_ids_without_type, platform_codes
+    )
+    df["platform_type"] = df["platform_type"].astype("category")
+    df["variable"] = df["variable"].astype("category")
+    df["value_qc"] = pd.to_numeric(df["value_qc"], downcast="integer")
+
+    # Kept as datetimes, formatted to ISO strings only when written to CSV
+    # or returned by read_dataframe
+    time_in_seconds = df["time"].to_numpy(dtype=np.float64)
+    df["time"] = _epoch_seconds_to_datetimes(time_in_seconds)
 
     # Some depth values comes from the arcoification of the data
     # and are calculated from the pressure some others come
     # directly from the producer (ie native/original data)
-    df["is_depth_from_producer"] = df["is_approx_elevation"].apply(
-        lambda x: 0 if x else 1
-    )
+    df["is_depth_from_producer"] = np.where(
+        df["is_approx_elevation"].astype(bool).to_numpy(), 0, 1
+    ).astype(np.int8)
     df.drop(columns=["is_approx_elevation"], inplace=True)
 
     if vertical_axis == "elevation":
@@ -439,16 +926,189 @@ def _transform_dataframe(
     else:
         df = df[COLUMNS_ORDER_DEPTH]
 
-    df.sort_values(
-        by=list(SORTING.keys()),
-        ascending=list(SORTING.values()),
-        inplace=True,
-    )
+    return _sort_dataframe(df)
+
+
+def _sort_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    # Sorting the integer codes of the columns is much faster than
+    # sorting the strings, and the times are sorted as numbers
+    sorting_keys = []
+    for column in SORTING:
+        if column == "time":
+            sorting_keys.append(df["time"].to_numpy(dtype="datetime64[us]"))
+        else:
+            sorting_keys.append(_get_sorted_codes(df[column]))
+    # np.lexsort sorts by the last key first
+    df = df.take(np.lexsort(sorting_keys[::-1]))
 
     df.reset_index(drop=True, inplace=True)
     return df
 
 
+def _spread_to_rows(
+    values: Sequence[str | None] | np.ndarray, codes: np.ndarray
+) -> pd.Categorical:
+    """
+    Categorical of ``values[codes]``, with sorted categories, without
+    building the strings of every row.
+    """
+    value_codes, categories = pd.factorize(
+        np.asarray(values, dtype=object), sort=True
+    )
+    return pd.Categorical.from_codes(value_codes[codes], categories)
+
+
+def _get_sorted_codes(values: pd.Series) -> np.ndarray:
+    """
+    Integer codes ordered like the values, the missing values last.
+
+    Only the categories are sorted for the categorical columns.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories_ranks = _get_sorted_codes(pd.Series(values.cat.categories))
+        # The missing values (code -1) take the last rank
+        return np.append(categories_ranks, len(categories_ranks))[
+            values.cat.codes.to_numpy()
+        ]
+    codes, uniques = pd.factorize(values, sort=True)
+    codes[codes == -1] = len(uniques)
+    return codes
+
+
+def _epoch_seconds_to_datetimes(seconds: np.ndarray) -> pd.DatetimeIndex:
+    """
+    UTC datetimes rounded to the microsecond, like ``timestamp_parser``.
+    """
+    return pd.to_datetime(
+        np.round(seconds * 1_000_000).astype(np.int64), unit="us", utc=True
+    )
+
+
+def _datetimes_to_epoch_seconds(datetimes: pd.Series) -> np.ndarray:
+    return (
+        datetimes.to_numpy(dtype="datetime64[us]").astype(np.int64) / 1_000_000
+    )
+
+
+def _datetimes_to_isoformat(datetimes: pd.Series) -> np.ndarray:
+    """
+    Vectorized ``datetime_to_isoformat``: ``2023-11-25T00:00:00Z``,
+    with the microseconds only if any.
+    """
+    microseconds = datetimes.to_numpy(dtype="datetime64[us]")
+    has_fraction = microseconds != microseconds.astype("datetime64[s]")
+    if has_fraction.any():
+        isoformat = np.where(
+            has_fraction,
+            np.datetime_as_string(microseconds, unit="us"),
+            np.datetime_as_string(microseconds, unit="s"),
+        )
+    else:
+        isoformat = np.datetime_as_string(microseconds, unit="s")
+    return np.char.add(isoformat, "Z").astype(object)
+
+
+@dataclass
+class _PlatformNetCDFWriter:
+    """
+    What is shared by the NetCDF files of the platforms, sent once to
+    each process.
+    """
+
+    metadata_cols: list[str]
+    vertical_axis: VerticalAxis
+    platforms_metadata: dict[str, Entity]
+    subset_request: SubsetRequest
+    product_id: str | None
+    service: CopernicusMarineService
+    netcdf_compression_level: int
+    netcdf3_compatible: bool
+
+    def write(
+        self,
+        platform_id: str,
+        platform_df: pd.DataFrame,
+        output_file: pathlib.Path,
+    ) -> None:
+        ds = _platform_dataframe_to_dataset(
+            platform_df,
+            metadata_cols=self.metadata_cols,
+            vertical_axis=self.vertical_axis,
+            arco_sparse_type=self.service.arco_sparse_type,
+        )
+
+        ds = _add_attributes_to_dataset(
+            ds=ds,
+            platform_df=platform_df,
+            vertical_axis=self.vertical_axis,
+            platform_id=platform_id,
+            metadata_cols=self.metadata_cols,
+            platforms_metadata=self.platforms_metadata,
+            subset_request=self.subset_request,
+            product_id=self.product_id,
+            service=self.service,
+        )
+
+        encoding = _build_netcdf_encoding(ds, self.netcdf_compression_level)
+        netcdf_format = "NETCDF3_CLASSIC" if self.netcdf3_compatible else None
+        engine = "h5netcdf" if not self.netcdf3_compatible else "netcdf4"
+
+        with TemporaryPathSaver(output_file) as tmp_file:
+            ds.to_netcdf(
+                tmp_file,
+                encoding=encoding,
+                format=netcdf_format,
+                engine=engine,
+            )
+
+
+# Set in each process by the initializer of the pool
+_process_netcdf_writer: _PlatformNetCDFWriter | None = None
+
+
+def _set_process_netcdf_writer(writer: _PlatformNetCDFWriter) -> None:
+    global _process_netcdf_writer
+    _process_netcdf_writer = writer
+
+
+def _write_platform_netcdf_in_process(
+    platform_id: str,
+    platform_df: pd.DataFrame,
+    output_file: pathlib.Path,
+) -> None:
+    assert _process_netcdf_writer is not None
+    _process_netcdf_writer.write(platform_id, platform_df, output_file)
+
+
+def _get_number_of_netcdf_processes(number_of_platforms: int) -> int:
+    """
+    A single process unless ``COPERNICUSMARINE_SPARSE_NETCDF_PROCESSES``
+    is set. Never nested in a process of a pool (e.g. split_on).
+    """
+    if multiprocessing.current_process().daemon:
+        return 1
+    number_of_processes = 1
+    if COPERNICUSMARINE_SPARSE_NETCDF_PROCESSES:
+        try:
+            number_of_processes = int(COPERNICUSMARINE_SPARSE_NETCDF_PROCESSES)
+        except ValueError:
+            number_of_processes = 0
+        if number_of_processes < 1:
+            logger.warning(
+                "Ignoring COPERNICUSMARINE_SPARSE_NETCDF_PROCESSES="
+                f"{COPERNICUSMARINE_SPARSE_NETCDF_PROCESSES}: "
+                "expected a positive integer."
+            )
+            number_of_processes = 1
+    return max(
+        1,
+        min(
+            number_of_processes,
+            number_of_platforms // NETCDF_MINIMUM_PLATFORMS_PER_PROCESS,
+        ),
+    )
+
+
 def _dataframe_to_netcdf_per_platform(
     df: pd.DataFrame,
     vertical_axis: VerticalAxis,
@@ -460,57 +1120,115 @@ def _dataframe_to_netcdf_per_platform(
     netcdf_compression_level: int = 0,
     netcdf3_compatible: bool = False,
 ) -> list[str]:
-    metadata_cols = [
-        "platform_id",
-        "platform_type",
-        "institution",
-        "doi",
-        "product_doi",
-    ]
+    platform_groups = df.groupby("platform_id", observed=True)
+    return _platforms_to_netcdf(
+        (
+            (str(platform_id), platform_df)
+            for platform_id, platform_df in platform_groups
+        ),
+        platform_groups.ngroups,
+        _get_platform_netcdf_writer(
+            vertical_axis=vertical_axis,
+            platforms_metadata=platforms_metadata,
+            subset_request=subset_request,
+            product_id=product_id,
+            service=service,
+            netcdf_compression_level=netcdf_compression_level,
+            netcdf3_compatible=netcdf3_compatible,
+        ),
+        output_path,
+    )
 
-    produced_paths: list[str] = []
-    with TemporaryPathSaver(output_path, is_directory=True) as tmp_output_path:
-        for platform_id, platform_df in df.groupby("platform_id"):
-            platform_filename = f"{platform_id}.nc"
-            output_path_with_plaform_id = tmp_output_path / platform_filename
-
-            ds = _platform_dataframe_to_dataset(
-                platform_df,
-                metadata_cols=metadata_cols,
-                vertical_axis=vertical_axis,
-                arco_sparse_type=service.arco_sparse_type,
-            )
 
-            ds = _add_attributes_to_dataset(
-                ds=ds,
-                platform_df=platform_df,
-                vertical_axis=vertical_axis,
-                platform_id=str(platform_id),
-                metadata_cols=metadata_cols,
-                platforms_metadata=platforms_metadata,
-                subset_request=subset_request,
-                product_id=product_id,
-                service=service,
-            )
+def _get_platform_netcdf_writer(
+    vertical_axis: VerticalAxis,
+    platforms_metadata: dict[str, Entity],
+    subset_request: SubsetRequest,
+    product_id: str | None,
+    service: CopernicusMarineService,
+    netcdf_compression_level: int,
+    netcdf3_compatible: bool,
+) -> _PlatformNetCDFWriter:
+    return _PlatformNetCDFWriter(
+        metadata_cols=[
+            "platform_id",
+            "platform_type",
+            "institution",
+            "doi",
+            "product_doi",
+        ],
+        vertical_axis=vertical_axis,
+        platforms_metadata=platforms_metadata,
+        subset_request=subset_request,
+        product_id=product_id,
+        service=service,
+        netcdf_compression_level=netcdf_compression_level,
+        netcdf3_compatible=netcdf3_compatible,
+    )
 
-            encoding = _build_netcdf_encoding(ds, netcdf_compression_level)
-            netcdf_format = "NETCDF3_CLASSIC" if netcdf3_compatible else None
-            engine = "h5netcdf" if not netcdf3_compatible else "netcdf4"
 
-            with TemporaryPathSaver(output_path_with_plaform_id) as tmp_file:
-                ds.to_netcdf(
-                    tmp_file,
-                    encoding=encoding,
-                    format=netcdf_format,
-                    engine=engine,
-                )
+def _platforms_to_netcdf(
+    platforms: Iterable[tuple[str, pd.DataFrame]],
+    number_of_platforms: int,
+    writer: _PlatformNetCDFWriter,
+    output_path: pathlib.Path,
+) -> list[str]:
+    """
+    The platforms are written in parallel by a pool of processes. Only a
+    few platforms are sent ahead of the written ones to bound the memory,
+    and the files are listed in the order of the platforms.
+    """
+    number_of_processes = _get_number_of_netcdf_processes(number_of_platforms)
 
-            produced_paths.append(platform_filename)
+    produced_paths: list[str] = []
+    with TemporaryPathSaver(output_path, is_directory=True) as tmp_output_path:
+
+        def platform_written(platform_id: str) -> None:
+            produced_paths.append(f"{platform_id}.nc")
             logger.debug(
                 f"Written NetCDF file for platform '{platform_id}': "
                 f"{output_path}"
             )
 
+        if number_of_processes <= 1:
+            for platform_id, platform_df in platforms:
+                writer.write(
+                    platform_id,
+                    platform_df,
+                    tmp_output_path / f"{platform_id}.nc",
+                )
+                platform_written(platform_id)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=number_of_processes,
+                mp_context=multiprocessing.get_context(
+                    NETCDF_PROCESSES_START_METHOD
+                ),
+                initializer=_set_process_netcdf_writer,
+                initargs=(writer,),
+            ) as executor:
+                pending: deque[tuple[str, concurrent.futures.Future]] = deque()
+                try:
+                    for platform_id, platform_df in platforms:
+                        future = executor.submit(
+                            _write_platform_netcdf_in_process,
+                            platform_id,
+                            platform_df,
+                            tmp_output_path / f"{platform_id}.nc",
+                        )
+                        pending.append((platform_id, future))
+                        if len(pending) >= 2 * number_of_processes:
+                            platform_id, future = pending.popleft()
+                            future.result()
+                            platform_written(platform_id)
+                    while pending:
+                        platform_id, future = pending.popleft()
+                        future.result()
+                        platform_written(platform_id)
+                except BaseException:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+
         logger.info(
             f"Produced {len(produced_paths)} NetCDF file(s) "
             f"in {output_path}"
@@ -529,6 +1247,11 @@ def _platform_dataframe_to_dataset(
     observations are ranked by depth. The maximum number of depth
     points across all time steps determines the size of the
     ``depth_level`` dimension.
+
+    The observations are sorted once, then the first non-missing value
+    of each (time, depth, variable) cell is kept, like
+    ``pivot_table(aggfunc="first")`` but without its generic groupby,
+    and the values are scattered into the (time, depth_level) arrays.
     """
     index_cols = ["time", vertical_axis]
     variable_cols = ["variable", "value", "value_qc"]
@@ -547,29 +1270,29 @@ def _platform_dataframe_to_dataset(
         values_columns = ["value"]
 
     obs_df = obs_df.sort_values(pivot_columns)
-    pivot = obs_df.pivot_table(
-        index=pivot_columns,
-        columns="variable",
-        values=values_columns,  # type: ignore[list-item]
-        aggfunc="first",
-    )
-    pivot.columns = [
-        f"{var}_QC" if metric == "value_qc" else var
-        for metric, var in pivot.columns
-    ]
-
-    spatial_and_aux = obs_df.groupby(pivot_columns)[aux_cols].first()
-
-    merged = pd.concat([pivot, spatial_and_aux], axis=1)
-    merged = merged.reset_index()
-    merged["time"] = merged["time"].apply(
-        lambda x: datetime_to_timestamp(datetime_parser(x), unit="s")
+    # Like the groupby, the rows without time or depth are ignored
+    obs_df = obs_df.dropna(subset=pivot_columns)
+    merged, has_values = _pivot_first_values(
+        obs_df, pivot_columns, values_columns, aux_cols
     )
     if arco_sparse_type != "cmemsAltimetry":
-        merged["depth_level"] = merged.groupby("time").cumcount()
-        merged = merged.set_index(["time", "depth_level"])
+        time_starts = _get_group_starts(merged, ["time"])
+        time_ids = np.cumsum(time_starts) - 1
+        times = _datetimes_to_epoch_seconds(merged["time"][time_starts])
+        dimensions: tuple[str, ...] = ("time", "depth_level")
+        # As with pivot_table, the levels without any value come after
+        # the other ones of their time step
+        order = np.lexsort((~has_values, time_ids))
+        depth_levels = np.empty(len(merged), dtype=np.int64)
+        depth_levels[order] = _rank_in_groups(
+            np.diff(time_ids[order], prepend=-1) != 0
+        )
+        positions: tuple[np.ndarray, ...] = (time_ids, depth_levels)
     else:
-        merged = merged.set_index(["time"])
+        times = _datetimes_to_epoch_seconds(merged["time"])
+        dimensions = ("time",)
+        positions = (np.arange(len(merged)),)
+    merged = merged.drop(columns=["time"])
 
     if vertical_col in non_nans_cols:
         merged.loc[
@@ -584,7 +1307,7 @@ def _platform_dataframe_to_dataset(
                 coln for coln in non_nans_cols if coln != vertical_col
             ]
 
-    ds = merged.to_xarray()
+    ds = _scatter_to_dataset(merged, times, dimensions, positions)
     if "pressure" in non_nans_cols:
         ds = ds.set_coords("pressure")
     if "latitude" in non_nans_cols:
@@ -594,17 +1317,148 @@ def _platform_dataframe_to_dataset(
     if vertical_col in non_nans_cols:
         ds = ds.set_coords(vertical_col)
 
-    ds = ds.set_coords("time")
-    if (
-        "depth_level" in ds.data_vars
-        or "depth_level" in ds.coords
-        or "depth_level" in ds.indexes
-    ):
-        ds = ds.drop_vars("depth_level")
     ds.time.attrs["units"] = "seconds since 1970-01-01T00:00:00Z"
     return ds
 
 
+def _scatter_to_dataset(
+    df: pd.DataFrame,
+    times: np.ndarray,
+    dimensions: tuple[str, ...],
+    positions: tuple[np.ndarray, ...],
+) -> xr.Dataset:
+    """
+    Put each row of the dataframe at its ``positions`` in the arrays of
+    the variables, like ``to_xarray`` with a (time, depth_level) index:
+    the cells without any row are missing, so the integer columns
+    become floats unless the arrays are complete.
+    """
+    shape = tuple(
+        int(position.max()) + 1 if len(position) else 0
+        for position in positions
+    )
+    is_complete = int(np.prod(shape)) == len(df)
+    data_vars = {}
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if is_complete:
+            array = np.empty(shape, dtype=values.dtype)
+        else:
+            array = np.full(
+                shape, np.nan, dtype=_dtype_with_missing_values(values.dtype)
+            )
+        array[positions] = values
+        data_vars[column] = (dimensions, array)
+    return xr.Dataset(data_vars, coords={"time": times})
+
+
+def _dtype_with_missing_values(dtype: np.dtype) -> np.dtype:
+    """
+    Same promotion as xarray: the small integers fit in float32.
+    """
+    if dtype.kind in "biu":
+        return np.dtype(np.float32 if dtype.itemsize <= 2 else np.float64)
+    return dtype
+
+
+def _pivot_first_values(
+    sorted_df: pd.DataFrame,
+    pivot_columns: list[str],
+    values_columns: list[str],
+    aux_cols: list[str],
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    One row per distinct ``pivot_columns`` of the sorted dataframe, with
+    the first non-missing ``values_columns`` of each variable (the value
+    column is named after the variable, the value_qc column has the
+    ``_QC`` suffix) and the first non-missing ``aux_cols``, and whether
+    each row has any value.
+
+    The variables are in alphabetical order, the values before the QC
+    flags, and the columns without any value are left out. As with
+    ``pivot_table``, the integer columns stay integers only if no cell
+    is missing.
+    """
+    group_starts = _get_group_starts(sorted_df, pivot_columns)
+    group_ids = np.cumsum(group_starts) - 1
+    number_of_groups = int(group_starts.sum())
+    variable_codes, variables = pd.factorize(sorted_df["variable"], sort=True)
+    number_of_variables = len(variables)
+    has_variable = variable_codes >= 0
+    cells = (group_ids * number_of_variables + variable_codes)[has_variable]
+
+    columns: dict[str, np.ndarray] = {
+        column: sorted_df[column].to_numpy()[group_starts]
+        for column in pivot_columns
+    }
+    has_values = np.zeros(number_of_groups, dtype=bool)
+    for values_column in values_columns:
+        grid = (
+            _first_values(
+                sorted_df[values_column][has_variable],
+                cells,
+                number_of_groups * number_of_variables,
+            )
+            .to_numpy()
+            .reshape(number_of_groups, number_of_variables)
+        )
+        for variable_index, variable in enumerate(variables):
+            values = grid[:, variable_index]
+            is_missing = pd.isna(values)
+            if is_missing.all():
+                continue
+            has_values |= ~is_missing
+            name = (
+                f"{variable}_QC" if values_column == "value_qc" else variable
+            )
+            columns[name] = values
+    for aux_col in aux_cols:
+        columns[aux_col] = _first_values(
+            sorted_df[aux_col], group_ids, number_of_groups
+        ).to_numpy()
+    return pd.DataFrame(columns), has_values
+
+
+def _get_group_starts(
+    sorted_df: pd.DataFrame, key_columns: list[str]
+) -> np.ndarray:
+    """
+    Whether each row starts a new group of equal keys.
+    """
+    group_starts = np.zeros(len(sorted_df), dtype=bool)
+    group_starts[:1] = True
+    for column in key_columns:
+        keys = sorted_df[column].to_numpy()
+        group_starts[1:] |= keys[1:] != keys[:-1]
+    return group_starts
+
+
+def _rank_in_groups(group_starts: np.ndarray) -> np.ndarray:
+    """
+    Position of each row in its group, like ``groupby().cumcount()``.
+    """
+    positions = np.arange(len(group_starts))
+    return positions - np.maximum.accumulate(
+        np.where(group_starts, positions, 0)
+    )
+
+
+def _first_values(
+    values: pd.Series, group_ids: np.ndarray, number_of_groups: int
+) -> pd.Series:
+    """
+    First non-missing value of each group, missing for the groups
+    without any.
+    """
+    not_missing = values.notna().to_numpy()
+    groups, first_positions = np.unique(
+        group_ids[not_missing], return_index=True
+    )
+    return pd.Series(
+        values.to_numpy()[not_missing][first_positions], index=groups
+    ).reindex(range(number_of_groups))
+
+
 def _build_netcdf_encoding(
     ds: xr.Dataset,
     compression_level: int,
@@ -674,11 +1528,12 @@ def _add_attributes_to_dataset(
                 "institution_edmo_code"
             ] = platform_metadata.institution_edmo_code
 
+    last_time = platform_df["time"].max()
     ds.attrs["time_coverage_start"] = datetime_to_isoformat(
-        datetime_parser(str(platform_df["time"].min()))
+        platform_df["time"].min().to_pydatetime()
     )
     ds.attrs["time_coverage_end"] = datetime_to_isoformat(
-        datetime_parser(str(platform_df["time"].max()))
+        last_time.to_pydatetime()
     )
     ds.attrs["last_date_observation"] = ds.attrs["time_coverage_end"]
     if "latitude" in platform_df.columns:
@@ -687,7 +1542,7 @@ def _add_attributes_to_dataset(
         ds.attrs["last_latitude_observation"] = unpack(
             ds.sel(
                 time=datetime_to_timestamp(
-                    datetime_parser(ds.attrs["last_date_observation"])
+                    last_time.to_pydatetime(), unit="s"
                 ),
                 method="nearest",
             )["latitude"].values
@@ -698,7 +1553,7 @@ def _add_attributes_to_dataset(
         ds.attrs["last_longitude_observation"] = unpack(
             ds.sel(
                 time=datetime_to_timestamp(
-                    datetime_parser(ds.attrs["last_date_observation"])
+                    last_time.to_pydatetime(), unit="s"
                 ),
                 method="nearest",
             )["longitude"].values
@@ -0,0 +1,141 @@
+import re
+from collections import defaultdict
+
+# Escaped character, character set, group delimiter or alternation
+_REGEX_TOKEN = re.compile(r"\\.|\[\^?\]?(?:\\.|[^\]])*\]|[()|]", re.DOTALL)
+_ESCAPED_CHARACTER = re.compile(r"\\(.)", re.DOTALL)
+_BACK_REFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+# The flags of the whole regex, e.g. (?i), that the literals would lose
+_GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+class FileMatcher:
+    """
+    Same result as ``re.search(regex, filename)``, but fast when the regex
+    is the alternation of a long file list and a few patterns, as built
+    by the get request from the filter, the regex and the file list.
+
+    The escaped strings of the alternation (the lines of the file list)
+    are looked up in hash sets and only the remaining patterns
+    are searched with regular expressions.
+    """
+
+    def __init__(self, regex: str | None) -> None:
+        self._match_all = not regex
+        self._literals_with_slash: dict[
+            tuple[int, int], set[str]
+        ] = defaultdict(set)
+        self._literals_without_slash: dict[int, set[str]] = defaultdict(set)
+        self._patterns: list[re.Pattern] = []
+        if not regex:
+            return
+        literals, patterns = split_literals_and_patterns(regex)
+        for literal in literals:
+            self._add_literal(literal)
+        self._patterns = [re.compile(pattern) for pattern in patterns]
+
+    def _add_literal(self, literal: str) -> None:
+        if not literal:
+            self._match_all = True
+            return
+        last_slash = literal.rfind("/")
+        if last_slash == -1:
+            self._literals_without_slash[len(literal)].add(literal)
+        else:
+            self._literals_with_slash[
+                (last_slash, len(literal) - last_slash - 1)
+            ].add(literal)
+
+    def search(self, filename: str) -> bool:
+        return (
+            self._match_all
+            or self._search_literals(filename)
+            or any(pattern.search(filename) for pattern in self._patterns)
+        )
+
+    def _search_literals(self, filename: str) -> bool:
+        # A literal containing a slash can only be found with its last
+        # slash on one of the slashes of the filename
+        if self._literals_with_slash:
+            slash = filename.find("/")
+            while slash != -1:
+                for (
+                    length_before_slash,
+                    length_after_slash,
+                ), literals in self._literals_with_slash.items():
+                    start = slash - length_before_slash
+                    if (
+                        start >= 0
+                        and filename[start : slash + length_after_slash + 1]
+                        in literals
+                    ):
+                        return True
+                slash = filename.find("/", slash + 1)
+        for length, literals in self._literals_without_slash.items():
+            for start in range(len(filename) - length + 1):
+                if filename[start : start + length] in literals:
+                    return True
+        return False
+
+
+def split_literals_and_patterns(regex: str) -> tuple[list[str], list[str]]:
+    """
+    Split the top-level alternation of the regex (also inside
+    the groups added by ``overload_regex_with_additional_filter``)
+    into the escaped strings, unescaped, and the other patterns.
+    """
+    if _BACK_REFERENCE.search(regex) or _GLOBAL_FLAGS.match(regex):
+        return [], [regex]
+    literals: list[str] = []
+    patterns: list[str] = []
+    alternatives = _split_alternatives(regex)
+    while alternatives:
+        alternative = alternatives.pop()
+        inner_regex = _remove_enclosing_group(alternative)
+        if inner_regex is not None:
+            alternatives.extend(_split_alternatives(inner_regex))
+            continue
+        literal = _ESCAPED_CHARACTER.sub(r"\1", alternative)
+        if re.escape(literal) == alternative:
+            literals.append(literal)
+        else:
+            patterns.append(alternative)
+    return literals, patterns
+
+
+def _split_alternatives(regex: str) -> list[str]:
+    alternatives = []
+    depth = 0
+    start = 0
+    for token in _REGEX_TOKEN.finditer(regex):
+        value = token.group()
+        if value == "(":
+            depth += 1
+        elif value == ")":
+            depth -= 1
+        elif value == "|" and depth == 0:
+            alternatives.append(regex[start : token.start()])
+            start = token.end()
+    alternatives.append(regex[start:])
+    return alternatives
+
+
+def _remove_enclosing_group(regex: str) -> str | None:
+    """
+    Return the content of the capturing group enclosing the whole regex,
+    if any, e.g. ``(a|b)`` but not ``(a)|(b)`` nor ``(?s:a)``.
+    """
+    if not regex.startswith("(") or regex.startswith("(?"):
+        return None
+    depth = 0
+    for token in _REGEX_TOKEN.finditer(regex):
+        value = token.group()
+        if value == "(":
+            depth += 1
+        elif value == ")":
+            depth -= 1
+            if depth == 0:
+                if token.end() == len(regex):
+                    return regex[1:-1]
+                return None
+    return None
@@ -0,0 +1,312 @@
+import logging
+import os
+import pathlib
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from copernicusmarine.core_functions.credentials_utils import (
+    DEFAULT_CLIENT_BASE_DIRECTORY,
+)
+from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
+from copernicusmarine.download_functions.file_matcher import FileMatcher
+
+logger = logging.getLogger("copernicusmarine")
+
+INDEX_FILES_CACHE_DIRECTORY = (
+    DEFAULT_CLIENT_BASE_DIRECTORY / "cache" / "index_files"
+)
+INDEX_FILE_REGEX = r"/index_[^/]*\.txt$"
+# Region, then LATEST or a month for some files, data type, platform
+# type, platform code (that may contain "_") and an optional date
+_PLATFORM_FILE_NAME_REGEX = (
+    r"(?:^|/)[A-Za-z]+_(?:LATEST_|\d{6}_)?[A-Za-z]+_[A-Za-z]+_"
+    r"(?P<platform_code>[^/]+?)(?:_\d{6}|_\d{8})?\.nc$"
+)
+INDEX_FILE_COLUMNS = [
+    "file_name",
+    "geospatial_lat_min",
+    "geospatial_lat_max",
+    "geospatial_lon_min",
+    "geospatial_lon_max",
+    "time_coverage_start",
+    "time_coverage_end",
+]
+
+
+@dataclass
+class IndexFilter:
+    minimum_longitude: float | None = None
+    maximum_longitude: float | None = None
+    minimum_latitude: float | None = None
+    maximum_latitude: float | None = None
+    start_datetime: datetime | None = None
+    end_datetime: datetime | None = None
+    platform_ids: list[str] | None = None
+
+
+def get_cached_index_file(
+    session: ConfiguredBoto3Session,
+    bucket: str,
+    filename: str,
+    size: int,
+    etag: str,
+) -> pathlib.Path:
+    """
+    Local copy of the index file, downloaded again only if its ETag changed.
+    """
+    object_key = filename.replace(f"s3://{bucket}/", "")
+    cached_file = INDEX_FILES_CACHE_DIRECTORY / bucket / object_key
+    etag_file = cached_file.with_name(cached_file.name + ".etag")
+    if (
+        cached_file.exists()
+        and etag_file.exists()
+        and etag_file.read_text() == etag
+    ):
+        logger.debug(f"Using the cached index file {cached_file}")
+        return cached_file
+    logger.info(f"Downloading the index file {filename}")
+    cached_file.parent.mkdir(parents=True, exist_ok=True)
+    temporary_file = cached_file.with_name(cached_file.name + ".tmp")
+    session.download_file(
+        bucket, object_key, str(temporary_file), size=size, etag=etag
+    )
+    os.replace(temporary_file, cached_file)
+    etag_file.write_text(etag)
+    return cached_file
+
+
+def read_index_file(index_file: pathlib.Path) -> pd.DataFrame | None:
+    """
+    Read the columns needed to select the files of an index file.
+
+    Returns None for the index files that do not list files,
+    such as ``index_platform.txt``.
+    """
+    index = pd.read_csv(
+        index_file,
+        comment="#",
+        usecols=lambda column: column in INDEX_FILE_COLUMNS,
+        dtype={
+            "file_name": str,
+            "geospatial_lat_min": np.float64,
+            "geospatial_lat_max": np.float64,
+            "geospatial_lon_min": np.float64,
+            "geospatial_lon_max": np.float64,
+        },
+    )
+    if list(index.columns) != INDEX_FILE_COLUMNS:
+        logger.debug(f"{index_file.name} does not list files, skipping it.")
+        return None
+    for column in ("time_coverage_start", "time_coverage_end"):
+        index[column] = pd.to_datetime(
+            index[column], utc=True, format="ISO8601", errors="coerce"
+        )
+    return index
+
+
+def get_platforms_coverage(
+    index_files: list[pathlib.Path],
+) -> pd.DataFrame | None:
+    """
+    The bounds of the platforms, by platform code: the union of the
+    bounds of their files in the index files. A file without bounds, or
+    whose box crosses the antimeridian, leaves these bounds of its
+    platform unknown, so that they never exclude it.
+
+    Returns None if no index file lists files.
+    """
+    indexes = [
+        index
+        for index in map(read_index_file, index_files)
+        if index is not None
+    ]
+    if not indexes:
+        return None
+    index = pd.concat(indexes, ignore_index=True)
+    platform_codes = index.pop("file_name").str.extract(
+        _PLATFORM_FILE_NAME_REGEX, expand=False
+    )
+    index.loc[
+        index["geospatial_lon_min"] > index["geospatial_lon_max"],
+        ["geospatial_lon_min", "geospatial_lon_max"],
+    ] = np.nan
+    platforms = index.groupby(platform_codes)
+    coverage = platforms.agg(
+        {
+            "geospatial_lat_min": "min",
+            "geospatial_lat_max": "max",
+            "geospatial_lon_min": "min",
+            "geospatial_lon_max": "max",
+            "time_coverage_start": "min",
+            "time_coverage_end": "max",
+        }
+    )
+    return coverage.mask(index.isna().groupby(platform_codes).any())
+
+
+def select_files_from_index(
+    index: pd.DataFrame,
+    index_filter: IndexFilter,
+) -> pd.Series:
+    """
+    Names of the files of the index that overlap the requested area,
+    time range and platforms. Unknown values never exclude a file.
+    """
+    mask = get_overlap_mask(index, index_filter)
+    if index_filter.platform_ids:
+        mask &= _get_platform_mask(index["file_name"], index_filter)
+    return index["file_name"][mask]
+
+
+def get_overlap_mask(
+    index: pd.DataFrame,
+    index_filter: IndexFilter,
+) -> np.ndarray:
+    """
+    Rows of the index whose bounds (the ``geospatial_*`` and
+    ``time_coverage_*`` columns) overlap the requested area and time
+    range. Unknown bounds never exclude a row.
+    """
+    mask = np.ones(len(index), dtype=bool)
+    if index_filter.minimum_latitude is not None:
+        mask &= ~(
+            index["geospatial_lat_max"] < index_filter.minimum_latitude
+        ).to_numpy()
+    if index_filter.maximum_latitude is not None:
+        mask &= ~(
+            index["geospatial_lat_min"] > index_filter.maximum_latitude
+        ).to_numpy()
+    mask &= _get_longitude_mask(index, index_filter)
+    if index_filter.start_datetime is not None:
+        mask &= ~(
+            index["time_coverage_end"]
+            < _to_utc_timestamp(index_filter.start_datetime)
+        ).to_numpy()
+    if index_filter.end_datetime is not None:
+        mask &= ~(
+            index["time_coverage_start"]
+            > _to_utc_timestamp(index_filter.end_datetime)
+        ).to_numpy()
+    return mask
+
+
+def _to_utc_timestamp(date: datetime) -> pd.Timestamp:
+    timestamp = pd.Timestamp(date)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+def _get_longitude_mask(
+    index: pd.DataFrame, index_filter: IndexFilter
+) -> np.ndarray:
+    if (
+        index_filter.minimum_longitude is None
+        and index_filter.maximum_longitude is None
+    ):
+        return np.ones(len(index), dtype=bool)
+    minimum_longitude = _normalize_longitude(
+        index_filter.minimum_longitude
+        if index_filter.minimum_longitude is not None
+        else -180
+    )
+    maximum_longitude = _normalize_longitude(
+        index_filter.maximum_longitude
+        if index_filter.maximum_longitude is not None
+        else 180
+    )
+    if (
+        index_filter.minimum_longitude is not None
+        and index_filter.maximum_longitude is not None
+        and index_filter.maximum_longitude - index_filter.minimum_longitude
+        >= 360
+    ):
+        return np.ones(len(index), dtype=bool)
+    file_minimum_longitude = index["geospatial_lon_min"].to_numpy()
+    file_maximum_longitude = index["geospatial_lon_max"].to_numpy()
+    if minimum_longitude <= maximum_longitude:
+        return ~(
+            (file_maximum_longitude < minimum_longitude)
+            | (file_minimum_longitude > maximum_longitude)
+        )
+    # The requested area crosses the antimeridian
+    return ~(
+        (file_maximum_longitude < minimum_longitude)
+        & (file_minimum_longitude > maximum_longitude)
+    )
+
+
+def _normalize_longitude(longitude: float) -> float:
+    if longitude == 180:
+        return longitude
+    return ((longitude + 180) % 360) - 180
+
+
+def _get_platform_mask(
+    file_names: pd.Series, index_filter: IndexFilter
+) -> np.ndarray:
+    """
+    The platform code is the field of the name of the file after the
+    region, data type and platform type, e.g. ``GL_PR_PF_6901234.nc``,
+    ``GL_TS_MO_41001_202311.nc`` or ``GL_LATEST_PR_PF_6901234_20240101.nc``.
+    The type suffix of the platform IDs of the sparse datasets,
+    such as ``___PF``, is ignored.
+    """
+    platform_codes = {
+        platform_id.split("___")[0]
+        for platform_id in index_filter.platform_ids or []
+    }
+    file_platform_codes = file_names.str.extract(
+        _PLATFORM_FILE_NAME_REGEX, expand=False
+    )
+    return file_platform_codes.isin(platform_codes).to_numpy(dtype=bool)
+
+
+def get_files_to_download_from_index_files(
+    index_files: list[pathlib.Path],
+    index_filter: IndexFilter,
+    dataset_id: str,
+    bucket: str,
+    dataset_root_path: str,
+    path: str,
+    regex: str | None,
+) -> list[str]:
+    """
+    Full S3 paths of the files selected in the index files.
+
+    The paths of the index files may point to other servers (FTP, HTTPS):
+    only the part after the dataset folder is kept. Only the files under
+    ``path`` (the dataset part, if any) and matching ``regex`` are kept.
+    """
+    relative_path_regex = re.compile(
+        rf"/{re.escape(dataset_id)}(?:_\d{{6}})?/(.+)$"
+    )
+    part_prefix = path[len(dataset_root_path) :].strip("/")
+    file_matcher = FileMatcher(regex)
+    files_to_download: dict[str, None] = {}
+    number_of_unknown_paths = 0
+    for index_file in index_files:
+        index = read_index_file(index_file)
+        if index is None:
+            continue
+        for file_name in select_files_from_index(index, index_filter):
+            match = relative_path_regex.search(file_name)
+            if not match:
+                number_of_unknown_paths += 1
+                continue
+            relative_path = match.group(1)
+            if part_prefix and not relative_path.startswith(part_prefix + "/"):
+                continue
+            full_path = f"s3://{bucket}/{dataset_root_path}{relative_path}"
+            if file_matcher.search(full_path):
+                files_to_download[full_path] = None
+    if number_of_unknown_paths:
+        logger.warning(
+            f"{number_of_unknown_paths} files of the index files "
+            f"are not in the dataset {dataset_id} and are skipped."
+        )
+    return list(files_to_download)
@@ -0,0 +1,225 @@
+import logging
+import re
+from typing import NamedTuple
+
+try:
+    from re import _constants as sre_constants  # type: ignore
+    from re import _parser as sre_parser  # type: ignore
+except ImportError:  # Python 3.10
+    import sre_constants  # type: ignore
+    import sre_parse as sre_parser  # type: ignore
+
+from copernicusmarine.download_functions.file_matcher import (
+    split_literals_and_patterns,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+# Above this number, the prefixes are shortened to their folders
+MAXIMUM_NUMBER_OF_LISTING_PREFIXES = 100
+# Above this number, the analysis of the regex is given up
+MAXIMUM_NUMBER_OF_LITERAL_PREFIXES = 1_000_000
+# Character sets bigger than this (e.g. [a-z]) end the prefix
+MAXIMUM_CHARACTER_SET_SIZE = 10
+
+
+class _LiteralPrefix(NamedTuple):
+    value: str
+    # the match can only start at the beginning of the string
+    anchored: bool
+    # nothing can be appended to the prefix anymore
+    complete: bool
+
+
+def get_listing_prefixes(
+    regex: str | None, bucket: str, prefix: str
+) -> list[str]:
+    """
+    Get the key prefixes to list so that every file under ``prefix``
+    matching ``regex`` is listed, with as few files as possible.
+
+    The regex is searched in the full S3 URL of the files.
+    Hence only a match that must start at the beginning of the URL
+    can narrow the listing: either the regex is anchored with ``^``
+    or it starts with ``s3://`` (e.g. a file list with absolute paths,
+    or a filter like ``s3://bucket/native/product/dataset/2023/*``).
+    Otherwise, the listing of the whole ``prefix`` is returned.
+    The regex still has to be applied to the listed files.
+    """
+    if not regex:
+        return [prefix]
+    literal_prefixes = _get_literal_prefixes(regex)
+    if literal_prefixes is None:
+        return [prefix]
+    bucket_url = f"s3://{bucket}/"
+    listing_prefixes: set[str] = set()
+    for literal_prefix in literal_prefixes:
+        if (
+            not literal_prefix.anchored
+            and not literal_prefix.value.startswith("s3://")
+        ):
+            return [prefix]
+        if literal_prefix.value.startswith(bucket_url):
+            key_prefix = literal_prefix.value[len(bucket_url) :]
+        elif bucket_url.startswith(literal_prefix.value):
+            key_prefix = ""
+        else:
+            # cannot match any file of the bucket
+            continue
+        if key_prefix.startswith(prefix):
+            listing_prefixes.add(key_prefix)
+        elif prefix.startswith(key_prefix):
+            listing_prefixes.add(prefix)
+    listing_prefixes_list = _shorten_listing_prefixes(
+        _remove_nested_prefixes(listing_prefixes), prefix
+    )
+    if listing_prefixes_list != [prefix]:
+        logger.debug(
+            f"Listing {len(listing_prefixes_list)} "
+            f"prefix(es) derived from the filter: "
+            f"{listing_prefixes_list[:5]}"
+        )
+    return listing_prefixes_list
+
+
+def _remove_nested_prefixes(prefixes: set[str]) -> list[str]:
+    sorted_prefixes: list[str] = []
+    for prefix in sorted(prefixes):
+        if not sorted_prefixes or not prefix.startswith(sorted_prefixes[-1]):
+            sorted_prefixes.append(prefix)
+    return sorted_prefixes
+
+
+def _shorten_listing_prefixes(prefixes: list[str], root: str) -> list[str]:
+    """
+    Cut the prefixes to their parent folder until there are few enough
+    of them, e.g. the files of a file list become their month folders.
+    """
+    while len(prefixes) > MAXIMUM_NUMBER_OF_LISTING_PREFIXES:
+        shortened_prefixes = set()
+        for prefix in prefixes:
+            parent_folder = prefix[: prefix.rstrip("/").rfind("/") + 1]
+            shortened_prefixes.add(
+                parent_folder if parent_folder.startswith(root) else root
+            )
+        prefixes = _remove_nested_prefixes(shortened_prefixes)
+    return prefixes
+
+
+def _get_literal_prefixes(regex: str) -> list[_LiteralPrefix] | None:
+    """
+    Get the literal strings that a match of the regex must start with,
+    or ``None`` if they cannot be determined.
+    """
+    literals, patterns = split_literals_and_patterns(regex)
+    literal_prefixes = [
+        _LiteralPrefix(literal, anchored=False, complete=True)
+        for literal in literals
+    ]
+    for pattern in patterns:
+        try:
+            parsed_pattern = sre_parser.parse(pattern)
+        except re.error:
+            return None
+        if parsed_pattern.state.flags & re.IGNORECASE:
+            return None
+        pattern_prefixes = _extend_literal_prefixes(
+            [_LiteralPrefix("", anchored=False, complete=False)],
+            parsed_pattern,
+        )
+        if pattern_prefixes is None:
+            return None
+        literal_prefixes.extend(pattern_prefixes)
+    return literal_prefixes
+
+
+def _extend_literal_prefixes(
+    literal_prefixes: list[_LiteralPrefix], items
+) -> list[_LiteralPrefix] | None:
+    for operation, argument in items:
+        complete_prefixes = [
+            literal_prefix
+            for literal_prefix in literal_prefixes
+            if literal_prefix.complete
+        ]
+        open_prefixes = [
+            literal_prefix
+            for literal_prefix in literal_prefixes
+            if not literal_prefix.complete
+        ]
+        if not open_prefixes:
+            break
+        extended_prefixes = _extend_with_item(
+            open_prefixes, operation, argument
+        )
+        if extended_prefixes is None:
+            return None
+        literal_prefixes = complete_prefixes + extended_prefixes
+        if len(literal_prefixes) > MAXIMUM_NUMBER_OF_LITERAL_PREFIXES:
+            return None
+    return literal_prefixes
+
+
+def _extend_with_item(
+    open_prefixes: list[_LiteralPrefix], operation, argument
+) -> list[_LiteralPrefix] | None:
+    if operation == sre_constants.LITERAL:
+        return [
+            literal_prefix._replace(value=literal_prefix.value + chr(argument))
+            for literal_prefix in open_prefixes
+        ]
+    if operation == sre_constants.AT and argument in (
+        sre_constants.AT_BEGINNING,
+        sre_constants.AT_BEGINNING_STRING,
+    ):
+        return [
+            (
+                literal_prefix._replace(anchored=True)
+                if not literal_prefix.value
+                else literal_prefix._replace(complete=True)
+            )
+            for literal_prefix in open_prefixes
+        ]
+    if operation == sre_constants.IN:
+        characters = _get_characters(argument)
+        if characters is not None:
+            return [
+                literal_prefix._replace(value=literal_prefix.value + character)
+                for literal_prefix in open_prefixes
+                for character in characters
+            ]
+    elif operation == sre_constants.SUBPATTERN:
+        _, add_flags, _, sub_pattern = argument
+        if not add_flags & re.IGNORECASE:
+            return _extend_literal_prefixes(open_prefixes, sub_pattern)
+    elif operation == sre_constants.BRANCH:
+        _, alternatives = argument
+        extended_prefixes: list[_LiteralPrefix] = []
+        for alternative in alternatives:
+            alternative_prefixes = _extend_literal_prefixes(
+                open_prefixes, alternative
+            )
+            if alternative_prefixes is None:
+                return None
+            extended_prefixes.extend(alternative_prefixes)
+        return extended_prefixes
+    # anything else (wildcards, repetitions...) ends the prefixes
+    return [
+        literal_prefix._replace(complete=True)
+        for literal_prefix in open_prefixes
+    ]
+
+
+def _get_characters(character_set) -> list[str] | None:
+    characters: list[str] = []
+    for operation, argument in character_set:
+        if operation == sre_constants.LITERAL:
+            characters.append(chr(argument))
+        elif operation == sre_constants.RANGE:
+            low, high = argument
+            characters.extend(chr(code) for code in range(low, high + 1))
+        else:
+            return None
+        if len(characters) > MAXIMUM_CHARACTER_SET_SIZE:
+            return None
+    return characters
@@ -0,0 +1,100 @@
+import logging
+import os
+import pathlib
+from typing import Iterator
+
+from copernicusmarine.core_functions.resumable_download import (
+    PART_FILE_SUFFIX,
+    PART_STATE_FILE_SUFFIX,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+
+class LocalFilesIndex:
+    """
+    In-memory index of the files present in the output directory.
+
+    Each directory is read once with ``os.scandir`` the first time
+    a path inside it is queried. Existence checks are then answered
+    from memory and ``stat`` is only called (and cached by the directory
+    entry) when the size or the modification time is needed, i.e. for
+    ``--sync``. Paths handed out by :meth:`get_unique_filepath` are
+    reserved so that two remote files never get the same local name.
+    """
+
+    def __init__(self) -> None:
+        self._directories: dict[pathlib.Path, dict[str, os.DirEntry]] = {}
+        self._reserved: set[pathlib.Path] = set()
+
+    def _scan_directory(
+        self, directory: pathlib.Path
+    ) -> dict[str, os.DirEntry]:
+        entries = self._directories.get(directory)
+        if entries is None:
+            entries = {}
+            try:
+                with os.scandir(directory) as iterator:
+                    for entry in iterator:
+                        entries[entry.name] = entry
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+            self._directories[directory] = entries
+        return entries
+
+    def _get_entry(self, filepath: pathlib.Path) -> os.DirEntry | None:
+        return self._scan_directory(filepath.parent).get(filepath.name)
+
+    def is_file(self, filepath: pathlib.Path) -> bool:
+        entry = self._get_entry(filepath)
+        return entry is not None and entry.is_file()
+
+    def exists(self, filepath: pathlib.Path) -> bool:
+        return (
+            filepath in self._reserved or self._get_entry(filepath) is not None
+        )
+
+    def get_size_and_modification_time(
+        self, filepath: pathlib.Path
+    ) -> tuple[int, float] | None:
+        entry = self._get_entry(filepath)
+        if entry is None or not entry.is_file():
+            return None
+        file_stats = entry.stat()
+        return file_stats.st_size, file_stats.st_mtime
+
+    def get_unique_filepath(self, filepath: pathlib.Path) -> pathlib.Path:
+        """
+        Same naming as :func:`~copernicusmarine.core_functions.utils.get_unique_filepath`
+        but checked against the index and the paths already reserved.
+        """  # noqa
+        parent = filepath.parent
+        filename = filepath.stem
+        extension = filepath.suffix
+        counter = 1
+
+        while self.exists(filepath):
+            filepath = parent / (
+                filename + "_(" + str(counter) + ")" + extension
+            )
+            counter += 1
+        self._reserved.add(filepath)
+        return filepath
+
+    def iter_files(self, directory: pathlib.Path) -> Iterator[pathlib.Path]:
+        """
+        Recursively yield the files under ``directory``,
+        indexing every visited directory on the way.
+        The files of the interrupted downloads are skipped, they are kept
+        to resume them.
+        """
+        directories_to_visit = [directory]
+        while directories_to_visit:
+            current_directory = directories_to_visit.pop()
+            for name, entry in self._scan_directory(current_directory).items():
+                if entry.is_dir(follow_symlinks=False):
+                    directories_to_visit.append(current_directory / name)
+                elif entry.is_file() and not name.endswith(
+                    (PART_FILE_SUFFIX, PART_STATE_FILE_SUFFIX)
+                ):
+                    yield current_directory / name
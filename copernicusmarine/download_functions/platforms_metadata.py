@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import pathlib
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from functools import cache, cached_property
+from typing import Any
+from urllib.parse import urljoin
+
+from arcosparse import Entity
+
+from copernicusmarine.core_functions.credentials_utils import (
+    DEFAULT_CLIENT_BASE_DIRECTORY,
+)
+from copernicusmarine.core_functions.environment_variables import (
+    COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_CACHE,
+    COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_TTL,
+)
+from copernicusmarine.core_functions.sessions import JsonParserConnection
+from copernicusmarine.core_functions.utils import (
+    construct_query_params_for_marine_data_store_monitoring,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+PLATFORMS_METADATA_CACHE_DIRECTORY = (
+    DEFAULT_CLIENT_BASE_DIRECTORY / "cache" / "platforms_metadata"
+)
+DEFAULT_PLATFORMS_METADATA_TTL = 600.0
+
+
+@dataclass
+class PlatformsMetadata:
+    """
+    The platforms of a sparse dataset, as listed in the ``platforms``
+    asset of its STAC item, and the ETag of the asset.
+    """
+
+    platforms_href: str | None
+    etag: str | None
+    raw_platforms_metadata: dict[str, Any]
+    validated_at: float
+
+    @cached_property
+    def entities(self) -> dict[str, Entity]:
+        return _get_entities(self.raw_platforms_metadata)
+
+    @cached_property
+    def entity_ids_by_platform_id(self) -> dict[str, list[str]]:
+        """
+        The entity IDs (e.g. ``6901234___PF``) of each platform ID
+        without the type.
+        """
+        entity_ids_by_platform_id = defaultdict(list)
+        for entity_id in self.entities:
+            entity_ids_by_platform_id[entity_id.split("___")[0]].append(
+                entity_id
+            )
+        return dict(entity_ids_by_platform_id)
+
+
+_platforms_metadata_by_url: dict[str, PlatformsMetadata] = {}
+_platforms_metadata_lock = threading.Lock()
+
+
+def get_platforms_metadata(metadata_url: str) -> PlatformsMetadata:
+    """
+    The platforms of a sparse dataset.
+
+    They are kept for the whole process and, if
+    ``COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_CACHE`` is set, on disk.
+    Once older than ``COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_TTL``
+    seconds, they are downloaded again only if the ETag of the
+    ``platforms`` asset changed.
+    """
+    with _platforms_metadata_lock:
+        platforms_metadata = _platforms_metadata_by_url.get(metadata_url)
+        if (
+            platforms_metadata is None
+            and COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_CACHE
+        ):
+            platforms_metadata = _read_cache_file(metadata_url)
+        if platforms_metadata is None or time.time() - (
+            platforms_metadata.validated_at
+        ) >= _get_platforms_metadata_ttl(
+            COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_TTL
+        ):
+            platforms_metadata = _fetch_platforms_metadata(
+                metadata_url, platforms_metadata
+            )
+            if COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_CACHE:
+                _write_cache_file(metadata_url, platforms_metadata)
+        _platforms_metadata_by_url[metadata_url] = platforms_metadata
+        return platforms_metadata
+
+
+@cache
+def _get_platforms_metadata_ttl(value: str) -> float:
+    """
+    Parsed once, the default is used with a warning if it is invalid.
+    """
+    try:
+        ttl = float(value)
+    except ValueError:
+        ttl = math.nan
+    if not ttl >= 0:
+        logger.warning(
+            f"Ignoring COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_TTL={value}: "
+            "expected a non-negative number of seconds."
+        )
+        return DEFAULT_PLATFORMS_METADATA_TTL
+    return ttl
+
+
+def _fetch_platforms_metadata(
+    metadata_url: str, cached: PlatformsMetadata | None
+) -> PlatformsMetadata:
+    with JsonParserConnection() as connection:
+        metadata_item = connection.get_json_file(metadata_url)
+        platforms_href = (
+            metadata_item.get("assets", {}).get("platforms", {}).get("href")
+        )
+        if platforms_href is None:
+            return PlatformsMetadata(None, None, {}, time.time())
+        platforms_href = urljoin(metadata_url, platforms_href)
+        headers = {}
+        if cached and cached.etag and cached.platforms_href == platforms_href:
+            headers["If-None-Match"] = cached.etag
+        with connection.session.get(
+            platforms_href,
+            headers=headers,
+            params=construct_query_params_for_marine_data_store_monitoring(),
+        ) as response:
+            if response.status_code == 304 and cached:
+                logger.debug(
+                    f"The platforms metadata of {metadata_url} did not change"
+                )
+                cached.validated_at = time.time()
+                return cached
+            response.raise_for_status()
+            logger.debug(f"Downloaded the platforms metadata {platforms_href}")
+            return PlatformsMetadata(
+                platforms_href=platforms_href,
+                etag=response.headers.get("ETag"),
+                raw_platforms_metadata=response.json(),
+                validated_at=time.time(),
+            )
+
+
+def _get_entities(raw_platforms_metadata: dict[str, Any]) -> dict[str, Entity]:
+    """
+    Same as ``arcosparse.get_entities``.
+    """
+    institution_mapping = raw_platforms_metadata.get("dicts", {}).get(
+        "inst", {}
+    )
+    doi_mapping = raw_platforms_metadata.get("dicts", {}).get("doi", {})
+    return {
+        platform_id: Entity(
+            entity_id=platform_id,
+            entity_type=platform_info.get("ptype"),
+            institution=institution_mapping.get(platform_info.get("inst")),
+            institution_edmo_code=platform_info.get("inst_edmo"),
+            doi=doi_mapping.get(platform_info.get("doi")),
+        )
+        for platform_id, platform_info in raw_platforms_metadata.get(
+            "platforms", {}
+        ).items()
+    }
+
+
+def _get_cache_file(metadata_url: str) -> pathlib.Path:
+    return (
+        PLATFORMS_METADATA_CACHE_DIRECTORY
+        / f"{hashlib.sha256(metadata_url.encode()).hexdigest()}.json"
+    )
+
+
+def _read_cache_file(metadata_url: str) -> PlatformsMetadata | None:
+    cache_file = _get_cache_file(metadata_url)
+    if not cache_file.exists():
+        return None
+    try:
+        cached = json.loads(cache_file.read_text())
+        return PlatformsMetadata(**cached)
+    except (ValueError, TypeError):
+        logger.debug(f"Ignoring the invalid cache file {cache_file}")
+        return None
+
+
+def _write_cache_file(
+    metadata_url: str, platforms_metadata: PlatformsMetadata
+) -> None:
+    cache_file = _get_cache_file(metadata_url)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temporary file, other processes can write the same cache
+    file_descriptor, temporary_file = tempfile.mkstemp(
+        dir=cache_file.parent, prefix=f".{cache_file.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(file_descriptor, "w") as file:
+            json.dump(asdict(platforms_metadata), file)
+        os.replace(temporary_file, cache_file)
+    except BaseException:
+        os.remove(temporary_file)
+        raise
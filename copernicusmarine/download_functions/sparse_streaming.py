@@ -0,0 +1,258 @@
+import logging
+import pathlib
+from typing import TYPE_CHECKING, Iterator, Optional
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+logger = logging.getLogger("copernicusmarine")
+
+# Rows of the platforms kept in memory before being spooled to the disk
+PLATFORM_SPOOL_BUFFER_SIZE = 256 * 1024 * 1024
+# Columns of the sparse dataframes that are categoricals
+_CATEGORICAL_COLUMNS = [
+    "platform_id",
+    "platform_type",
+    "variable",
+    "institution",
+    "doi",
+    "product_doi",
+]
+_FLAG_COLUMNS = ["value_qc", "is_depth_from_producer"]
+
+
+class CSVAppender:
+    """
+    Append the blocks of rows to a CSV file, the header with the first
+    block only.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.number_of_rows = 0
+
+    def append(self, df: pd.DataFrame) -> None:
+        df.to_csv(
+            self.path,
+            index=False,
+            mode="a" if self.number_of_rows else "w",
+            header=not self.number_of_rows,
+        )
+        self.number_of_rows += len(df)
+
+
+class ParquetAppender:
+    """
+    Append the blocks of rows to a Parquet file, one row group per block
+    (or per ``row_group_size`` rows).
+
+    The schema is the one of the first block, except that the
+    categoricals are dictionaries of strings and the flags are nullable
+    small integers, so that all the blocks can be cast to it whatever
+    their categories or missing values.
+
+    With ``partition_columns``, the path is the directory of a Hive
+    partitioned dataset instead (e.g. ``platform_type=PF/platform_id=
+    6901234/part-0-0.parquet``), with the ``_common_metadata`` and
+    ``_metadata`` summary files written when closed. The ``year`` and
+    ``month`` partition columns are computed from the time.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        partition_columns: Optional[list[str]] = None,
+        row_group_size: Optional[int] = None,
+        compression: str = "snappy",
+    ):
+        self.path = path
+        self.partition_columns = partition_columns or []
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.number_of_rows = 0
+        self._writer: Optional["pq.ParquetWriter"] = None
+        self._schema: Optional["pa.Schema"] = None
+        self._number_of_blocks = 0
+        self._row_groups_metadata: list = []
+
+    def __enter__(self) -> "ParquetAppender":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if (
+            exc_type is None
+            and self.partition_columns
+            and self._schema is not None
+        ):
+            self._write_summary_files(self._schema)
+
+    def append(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if "year" in self.partition_columns:
+            df = df.assign(year=df["time"].dt.year.astype("int16"))
+        if "month" in self.partition_columns:
+            df = df.assign(month=df["time"].dt.month.astype("int8"))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._schema is None:
+            self._schema = pa.schema(
+                [
+                    _get_streaming_field(field, self.partition_columns)
+                    for field in table.schema
+                ],
+                metadata=table.schema.metadata,
+            )
+        schema = self._schema
+        table = table.cast(schema)
+        if self.partition_columns:
+            pq.write_to_dataset(
+                table,
+                self.path,
+                partition_cols=self.partition_columns,
+                basename_template=f"part-{self._number_of_blocks}-{{i}}"
+                ".parquet",
+                file_visitor=self._collect_row_groups_metadata,
+                row_group_size=self.row_group_size,
+                compression=self.compression,
+            )
+        else:
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(
+                    self.path, schema, compression=self.compression
+                )
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+        self._number_of_blocks += 1
+        self.number_of_rows += len(df)
+
+    def _collect_row_groups_metadata(self, written_file) -> None:
+        metadata = written_file.metadata
+        metadata.set_file_path(
+            pathlib.Path(written_file.path).relative_to(self.path).as_posix()
+        )
+        self._row_groups_metadata.append(metadata)
+
+    def _write_summary_files(self, schema: "pa.Schema") -> None:
+        import pyarrow.parquet as pq
+
+        # The partition columns are in the paths, not in the files
+        file_schema = schema
+        for column in self.partition_columns:
+            file_schema = file_schema.remove(
+                file_schema.get_field_index(column)
+            )
+        pq.write_metadata(file_schema, self.path / "_common_metadata")
+        pq.write_metadata(
+            file_schema,
+            self.path / "_metadata",
+            metadata_collector=self._row_groups_metadata,
+        )
+
+
+def _get_streaming_field(field, partition_columns: list[str]):
+    import pyarrow as pa
+
+    if field.name in partition_columns:
+        # The partitions are written from plain values
+        if pa.types.is_dictionary(field.type):
+            return pa.field(field.name, pa.string())
+        return field
+    if field.name in _CATEGORICAL_COLUMNS:
+        return pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+    if field.name in _FLAG_COLUMNS:
+        return pa.field(field.name, pa.int8())
+    return field
+
+
+class PlatformSpool:
+    """
+    Route the rows of the blocks to their platform. The rows are kept in
+    memory up to ``buffer_size`` bytes, then the rows of every platform
+    are written to a Parquet part in the directory of the platform.
+
+    The platforms are then read back one at a time, with all their rows
+    in the order they were added.
+    """
+
+    def __init__(
+        self,
+        directory: pathlib.Path,
+        buffer_size: int = PLATFORM_SPOOL_BUFFER_SIZE,
+    ):
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self._buffered_size = 0
+        self._buffers: dict[str, list[pd.DataFrame]] = {}
+        self._number_of_parts: dict[str, int] = {}
+        # Directory names that do not depend on the platform ids
+        self._platform_directories: dict[str, pathlib.Path] = {}
+
+    def __len__(self) -> int:
+        return len(self._platform_directories)
+
+    def add(self, df: pd.DataFrame) -> None:
+        for platform_id, platform_df in df.groupby(
+            "platform_id", observed=True, sort=False
+        ):
+            platform_id = str(platform_id)
+            if platform_id not in self._platform_directories:
+                self._platform_directories[platform_id] = self.directory / str(
+                    len(self._platform_directories)
+                )
+                self._buffers[platform_id] = []
+            self._buffers[platform_id].append(platform_df)
+        self._buffered_size += int(df.memory_usage(index=False).sum())
+        if self._buffered_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        for platform_id, platform_dfs in self._buffers.items():
+            if not platform_dfs:
+                continue
+            platform_directory = self._platform_directories[platform_id]
+            platform_directory.mkdir(parents=True, exist_ok=True)
+            part = self._number_of_parts.get(platform_id, 0)
+            concat_blocks(platform_dfs).to_parquet(
+                platform_directory / f"{part}.parquet", index=False
+            )
+            self._number_of_parts[platform_id] = part + 1
+            platform_dfs.clear()
+        logger.debug(
+            f"Spooled {self._buffered_size} bytes of rows "
+            f"of {len(self)} platform(s) to {self.directory}"
+        )
+        self._buffered_size = 0
+
+    def platforms(self) -> Iterator[tuple[str, pd.DataFrame]]:
+        """
+        The platforms in alphabetical order with all their rows.
+        """
+        for platform_id in sorted(self._platform_directories):
+            platform_dfs = [
+                pd.read_parquet(
+                    self._platform_directories[platform_id] / f"{part}.parquet"
+                )
+                for part in range(self._number_of_parts.get(platform_id, 0))
+            ] + self._buffers[platform_id]
+            yield platform_id, concat_blocks(platform_dfs)
+
+
+def concat_blocks(dfs: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate the blocks, with categoricals whatever their categories.
+    """
+    if len(dfs) == 1:
+        return dfs[0]
+    df = pd.concat(dfs, ignore_index=True)
+    # The categories of the blocks differ
+    for column in _CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(
+            df[column].dtype, pd.CategoricalDtype
+        ):
+            df[column] = df[column].astype("category")
+    return df
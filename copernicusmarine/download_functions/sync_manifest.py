@@ -0,0 +1,184 @@
+import logging
+import pathlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Iterable
+
+from copernicusmarine.core_functions.models import S3FileInfo
+
+logger = logging.getLogger("copernicusmarine")
+
+SYNC_MANIFEST_FILENAME = ".copernicusmarine_sync_manifest.sqlite"
+# Number of keys per query, below the SQLite limit of variables
+SYNC_MANIFEST_QUERY_SIZE = 500
+# Number of recorded files between two commits
+SYNC_MANIFEST_COMMIT_SIZE = 1000
+
+
+@dataclass
+class SyncManifestEntry:
+    key: str
+    etag: str
+    size: int
+    last_modified: str
+    local_path: str
+
+
+class SyncManifest:
+    """
+    SQLite database, in the output directory, of the files downloaded
+    there: their S3 URL (the key), ETag, size, last modified date
+    and local path relative to the output directory.
+
+    It allows ``--sync`` to compare the listed files with the local ones
+    by their ETag without calling ``stat`` on each local file,
+    and ``--sync-delete`` to find the files removed from the server
+    without walking the whole dataset folder.
+    The files unknown to the manifest are compared as before, and the
+    folder of a dataset is walked by its first ``--sync-delete``,
+    after which the dataset is marked as synced.
+
+    The connection is shared by the download threads, hence the lock.
+    """
+
+    def __init__(self, output_directory: pathlib.Path) -> None:
+        self.output_directory = output_directory
+        output_directory.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            output_directory / SYNC_MANIFEST_FILENAME,
+            check_same_thread=False,
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "key TEXT PRIMARY KEY, "
+            "etag TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "last_modified TEXT NOT NULL, "
+            "local_path TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS synced_datasets "
+            "(dataset_url TEXT PRIMARY KEY)"
+        )
+        self._lock = threading.Lock()
+        self._uncommitted_records = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def prefetch(self, keys: list[str]) -> dict[str, SyncManifestEntry | None]:
+        """
+        Query the entries of the keys in bulk, typically the files
+        of a listing page, to be passed to :meth:`get`.
+
+        The entries are returned to the caller, since the manifest is
+        shared by the requests of a batch.
+        """
+        prefetched_entries: dict[
+            str, SyncManifestEntry | None
+        ] = dict.fromkeys(keys)
+        with self._lock:
+            for start in range(0, len(keys), SYNC_MANIFEST_QUERY_SIZE):
+                queried_keys = keys[start : start + SYNC_MANIFEST_QUERY_SIZE]
+                for row in self._connection.execute(
+                    "SELECT key, etag, size, last_modified, local_path "
+                    "FROM files WHERE key IN "
+                    f"({', '.join('?' * len(queried_keys))})",
+                    queried_keys,
+                ):
+                    prefetched_entries[row[0]] = SyncManifestEntry(*row)
+        return prefetched_entries
+
+    def get(
+        self,
+        key: str,
+        prefetched_entries: dict[str, SyncManifestEntry | None] | None = None,
+    ) -> SyncManifestEntry | None:
+        if prefetched_entries is not None and key in prefetched_entries:
+            return prefetched_entries[key]
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT key, etag, size, last_modified, local_path "
+                "FROM files WHERE key = ?",
+                (key,),
+            ).fetchone()
+        return SyncManifestEntry(*row) if row else None
+
+    def get_local_path(self, entry: SyncManifestEntry) -> pathlib.Path:
+        return self.output_directory / entry.local_path
+
+    def record(self, s3_file: S3FileInfo) -> None:
+        """
+        Record a file that is up to date locally.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files "
+                "(key, etag, size, last_modified, local_path) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    s3_file.filename_in,
+                    s3_file.etag,
+                    int(s3_file.size),
+                    s3_file.last_modified,
+                    s3_file.filename_out.relative_to(
+                        self.output_directory
+                    ).as_posix(),
+                ),
+            )
+            self._uncommitted_records += 1
+            if self._uncommitted_records >= SYNC_MANIFEST_COMMIT_SIZE:
+                self._connection.commit()
+                self._uncommitted_records = 0
+
+    def get_entries_with_prefix(self, prefix: str) -> list[SyncManifestEntry]:
+        # A range on the primary key instead of LIKE to use its index
+        upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            return [
+                SyncManifestEntry(*row)
+                for row in self._connection.execute(
+                    "SELECT key, etag, size, last_modified, local_path "
+                    "FROM files WHERE key >= ? AND key < ?",
+                    (prefix, upper_bound),
+                )
+            ]
+
+    def is_synced(self, dataset_url: str) -> bool:
+        """
+        Whether a ``--sync-delete`` of the dataset walked its folder, so
+        that the manifest knows all its local files.
+        """
+        with self._lock:
+            return (
+                self._connection.execute(
+                    "SELECT 1 FROM synced_datasets WHERE dataset_url = ?",
+                    (dataset_url,),
+                ).fetchone()
+                is not None
+            )
+
+    def set_synced(self, dataset_url: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO synced_datasets (dataset_url) "
+                "VALUES (?)",
+                (dataset_url,),
+            )
+            self._connection.commit()
+
+    def remove(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM files WHERE key = ?", ((key,) for key in keys)
+            )
+            self._connection.commit()
@@ -1,4 +1,5 @@
 import pathlib
+from datetime import datetime
 
 from copernicusmarine.core_functions.deprecated_options import (
     DEPRECATED_OPTIONS,
@@ -7,10 +8,10 @@ from copernicusmarine.core_functions.deprecated_options import (
 from copernicusmarine.core_functions.exceptions import (
     MutuallyExclusiveArguments,
 )
-from copernicusmarine.core_functions.get import get_function
+from copernicusmarine.core_functions.get import get_batch_function
 from copernicusmarine.core_functions.models import ResponseGet
 from copernicusmarine.core_functions.request_structure import (
-    create_get_request,
+    create_get_requests,
 )
 from copernicusmarine.python_interface.exception_handler import (
     log_exception_and_exit,
@@ -42,6 +43,14 @@ def get(
     max_concurrent_requests: int = 15,
     disable_progress_bar: bool = False,
     staging: bool = False,
+    minimum_longitude: float | None = None,
+    maximum_longitude: float | None = None,
+    minimum_latitude: float | None = None,
+    maximum_latitude: float | None = None,
+    start_datetime: datetime | str | None = None,
+    end_datetime: datetime | str | None = None,
+    platform_ids: list[str] | None = None,
+    output_archive: str | None = None,
 ) -> ResponseGet:
     """
     Download originally produced data files.
@@ -97,6 +106,22 @@ def get(
         Maximum number of concurrent requests. Default 15. The command uses a thread pool executor to manage concurrent requests. If set to 0, no parallel executions are used.
     disable_progress_bar : bool, optional
         Flag to hide progress bar.
+    minimum_longitude : float, optional
+        Minimum longitude of the files to download. Only for INSITU datasets: the files are selected with the index files instead of listing them.
+    maximum_longitude : float, optional
+        Maximum longitude of the files to download. Only for INSITU datasets: the files are selected with the index files instead of listing them.
+    minimum_latitude : float, optional
+        Minimum latitude of the files to download. Only for INSITU datasets: the files are selected with the index files instead of listing them.
+    maximum_latitude : float, optional
+        Maximum latitude of the files to download. Only for INSITU datasets: the files are selected with the index files instead of listing them.
+    start_datetime : datetime | str, optional
+        Start datetime of the files to download. Only for INSITU datasets: the files are selected with the index files instead of listing them.
+    end_datetime : datetime | str, optional
+        End datetime of the files to download. Only for INSITU datasets: the files are selected with the index files instead of listing them.
+    platform_ids : list[str], optional
+        Platform ID of the files to download. Can be used multiple times. Only for INSITU datasets: the files are selected with the index files instead of listing them.
+    output_archive : str, optional
+        Option to write the downloaded files into a single archive instead of one file each. It writes the archive to the specified output directory (default to current directory). The archive name should end with '.tar', '.tar.zst' (requires the 'zstandard' package) or '.zip'. Use '-' to write a tar archive to the standard output, for example to pipe it to another command. Not compatible with the sync and skip existing options.
 
     Returns
     -------
@@ -129,7 +154,7 @@ def get(
     )
     file_list = pathlib.Path(file_list) if file_list else None
     request_file = pathlib.Path(request_file) if request_file else None
-    get_request = create_get_request(
+    get_requests = create_get_requests(
         dataset_id=dataset_id,
         dataset_version=dataset_version,
         dataset_part=dataset_part,
@@ -144,6 +169,7 @@ def get(
         regex=regex,
         file_list=file_list,
         create_file_list=create_file_list,
+        output_archive=output_archive,
         index_parts=index_parts,
         sync=sync,
         sync_delete=sync_delete,
@@ -151,8 +177,15 @@ def get(
         dry_run=dry_run,
         max_concurrent_requests=max_concurrent_requests,
         disable_progress_bar=disable_progress_bar,
+        minimum_longitude=minimum_longitude,
+        maximum_longitude=maximum_longitude,
+        minimum_latitude=minimum_latitude,
+        maximum_latitude=maximum_latitude,
+        start_datetime=start_datetime,
+        end_datetime=end_datetime,
+        platform_ids=platform_ids,
     )
-    return get_function(
-        get_request=get_request,
+    return get_batch_function(
+        get_requests=get_requests,
         staging=staging,
     )
@@ -55,6 +55,10 @@ def read_dataframe(
     disable_progress_bar: bool = False,
     platform_ids: list[str] | None = None,
     staging: bool = False,
+    qc_flags: list[int] | dict[str, list[int]] | None = None,
+    value_ranges: (dict[str, tuple[float | None, float | None]] | None) = None,
+    streaming: bool = False,
+    prefilter_platforms: bool = False,
 ) -> pd.DataFrame:
     """
     Immediately loads a Pandas DataFrame into memory from a specified dataset.
@@ -114,6 +118,14 @@ def read_dataframe(
         Flag to hide progress bar.
     platform_ids : list[str], optional
         List of platform IDs to extract. Only available for platform chunked datasets.
+    qc_flags : list[int] | dict[str, list[int]], optional
+        QC flags of the values to keep, for all the variables (e.g. ``[1, 2]``) or by variable (e.g. ``{"TEMP": [1]}``). Only available for sparse datasets.
+    value_ranges : dict[str, tuple[float | None, float | None]], optional
+        Minimum and maximum of the values to keep by variable, e.g. ``{"TEMP": (-2, 35)}``. A bound can be None. Only available for sparse datasets.
+    streaming : bool, optional
+        Download the chunks of a sparse dataset to a temporary directory and transform them one at a time, instead of loading the whole subset in memory. The rows are then sorted within each chunk only. Only available for sparse datasets.
+    prefilter_platforms : bool, optional
+        Without requested platform IDs, request only the platforms whose files in the index files of the original files of a sparse dataset (INSITU datasets) can have data in the requested area and time range. The index files are downloaded once and cached, which can be a large download for the global products. The platforms not in the index files are always requested, but a platform whose data was updated after the index files may be missed. Only available for sparse datasets.
 
     Returns
     -------
@@ -155,6 +167,10 @@ def read_dataframe(
         staging=staging,
         raise_if_updating=raise_if_updating,
         platform_ids=platform_ids,
+        qc_flags=qc_flags,
+        value_ranges=value_ranges,
+        streaming=streaming,
+        prefilter_platforms=prefilter_platforms,
     )
 
     return read_dataframe_function(
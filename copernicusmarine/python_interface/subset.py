@@ -15,6 +15,7 @@ from copernicusmarine.core_functions.models import (
     DEFAULT_VERTICAL_AXIS,
     CoordinatesSelectionMethod,
     FileFormat,
+    ParquetCompression,
     ResponseSubset,
     VerticalAxis,
 )
@@ -69,6 +70,13 @@ def subset(
     chunk_size_limit: int = -1,
     raise_if_updating: bool = False,
     platform_ids: list[str] | None = None,
+    qc_flags: list[int] | dict[str, list[int]] | None = None,
+    value_ranges: (dict[str, tuple[float | None, float | None]] | None) = None,
+    streaming: bool = False,
+    parquet_partition_columns: list[str] | None = None,
+    parquet_row_group_size: int | None = None,
+    parquet_compression: ParquetCompression | None = None,
+    prefilter_platforms: bool = False,
 ) -> ResponseSubset:
     """
     Extract a subset of data from a specified dataset using given parameters.
@@ -125,6 +133,12 @@ def subset(
         Save the downloaded data with the given file name (under the output directory). Extension is optional and will be added if not set. Extension takes priority over the file format option if both are set.
     file_format : str, optional
         Format of the downloaded dataset. If not set or set to ``None``, defaults to NetCDF '.nc' for gridded datasets and to CSV '.csv' for sparse datasets. Output filename extension takes priority over this option if both are set. For gridded datasets, the following formats are available: netcdf, zarr, csv. For sparse datasets, the following formats are available: csv, netcdf, parquet.
+    parquet_partition_columns : list[str], optional
+        Partition the Parquet output by this column: the output is then a directory of Hive partitions, e.g. ``platform_type=PF/platform_id=6901234/``. Can be used multiple times, the partitions being nested in the given order. Possible columns: platform_type, platform_id, variable, value_qc, is_depth_from_producer, institution, doi, product_doi, and the year and month of the time. Only available for sparse datasets.
+    parquet_row_group_size : int, optional
+        Maximum number of rows of the row groups of the Parquet output. By default, the one of pyarrow (about one million rows). Only available for sparse datasets.
+    parquet_compression : str, optional
+        Compression codec of the Parquet output. Default is snappy. Only available for sparse datasets.
     overwrite : bool, optional
         If specified and if the file already exists on destination, then it will be overwritten. By default, the toolbox creates a new file with a new index (eg 'filename_(1).nc').
         Mutually exclusive with ``skip_existing``.
@@ -149,6 +163,14 @@ def subset(
         If set, raises a :class:`copernicusmarine.DatasetUpdating` error if the dataset is being updated and the subset interval requested overpasses the updating start date of the dataset. Otherwise, a simple warning is displayed.
     platform_ids : list[str], optional
         List of platform IDs to extract. Only available for platform chunked datasets.
+    qc_flags : list[int] | dict[str, list[int]], optional
+        QC flags of the values to keep, for all the variables (e.g. ``[1, 2]``) or by variable (e.g. ``{"TEMP": [1]}``). Only available for sparse datasets.
+    value_ranges : dict[str, tuple[float | None, float | None]], optional
+        Minimum and maximum of the values to keep by variable, e.g. ``{"TEMP": (-2, 35)}``. A bound can be None. Only available for sparse datasets.
+    streaming : bool, optional
+        Download the chunks of a sparse dataset to a temporary directory and transform them one at a time, instead of loading the whole subset in memory. The rows are then sorted within each chunk only. Only available for sparse datasets.
+    prefilter_platforms : bool, optional
+        Without requested platform IDs, request only the platforms whose files in the index files of the original files of a sparse dataset (INSITU datasets) can have data in the requested area and time range. The index files are downloaded once and cached, which can be a large download for the global products. The platforms not in the index files are always requested, but a platform whose data was updated after the index files may be missed. Only available for sparse datasets.
 
     Returns
     -------
@@ -187,6 +209,9 @@ def subset(
         coordinates_selection_method=coordinates_selection_method,
         output_filename=output_filename,
         file_format=file_format,
+        parquet_partition_columns=parquet_partition_columns,
+        parquet_row_group_size=parquet_row_group_size,
+        parquet_compression=parquet_compression,
         service=service,
         request_file=(pathlib.Path(request_file) if request_file else None),
         output_directory=(
@@ -206,6 +231,10 @@ def subset(
         chunk_size_limit=chunk_size_limit,
         raise_if_updating=raise_if_updating,
         platform_ids=platform_ids,
+        qc_flags=qc_flags,
+        value_ranges=value_ranges,
+        streaming=streaming,
+        prefilter_platforms=prefilter_platforms,
     )
 
     return subset_function(
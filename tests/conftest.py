@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
+from copernicusmarine.download_functions import download_original_files
+
+LAST_MODIFIED = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeRemoteFiles:
+    """
+    The same files under every listed prefix of the bucket. The objects
+    with "broken" in their key cannot be downloaded.
+    """
+
+    def __init__(self):
+        self.etags = {f"file_{index}.nc": '"a"' for index in range(5)}
+        self.downloaded: list[str] = []
+
+    def list_files(self, username, endpoint_url, bucket, prefix, *args):
+        for path, etag in self.etags.items():
+            yield (
+                f"s3://{bucket}/{prefix.rstrip('/')}/{path}",
+                4,
+                LAST_MODIFIED,
+                etag,
+            )
+
+    def download_file(self, bucket, object_key, file_path, **kwargs):
+        if "broken" in object_key:
+            raise OSError("Connection reset")
+        self.downloaded.append(object_key)
+        with open(file_path, "wb") as file:
+            file.write(b"data")
+
+
+@pytest.fixture
+def remote_files(monkeypatch):
+    remote_files = FakeRemoteFiles()
+    monkeypatch.setattr(
+        download_original_files,
+        "_list_files_on_marine_data_lake_s3",
+        remote_files.list_files,
+    )
+    monkeypatch.setattr(
+        ConfiguredBoto3Session, "download_file", remote_files.download_file
+    )
+    return remote_files
@@ -0,0 +1,231 @@
+"""
+Benchmark of the conversion of the dataframe of a platform to a dataset,
+before the NetCDF file of the platform is written.
+
+Compares the platforms per second of ``_platform_dataframe_to_dataset``
+with the previous implementation, based on ``pivot_table``, and checks
+that the datasets are identical, on synthetic platforms with repeated
+observations, missing values and complete or incomplete profiles.
+The levels without any value are not generated: the previous
+implementation did not rank them by depth.
+
+Usage: python -m tests.scripts.benchmark_platform_dataframe_to_dataset
+[platforms]
+"""
+
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from copernicusmarine.download_functions.download_sparse import (
+    COLUMNS_ORDER_DEPTH,
+    _datetimes_to_epoch_seconds,
+    _epoch_seconds_to_datetimes,
+    _platform_dataframe_to_dataset,
+)
+
+METADATA_COLUMNS = [
+    "platform_id",
+    "platform_type",
+    "institution",
+    "doi",
+    "product_doi",
+]
+VARIABLES = ["TEMP", "PSAL", "PRES", "DOX2"]
+
+
+def create_platform_dataframe(random: np.random.Generator) -> pd.DataFrame:
+    number_of_times = int(random.integers(1, 50))
+    number_of_depths = int(random.integers(1, 10))
+    variables = list(
+        random.choice(
+            VARIABLES, size=int(random.integers(1, 5)), replace=False
+        )
+    )
+    times = np.repeat(
+        1_600_000_000 + np.arange(number_of_times) * 3600,
+        number_of_depths * len(variables),
+    )
+    depths = np.tile(
+        np.repeat(np.arange(number_of_depths) * 10.0, len(variables)),
+        number_of_times,
+    )
+    df = pd.DataFrame(
+        {
+            "time": times,
+            "depth": depths,
+            "variable": np.tile(variables, number_of_times * number_of_depths),
+        }
+    )
+    # Incomplete profiles and repeated observations
+    df = df.sample(frac=random.choice([0.5, 1.0]), random_state=random)
+    df = pd.concat([df, df.sample(frac=0.2, random_state=random)])
+    number_of_rows = len(df)
+    df["platform_id"] = "platform"
+    df["platform_type"] = "MO"
+    df["time"] = _epoch_seconds_to_datetimes(
+        df["time"].to_numpy(dtype=np.float64)
+    )
+    df["longitude"] = random.uniform(-180, 180, number_of_rows)
+    df["latitude"] = random.uniform(-90, 90, number_of_rows)
+    df["pressure"] = np.where(
+        random.random(number_of_rows) < 0.1, np.nan, df["depth"]
+    )
+    df["is_depth_from_producer"] = random.integers(
+        0, 2, number_of_rows
+    ).astype(np.int8)
+    df["value"] = np.where(
+        random.random(number_of_rows) < 0.1,
+        np.nan,
+        random.normal(10, 5, number_of_rows),
+    )
+    value_qc = random.integers(0, 10, number_of_rows).astype(np.int8)
+    if random.random() < 0.5:
+        # The previous implementation put the levels without any value
+        # at the end of the profiles, instead of ranking them by depth
+        df["value_qc"] = np.where(
+            (random.random(number_of_rows) < 0.1) & df["value"].notna(),
+            np.nan,
+            value_qc,
+        )
+    else:
+        df["value_qc"] = value_qc
+    df["institution"] = None
+    df["doi"] = None
+    df["product_doi"] = "https://doi.org/10.48670/moi-00036"
+    df["variable"] = df["variable"].astype("category")
+    return df[COLUMNS_ORDER_DEPTH].reset_index(drop=True)
+
+
+def platform_dataframe_to_dataset_with_pivot_table(
+    platform_df: pd.DataFrame,
+    metadata_cols: list[str],
+    vertical_axis: str,
+    arco_sparse_type: str | None,
+) -> xr.Dataset:
+    """
+    The previous implementation, for reference.
+    """
+    index_cols = ["time", vertical_axis]
+    variable_cols = ["variable", "value", "value_qc"]
+    obs_df = platform_df.drop(columns=metadata_cols, errors="ignore")
+    obs_df = obs_df.dropna(axis=1, how="all")
+    non_nans_cols = obs_df.columns.to_list()
+    aux_cols = [
+        col for col in non_nans_cols if col not in index_cols + variable_cols
+    ]
+    vertical_col = [c for c in index_cols if c != "time"][0]
+    if arco_sparse_type != "cmemsAltimetry":
+        pivot_columns = ["time", vertical_col]
+        values_columns = ["value", "value_qc"]
+    else:
+        pivot_columns = ["time"]
+        values_columns = ["value"]
+
+    obs_df = obs_df.sort_values(pivot_columns)
+    pivot = obs_df.pivot_table(
+        index=pivot_columns,
+        columns="variable",
+        values=values_columns,
+        aggfunc="first",
+        observed=True,
+    )
+    pivot.columns = [
+        f"{var}_QC" if metric == "value_qc" else var
+        for metric, var in pivot.columns
+    ]
+
+    spatial_and_aux = obs_df.groupby(pivot_columns)[aux_cols].first()
+
+    with warnings.catch_warnings():
+        # Sorting of the concatenated DatetimeIndex with pandas 3
+        warnings.simplefilter("ignore")
+        merged = pd.concat([pivot, spatial_and_aux], axis=1)
+    merged = merged.reset_index()
+    merged["time"] = _datetimes_to_epoch_seconds(merged["time"])
+    if arco_sparse_type != "cmemsAltimetry":
+        merged["depth_level"] = merged.groupby("time").cumcount()
+        merged = merged.set_index(["time", "depth_level"])
+    else:
+        merged = merged.set_index(["time"])
+
+    if vertical_col in non_nans_cols:
+        merged.loc[
+            merged["is_depth_from_producer"] == 0, vertical_col
+        ] = np.nan
+        merged = merged.drop(
+            columns=["is_depth_from_producer"], errors="ignore"
+        )
+        if merged[vertical_col].isna().all():
+            merged = merged.drop(columns=[vertical_col], errors="ignore")
+            non_nans_cols = [
+                coln for coln in non_nans_cols if coln != vertical_col
+            ]
+
+    ds = merged.to_xarray()
+    if "pressure" in non_nans_cols:
+        ds = ds.set_coords("pressure")
+    if "latitude" in non_nans_cols:
+        ds = ds.set_coords("latitude")
+    if "longitude" in non_nans_cols:
+        ds = ds.set_coords("longitude")
+    if vertical_col in non_nans_cols:
+        ds = ds.set_coords(vertical_col)
+
+    ds = ds.set_coords("time")
+    if (
+        "depth_level" in ds.data_vars
+        or "depth_level" in ds.coords
+        or "depth_level" in ds.indexes
+    ):
+        ds = ds.drop_vars("depth_level")
+    ds.time.attrs["units"] = "seconds since 1970-01-01T00:00:00Z"
+    return ds
+
+
+def measure(
+    function, platform_dfs: list[pd.DataFrame], arco_sparse_type: str
+) -> tuple[list[xr.Dataset], float]:
+    start = time.perf_counter()
+    datasets = [
+        function(platform_df, METADATA_COLUMNS, "depth", arco_sparse_type)
+        for platform_df in platform_dfs
+    ]
+    return datasets, len(platform_dfs) / (time.perf_counter() - start)
+
+
+def main(number_of_platforms: int) -> None:
+    random = np.random.default_rng(0)
+    platform_dfs = [
+        create_platform_dataframe(random) for _ in range(number_of_platforms)
+    ]
+    for arco_sparse_type in ["cmemsInsitu", "cmemsAltimetry"]:
+        before, platforms_per_second_before = measure(
+            platform_dataframe_to_dataset_with_pivot_table,
+            platform_dfs,
+            arco_sparse_type,
+        )
+        after, platforms_per_second_after = measure(
+            _platform_dataframe_to_dataset, platform_dfs, arco_sparse_type
+        )
+        for dataset_before, dataset_after in zip(before, after):
+            xr.testing.assert_identical(dataset_before, dataset_after)
+            for name, variable in dataset_before.variables.items():
+                assert variable.dtype == dataset_after[name].dtype, name
+        print(f"{arco_sparse_type}, platforms: {number_of_platforms:,}")
+        print(f"pivot_table: {platforms_per_second_before:,.0f} platforms/s")
+        print(
+            f"Sort and scatter: {platforms_per_second_after:,.0f} platforms/s"
+        )
+        print(
+            "Speed-up: "
+            f"x{platforms_per_second_after / platforms_per_second_before:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000)
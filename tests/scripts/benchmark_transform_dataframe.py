@@ -0,0 +1,152 @@
+"""
+Benchmark of the transformation of the sparse (in-situ) dataframes.
+
+Compares the rows per second and the memory of the dataframe returned
+by ``_transform_dataframe`` with the previous implementation, based on
+row-wise ``apply``, on a synthetic dataframe shaped like the ones
+returned by arcosparse.
+
+Usage: python -m tests.scripts.benchmark_transform_dataframe [rows]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from arcosparse import Entity
+
+from copernicusmarine.core_functions.utils import (
+    datetime_to_isoformat,
+    timestamp_parser,
+)
+from copernicusmarine.download_functions.download_sparse import (
+    COLUMNS_ORDER_DEPTH,
+    SORTING,
+    _datetimes_to_isoformat,
+    _transform_dataframe,
+)
+
+NUMBER_OF_PLATFORMS = 2_000
+VARIABLES = ["TEMP", "PSAL", "PRES", "DOX2"]
+PLATFORM_TYPES = ["PF", "MO", "TG", "DB"]
+PRODUCT_DOI = "10.48670/moi-00036"
+
+
+def create_dataframe(
+    number_of_rows: int, seed: int = 0
+) -> tuple[pd.DataFrame, dict[str, Entity]]:
+    random = np.random.default_rng(seed)
+    platforms_metadata = {
+        f"{index:07d}___{PLATFORM_TYPES[index % 4]}": Entity(
+            entity_id=f"{index:07d}___{PLATFORM_TYPES[index % 4]}",
+            entity_type=PLATFORM_TYPES[index % 4],
+            institution=f"Institution {index % 50}",
+            doi=f"https://doi.org/10.17882/{index}",
+        )
+        for index in range(NUMBER_OF_PLATFORMS)
+    }
+    platform_ids = np.array(list(platforms_metadata))
+    platforms = random.integers(0, NUMBER_OF_PLATFORMS, number_of_rows)
+    df = pd.DataFrame(
+        {
+            "platform_id": platform_ids[platforms],
+            "platform_type": np.array(PLATFORM_TYPES)[platforms % 4],
+            "time": random.integers(
+                1_500_000_000, 1_700_000_000, number_of_rows
+            ),
+            "longitude": random.uniform(-180, 180, number_of_rows),
+            "latitude": random.uniform(-90, 90, number_of_rows),
+            "depth": random.uniform(0, 2000, number_of_rows),
+            "pressure": random.uniform(0, 2000, number_of_rows),
+            "is_approx_elevation": random.integers(0, 2, number_of_rows),
+            "value": random.normal(10, 5, number_of_rows),
+            "value_qc": random.integers(0, 10, number_of_rows),
+            "variable": np.array(VARIABLES)[
+                random.integers(0, len(VARIABLES), number_of_rows)
+            ],
+        }
+    )
+    return df, platforms_metadata
+
+
+def transform_dataframe_row_wise(
+    df: pd.DataFrame,
+    platforms_metadata: dict[str, Entity],
+    product_doi: str | None,
+) -> pd.DataFrame:
+    """
+    The previous implementation, for reference.
+    """
+    df["institution"] = df["platform_id"].apply(
+        lambda x: (
+            platforms_metadata[x].institution
+            if x in platforms_metadata
+            else None
+        )
+    )
+    df["doi"] = df["platform_id"].apply(
+        lambda x: (
+            platforms_metadata[x].doi if x in platforms_metadata else None
+        )
+    )
+    df["product_doi"] = f"https://doi.org/{product_doi}"
+    df["platform_id"] = df["platform_id"].str.split("___").str[0]
+    df["time"] = df["time"].apply(
+        lambda x: datetime_to_isoformat(timestamp_parser(x, unit="s"))
+    )
+    df["is_depth_from_producer"] = df["is_approx_elevation"].apply(
+        lambda x: 0 if x else 1
+    )
+    df.drop(columns=["is_approx_elevation"], inplace=True)
+    df = df[COLUMNS_ORDER_DEPTH]
+    df.sort_values(
+        by=list(SORTING.keys()),
+        ascending=list(SORTING.values()),
+        inplace=True,
+    )
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+
+def measure(function, df: pd.DataFrame) -> tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    result = function(df.copy())
+    return result, len(df) / (time.perf_counter() - start)
+
+
+def main(number_of_rows: int) -> None:
+    df, platforms_metadata = create_dataframe(number_of_rows)
+    before, rows_per_second_before = measure(
+        lambda df: transform_dataframe_row_wise(
+            df, platforms_metadata, PRODUCT_DOI
+        ),
+        df,
+    )
+    after, rows_per_second_after = measure(
+        lambda df: _transform_dataframe(
+            df, "depth", platforms_metadata, PRODUCT_DOI
+        ),
+        df,
+    )
+    memory_before = before.memory_usage(deep=True).sum()
+    memory_after = after.memory_usage(deep=True).sum()
+    # The times are kept as datetimes until written
+    after["time"] = _datetimes_to_isoformat(after["time"])
+    # Same rows, the order of the equal keys may differ
+    pd.testing.assert_frame_equal(
+        before.sort_values(list(before.columns), ignore_index=True),
+        after.sort_values(list(after.columns), ignore_index=True),
+        check_dtype=False,
+        check_categorical=False,
+    )
+    print(f"Rows: {number_of_rows:,}")
+    print(f"Row-wise apply: {rows_per_second_before:,.0f} rows/s")
+    print(f"Vectorized: {rows_per_second_after:,.0f} rows/s")
+    print(f"Speed-up: x{rows_per_second_after / rows_per_second_before:.1f}")
+    print(f"Memory before: {memory_before / 1e6:,.0f} MB")
+    print(f"Memory after: {memory_after / 1e6:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,153 @@
+import threading
+
+import pytest
+import urllib3
+
+from copernicusmarine.core_functions import adaptive_concurrency, utils
+from copernicusmarine.core_functions.adaptive_concurrency import (
+    MEASUREMENT_INTERVAL_SECONDS,
+    AdaptiveConcurrencyController,
+)
+from copernicusmarine.core_functions.sessions import (
+    _record_throttling_before_retry,
+    _ThrottlingAwareRetry,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def complete_requests(
+    controller: AdaptiveConcurrencyController,
+    clock: FakeClock,
+    number_of_requests: int,
+) -> None:
+    """
+    Run ``number_of_requests`` requests, as many at once as the limit
+    allows, during one measurement window.
+    """
+    slots = [controller.slot() for _ in range(controller.limit)]
+    for slot in slots:
+        slot.__enter__()
+    for _ in range(number_of_requests - len(slots)):
+        slots[0].__exit__(None, None, None)
+        slots[0] = controller.slot()
+        slots[0].__enter__()
+    clock.now += MEASUREMENT_INTERVAL_SECONDS
+    for slot in slots:
+        slot.__exit__(None, None, None)
+
+
+@pytest.fixture
+def shared_controller(monkeypatch):
+    monkeypatch.setattr(
+        adaptive_concurrency, "COPERNICUSMARINE_ADAPTIVE_CONCURRENCY", True
+    )
+    monkeypatch.setattr(
+        adaptive_concurrency, "_adaptive_concurrency_controller", None
+    )
+    return adaptive_concurrency.get_adaptive_concurrency_controller(4)
+
+
+class TestAdaptiveConcurrencyController:
+    def test_limit_increases_while_throughput_improves(self):
+        clock = FakeClock()
+        controller = AdaptiveConcurrencyController(4, clock=clock)
+        complete_requests(controller, clock, 10)
+        assert controller.limit == 5
+        complete_requests(controller, clock, 20)
+        assert controller.limit == 6
+        # no improvement, the limit stays the same
+        complete_requests(controller, clock, 20)
+        assert controller.limit == 6
+
+    def test_limit_is_cut_once_per_window_on_throttling(self):
+        clock = FakeClock()
+        controller = AdaptiveConcurrencyController(16, clock=clock)
+        controller.record_throttling()
+        controller.record_throttling()
+        assert controller.limit == 8
+        clock.now += MEASUREMENT_INTERVAL_SECONDS
+        controller.record_throttling()
+        assert controller.limit == 4
+
+    def test_limit_stays_between_minimum_and_maximum(self):
+        clock = FakeClock()
+        controller = AdaptiveConcurrencyController(
+            2, maximum_limit=3, clock=clock
+        )
+        for number_of_requests in (10, 20, 40):
+            complete_requests(controller, clock, number_of_requests)
+        assert controller.limit == 3
+        for _ in range(5):
+            clock.now += MEASUREMENT_INTERVAL_SECONDS
+            controller.record_throttling()
+        assert controller.limit == 1
+
+    def test_slot_waits_while_the_limit_is_reached(self):
+        controller = AdaptiveConcurrencyController(1)
+        started = threading.Event()
+
+        def _request():
+            with controller.slot():
+                started.set()
+
+        with controller.slot():
+            thread = threading.Thread(target=_request)
+            thread.start()
+            assert not started.wait(0.1)
+        assert started.wait(5)
+        thread.join()
+
+    def test_run_concurrently_uses_the_shared_controller(
+        self, shared_controller
+    ):
+        lock = threading.Lock()
+        running = 0
+        maximum_running = 0
+
+        def _task(index: int) -> int:
+            nonlocal running, maximum_running
+            with lock:
+                running += 1
+                maximum_running = max(maximum_running, running)
+            threading.Event().wait(0.01)
+            with lock:
+                running -= 1
+            return index
+
+        result = utils.run_concurrently(
+            _task,
+            [(index,) for index in range(30)],
+            max_concurrent_requests=4,
+            tdqm_bar_configuration={"disable": True},
+        )
+        assert sorted(result) == list(range(30))
+        assert maximum_running <= shared_controller.maximum_limit
+        assert maximum_running <= 5
+
+    def test_retries_of_throttled_requests_cut_the_limit(
+        self, shared_controller
+    ):
+        retry = _ThrottlingAwareRetry(total=5, status_forcelist=[503])
+        retry.increment(
+            method="GET",
+            url="/",
+            response=urllib3.HTTPResponse(status=503),
+        )
+        assert shared_controller.limit == 2
+
+    def test_boto3_throttled_responses_cut_the_limit(self, shared_controller):
+        class FakeHttpResponse:
+            status_code = 200
+
+        _record_throttling_before_retry(response=(FakeHttpResponse(), {}))
+        assert shared_controller.limit == 4
+        FakeHttpResponse.status_code = 429
+        _record_throttling_before_retry(response=(FakeHttpResponse(), {}))
+        assert shared_controller.limit == 2
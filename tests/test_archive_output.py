@@ -0,0 +1,154 @@
+import io
+import pathlib
+import random
+import tarfile
+import time
+import zipfile
+
+import pytest
+from botocore.response import StreamingBody
+
+from copernicusmarine.core_functions import request_structure
+from copernicusmarine.core_functions.models import S3FileInfo
+from copernicusmarine.core_functions.request_structure import (
+    create_get_request,
+)
+from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
+from copernicusmarine.download_functions.archive_writer import (
+    PAX_HEADER_ETAG,
+    PAX_HEADER_S3_URL,
+    ArchiveWriter,
+)
+from copernicusmarine.download_functions.download_original_files import (
+    download_files_to_archive,
+)
+
+BUCKET = "bucket"
+LAST_MODIFIED = "2024-01-01T00:00:00+00:00"
+
+
+def s3_files(output_directory: pathlib.Path) -> list[S3FileInfo]:
+    return [
+        S3FileInfo(
+            filename_in=f"s3://{BUCKET}/native/product/dataset/{i}.nc",
+            filename_out=output_directory / "product" / "dataset" / f"{i}.nc",
+            size=i + 1,
+            last_modified=LAST_MODIFIED,
+            etag=f'"etag-{i}"',
+        )
+        for i in range(20)
+    ]
+
+
+@pytest.fixture
+def remote_objects(monkeypatch):
+    def get_object(session, bucket_name, object_key):
+        # The downloads end in any order
+        time.sleep(random.random() / 100)
+        content = object_key.encode() * (
+            int(object_key.split("/")[-1][:-3]) + 1
+        )
+        return {"Body": StreamingBody(io.BytesIO(content), len(content))}
+
+    monkeypatch.setattr(ConfiguredBoto3Session, "get_object", get_object)
+
+
+@pytest.fixture
+def offline_credentials(monkeypatch):
+    monkeypatch.setattr(
+        request_structure,
+        "get_and_check_username_password",
+        lambda username, password, credentials_file: (username, password),
+    )
+
+
+def write_archive(tmp_path, archive: str) -> pathlib.Path:
+    download_files_to_archive(
+        "username",
+        "https://s3.example.com",
+        BUCKET,
+        iter(s3_files(tmp_path)),
+        ArchiveWriter(archive, tmp_path),
+        max_concurrent_requests=4,
+        disable_progress_bar=True,
+    )
+    return tmp_path / archive
+
+
+class TestArchiveOutput:
+    def test_tar_keeps_the_order_and_the_metadata(
+        self, tmp_path, remote_objects
+    ):
+        with tarfile.open(write_archive(tmp_path, "data.tar")) as tar:
+            members = tar.getmembers()
+            assert [member.name for member in members] == [
+                f"product/dataset/{i}.nc" for i in range(20)
+            ]
+            member = members[3]
+            assert tar.extractfile(member).read() == (
+                b"native/product/dataset/3.nc" * 4
+            )
+            assert member.pax_headers[PAX_HEADER_S3_URL] == (
+                f"s3://{BUCKET}/native/product/dataset/3.nc"
+            )
+            assert member.pax_headers[PAX_HEADER_ETAG] == '"etag-3"'
+            assert member.mtime == 1704067200
+
+    def test_zip(self, tmp_path, remote_objects):
+        with zipfile.ZipFile(write_archive(tmp_path, "data.zip")) as zip_file:
+            assert zip_file.namelist() == [
+                f"product/dataset/{i}.nc" for i in range(20)
+            ]
+            assert zip_file.read("product/dataset/0.nc") == (
+                b"native/product/dataset/0.nc"
+            )
+            assert zip_file.getinfo("product/dataset/0.nc").date_time == (
+                2024,
+                1,
+                1,
+                0,
+                0,
+                0,
+            )
+
+    def test_unknown_archive_format(self, offline_credentials):
+        with pytest.raises(ValueError, match="The output archive must be"):
+            create_get_archive_request("data.rar")
+
+    def test_zstd_is_required(self, offline_credentials, monkeypatch):
+        monkeypatch.setattr(
+            request_structure, "is_zstd_available", lambda: False
+        )
+        with pytest.raises(ValueError, match="'zstandard' is required"):
+            create_get_archive_request("data.tar.zst")
+
+    def test_archive_cannot_be_synchronized(self, offline_credentials):
+        with pytest.raises(ValueError, match="cannot be synchronized"):
+            create_get_archive_request("data.tar", skip_existing=True)
+
+
+def create_get_archive_request(output_archive, skip_existing=False):
+    return create_get_request(
+        dataset_id="cmems_obs-ins_glo_phybgcwav_mynrt_na_irr",
+        dataset_version=None,
+        dataset_part=None,
+        username="username",
+        password="password",
+        credentials_file=None,
+        no_directories=False,
+        output_directory=None,
+        overwrite=False,
+        request_file=None,
+        filter=None,
+        regex=None,
+        file_list=None,
+        create_file_list=None,
+        sync=False,
+        sync_delete=False,
+        skip_existing=skip_existing,
+        index_parts=False,
+        dry_run=False,
+        max_concurrent_requests=15,
+        disable_progress_bar=True,
+        output_archive=output_archive,
+    )
@@ -0,0 +1,153 @@
+import json
+
+import pytest
+
+from copernicusmarine.core_functions import request_structure
+from copernicusmarine.core_functions.request_structure import (
+    GetRequest,
+    create_get_requests,
+)
+from copernicusmarine.download_functions import download_original_files
+
+ENDPOINT = "https://s3.example.com"
+
+
+def get_request(dataset: str, output_directory, **kwargs) -> GetRequest:
+    return GetRequest(
+        dataset_id=dataset,
+        username="username",
+        dataset_url=f"{ENDPOINT}/bucket/native/PRODUCT/{dataset}_202311/",
+        output_directory=output_directory,
+        **kwargs,
+    )
+
+
+def download_batch(get_requests):
+    return download_original_files.download_original_files_batch(
+        "username",
+        get_requests,
+        max_concurrent_requests=3,
+        disable_progress_bar=True,
+    )
+
+
+class TestBatchGet:
+    def test_files_of_all_the_requests_are_downloaded(
+        self, tmp_path, remote_files
+    ):
+        response = download_batch(
+            [get_request(f"dataset_{index}", tmp_path) for index in range(6)]
+        )
+        assert len(remote_files.downloaded) == 30
+        assert response.number_of_files_to_download == 30
+        assert response.status == "000"
+        assert [file.filename for file in response.files[:5]] == [
+            f"file_{index}.nc" for index in range(5)
+        ]
+        assert (
+            tmp_path / "PRODUCT" / "dataset_5_202311" / "file_4.nc"
+        ).exists()
+
+    def test_dry_run_requests_are_not_downloaded(self, tmp_path, remote_files):
+        response = download_batch(
+            [
+                get_request("dataset_0", tmp_path),
+                get_request("dataset_1", tmp_path, dry_run=True),
+            ]
+        )
+        assert len(remote_files.downloaded) == 5
+        assert len(response.files) == 10
+        assert response.status == "000"
+
+    def test_error_stops_the_batch(self, tmp_path, remote_files):
+        with pytest.raises(OSError, match="Connection reset"):
+            download_batch(
+                [
+                    get_request("dataset_0", tmp_path),
+                    get_request("broken", tmp_path),
+                    get_request("dataset_2", tmp_path),
+                ]
+            )
+
+
+class TestBatchRequestFile:
+    @pytest.fixture(autouse=True)
+    def offline_credentials(self, monkeypatch):
+        monkeypatch.setattr(
+            request_structure,
+            "get_and_check_username_password",
+            lambda username, password, credentials_file: (username, password),
+        )
+
+    def create_get_requests(self, request_file, **kwargs):
+        arguments = {
+            "dataset_id": None,
+            "dataset_version": None,
+            "dataset_part": None,
+            "username": "username",
+            "password": "password",
+            "credentials_file": None,
+            "no_directories": False,
+            "output_directory": None,
+            "overwrite": False,
+            "filter": None,
+            "regex": None,
+            "file_list": None,
+            "create_file_list": None,
+            "sync": False,
+            "sync_delete": False,
+            "skip_existing": False,
+            "index_parts": False,
+            "dry_run": False,
+            "max_concurrent_requests": 15,
+            "disable_progress_bar": True,
+        }
+        arguments.update(kwargs)
+        return create_get_requests(request_file=request_file, **arguments)
+
+    def test_list_of_requests(self, tmp_path):
+        request_file = tmp_path / "requests.json"
+        request_file.write_text(
+            json.dumps(
+                [
+                    {
+                        "dataset_id": "cmems_mod_glo_phy_anfc_0.083deg_P1D-m",
+                        "filter": "*2024*",
+                    },
+                    {
+                        "dataset_id": "cmems_obs-ins_glo_phybgcwav_mynrt_na_irr",
+                        "dataset_part": "history",
+                    },
+                ]
+            )
+        )
+        get_requests = self.create_get_requests(
+            request_file, output_directory=tmp_path
+        )
+        assert [request.dataset_id for request in get_requests] == [
+            "cmems_mod_glo_phy_anfc_0.083deg_P1D-m",
+            "cmems_obs-ins_glo_phybgcwav_mynrt_na_irr",
+        ]
+        assert get_requests[0].regex is not None
+        assert get_requests[1].regex is None
+        assert get_requests[1].dataset_part == "history"
+        assert all(
+            request.output_directory == tmp_path for request in get_requests
+        )
+
+    def test_dataset_id_argument_with_a_list_of_requests(self, tmp_path):
+        request_file = tmp_path / "requests.json"
+        request_file.write_text(json.dumps([{"dataset_id": "dataset"}]))
+        with pytest.raises(ValueError, match="list of requests"):
+            self.create_get_requests(request_file, dataset_id="dataset")
+
+    @pytest.mark.parametrize(
+        "option", ["username", "password", "credentials_file"]
+    )
+    def test_credentials_in_a_list_of_requests(self, tmp_path, option):
+        request_file = tmp_path / "requests.json"
+        request_file.write_text(
+            json.dumps([{"dataset_id": "dataset", option: "value"}])
+        )
+        with pytest.raises(ValueError, match=option):
+            self.create_get_requests(request_file)
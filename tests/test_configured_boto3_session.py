@@ -0,0 +1,110 @@
+import io
+from datetime import datetime, timezone
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from copernicusmarine.core_functions import resumable_download, sessions
+from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
+
+
+class TestConfiguredBoto3Session:
+    def test_download_file_with_known_size_does_not_send_head_request(
+        self, tmp_path
+    ):
+        content = b"some netcdf bytes"
+        last_modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        output_file = tmp_path / "file.nc"
+        with ConfiguredBoto3Session(
+            "https://s3.example.com", ["GetObject"]
+        ) as session:
+            with Stubber(session.s3_client) as stubber:
+                # any HEAD request would fail with an unexpected call
+                stubber.add_response(
+                    "get_object",
+                    {
+                        "Body": StreamingBody(
+                            io.BytesIO(content), len(content)
+                        ),
+                        "ContentLength": len(content),
+                        "LastModified": last_modified,
+                        "ETag": '"etag"',
+                    },
+                )
+                get_last_modified = session.download_file(
+                    "bucket",
+                    "native/product/dataset/file.nc",
+                    str(output_file),
+                    size=len(content),
+                    etag='"etag"',
+                )
+                stubber.assert_no_pending_responses()
+
+        assert get_last_modified == last_modified
+        assert output_file.read_bytes() == content
+
+    def test_interrupted_download_is_resumed_with_ranges(
+        self, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(sessions, "RESUMABLE_DOWNLOAD_CHUNK_SIZE", 8)
+        monkeypatch.setattr(
+            resumable_download, "RESUMABLE_DOWNLOAD_CHUNK_SIZE", 8
+        )
+        monkeypatch.setattr(
+            resumable_download, "RESUMABLE_DOWNLOAD_ATTEMPTS", 1
+        )
+        content = b"0123456789abcdefghij"
+        last_modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        output_file = tmp_path / "file.nc"
+
+        def add_range_response(stubber: Stubber, start: int, end: int):
+            stubber.add_response(
+                "get_object",
+                {
+                    "Body": StreamingBody(
+                        io.BytesIO(content[start:end]), end - start
+                    ),
+                    "ContentLength": end - start,
+                    "LastModified": last_modified,
+                    "ETag": '"etag"',
+                },
+                {
+                    "Bucket": "bucket",
+                    "Key": "file.nc",
+                    "Range": f"bytes={start}-{end - 1}",
+                    "IfMatch": '"etag"',
+                },
+            )
+
+        def download(session: ConfiguredBoto3Session):
+            return session.download_file(
+                "bucket",
+                "file.nc",
+                str(output_file),
+                size=len(content),
+                etag='"etag"',
+            )
+
+        with ConfiguredBoto3Session(
+            "https://s3.example.com", ["GetObject"]
+        ) as session:
+            session.use_threads = False
+            with Stubber(session.s3_client) as stubber:
+                add_range_response(stubber, 0, 8)
+                stubber.add_client_error("get_object", http_status_code=500)
+                with pytest.raises(ClientError):
+                    download(session)
+            assert not output_file.exists()
+            assert (tmp_path / "file.nc.part").exists()
+
+            with Stubber(session.s3_client) as stubber:
+                # the first range is not requested again
+                add_range_response(stubber, 8, 16)
+                add_range_response(stubber, 16, 20)
+                assert download(session) == last_modified
+                stubber.assert_no_pending_responses()
+
+        assert output_file.read_bytes() == content
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["file.nc"]
@@ -78,6 +78,11 @@ class TestDocumentation:
                     "Only available for platform chunked datasets."
                 ]
                 continue
+            if name_of_variable in ["qc_flags", "value_ranges"]:
+                assert parameter_desc[-1].endswith(
+                    "Only available for sparse datasets."
+                )
+                continue
             if name_of_variable in LIST_OF_EXCEPTIONS:
                 continue
             assert parameter_desc == [
@@ -157,6 +162,11 @@ class TestDocumentation:
                     "Only available for platform chunked datasets."
                 ]
                 continue
+            if name_of_variable in ["qc_flags", "value_ranges"]:
+                assert parameter_desc[-1].endswith(
+                    "Only available for sparse datasets."
+                )
+                continue
             if name_of_variable == "dataset_id":
                 assert parameter_desc == ["The datasetID, required."]
                 continue
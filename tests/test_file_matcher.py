@@ -0,0 +1,82 @@
+import fnmatch
+import re
+
+from copernicusmarine.core_functions.request_structure import (
+    overload_regex_with_additional_filter,
+)
+from copernicusmarine.download_functions.file_matcher import (
+    FileMatcher,
+    split_literals_and_patterns,
+)
+
+DATASET_URL = "s3://bucket/native/PRODUCT/dataset_202311/"
+FILENAMES = [
+    DATASET_URL + "index_history.txt",
+    DATASET_URL + "history/BO/AR_PR_BO_58JM.nc",
+    DATASET_URL + "history/BO/AR_PR_BO_58JM.nc.md5",
+    DATASET_URL + "history/MO/AR_PR_MO_58JM.nc",
+    DATASET_URL + "2021/01/file_20210101.nc",
+    DATASET_URL + "2021/02/file_20210201.nc",
+    DATASET_URL + "2022/01/file_20220101.nc",
+]
+
+
+def file_list_regex(lines: list[str]) -> str:
+    return "|".join(map(re.escape, lines))
+
+
+class TestFileMatcher:
+    def test_same_result_as_regex_search(self):
+        file_list = file_list_regex(
+            [
+                DATASET_URL + "2021/01/file_20210101.nc",
+                "history/BO/AR_PR_BO_58JM.nc",
+                "58JM",
+                "MO/AR_",
+                "2022/",
+                "/2022",
+            ]
+        )
+        regexes = [
+            file_list,
+            fnmatch.translate("*2021*"),
+            ".*_20(21|22)0201.*.nc",
+            overload_regex_with_additional_filter(
+                file_list, fnmatch.translate("*index_*")
+            ),
+            overload_regex_with_additional_filter(
+                file_list_regex(["2022/01"]),
+                overload_regex_with_additional_filter(
+                    ".*(md5)$", file_list_regex(["history/MO"])
+                ),
+            ),
+            file_list_regex(["does/not/exist.nc", "nothing"]),
+            file_list_regex(["history/BO/AR_PR_BO_58JM.nc", ""]),
+            r"(a)|\1",
+            r"[(|]|2021/01",
+            r"(?i)foo|s3://bucket/NATIVE/product/dataset_202311/2021",
+        ]
+        for regex in regexes:
+            file_matcher = FileMatcher(regex)
+            for filename in FILENAMES:
+                assert file_matcher.search(filename) == bool(
+                    re.search(regex, filename)
+                ), (regex, filename)
+
+    def test_no_regex_matches_everything(self):
+        assert FileMatcher(None).search(FILENAMES[0])
+        assert FileMatcher("").search(FILENAMES[0])
+
+    def test_file_list_is_split_into_literals(self):
+        lines = [f"{DATASET_URL}2021/{day:05d}.nc" for day in range(10_000)]
+        filter_regex = fnmatch.translate("*index_*")
+        literals, patterns = split_literals_and_patterns(
+            overload_regex_with_additional_filter(
+                file_list_regex(lines), filter_regex
+            )
+        )
+        assert sorted(literals) == sorted(lines)
+        assert patterns == [filter_regex]
+        file_matcher = FileMatcher(file_list_regex(lines))
+        assert file_matcher.search(lines[-1])
+        assert not file_matcher.search(f"{DATASET_URL}2021/10000.nc")
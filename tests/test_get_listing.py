@@ -0,0 +1,236 @@
+import fnmatch
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from copernicusmarine.core_functions.request_structure import (
+    overload_regex_with_additional_filter,
+)
+from copernicusmarine.download_functions import download_original_files
+from copernicusmarine.download_functions.download_original_files import (
+    _list_objects_partitioned,
+)
+from copernicusmarine.download_functions.listing_prefixes import (
+    get_listing_prefixes,
+)
+from copernicusmarine.download_functions.local_files_index import (
+    LocalFilesIndex,
+)
+
+DATASET_PREFIX = "native/PRODUCT/dataset_202311/"
+KEYS = [
+    DATASET_PREFIX + "README.txt",
+    *[
+        f"{DATASET_PREFIX}{year}/{month:02d}/file_{year}{month:02d}.nc"
+        for year in range(2000, 2010)
+        for month in range(1, 13)
+    ],
+]
+
+
+class FakePaginator:
+    def __init__(self, keys: list[str]):
+        self.keys = keys
+
+    def paginate(self, Bucket: str, Prefix: str, Delimiter: str):
+        contents = []
+        common_prefixes: set[str] = set()
+        for key in self.keys:
+            if not key.startswith(Prefix):
+                continue
+            rest = key[len(Prefix) :]
+            if Delimiter and Delimiter in rest:
+                common_prefixes.add(
+                    Prefix + rest.split(Delimiter)[0] + Delimiter
+                )
+            else:
+                contents.append({"Key": key})
+        yield {
+            "Contents": contents,
+            "CommonPrefixes": [
+                {"Prefix": common_prefix}
+                for common_prefix in sorted(common_prefixes)
+            ],
+        }
+
+
+class FakeSession:
+    def __init__(self, keys: list[str]):
+        self.prefixes_listed: list[tuple[str, str]] = []
+        paginator = FakePaginator(keys)
+
+        def get_paginator(operation_name: str):
+            assert operation_name == "list_objects_v2"
+            return SimpleNamespace(paginate=self._record(paginator.paginate))
+
+        self.s3_client = SimpleNamespace(get_paginator=get_paginator)
+
+    def _record(self, paginate):
+        def recorded_paginate(Bucket: str, Prefix: str, Delimiter: str):
+            self.prefixes_listed.append((Prefix, Delimiter))
+            return paginate(Bucket, Prefix, Delimiter)
+
+        return recorded_paginate
+
+
+class TestGetListing:
+    def test_partitioned_listing_lists_every_file_once(self):
+        session = FakeSession(KEYS)
+        listed_keys = [
+            s3_object["Key"]
+            for contents in _list_objects_partitioned(
+                session, "bucket", [DATASET_PREFIX], 15  # type: ignore
+            )
+            for s3_object in contents
+        ]
+        assert sorted(listed_keys) == sorted(KEYS)
+        # year folders are not enough for 15 workers: months are used
+        recursive_listings = [
+            prefix
+            for prefix, delimiter in session.prefixes_listed
+            if not delimiter
+        ]
+        assert len(recursive_listings) == 10 * 12
+
+    def test_partitioned_listing_without_concurrency(self):
+        session = FakeSession(KEYS)
+        listed_keys = [
+            s3_object["Key"]
+            for contents in _list_objects_partitioned(
+                session, "bucket", [DATASET_PREFIX], 0  # type: ignore
+            )
+            for s3_object in contents
+        ]
+        assert sorted(listed_keys) == sorted(KEYS)
+        assert session.prefixes_listed == [(DATASET_PREFIX, "")]
+
+    def test_listing_prefixes_from_anchored_filter(self):
+        assert get_listing_prefixes(
+            fnmatch.translate(f"s3://bucket/{DATASET_PREFIX}2003/*"),
+            "bucket",
+            DATASET_PREFIX,
+        ) == [DATASET_PREFIX + "2003/"]
+        assert get_listing_prefixes(
+            f"^s3://bucket/{DATASET_PREFIX}200[3-4]/(01|12)/",
+            "bucket",
+            DATASET_PREFIX,
+        ) == [
+            DATASET_PREFIX + "2003/01/",
+            DATASET_PREFIX + "2003/12/",
+            DATASET_PREFIX + "2004/01/",
+            DATASET_PREFIX + "2004/12/",
+        ]
+        # shorter than the dataset prefix or another bucket
+        assert get_listing_prefixes(
+            "^s3://bucket/native/.*", "bucket", DATASET_PREFIX
+        ) == [DATASET_PREFIX]
+        assert (
+            get_listing_prefixes(
+                "^s3://other-bucket/native/.*", "bucket", DATASET_PREFIX
+            )
+            == []
+        )
+
+    def test_listing_prefixes_fall_back_to_the_whole_dataset(self):
+        for regex in [
+            None,
+            fnmatch.translate("*2003*"),
+            ".*_200[0-2].*",
+            "2003/01/file_200301.nc",
+            "(?i)^s3://bucket/native/product/",
+            overload_regex_with_additional_filter(
+                re.escape(f"s3://bucket/{DATASET_PREFIX}2003/01/a.nc"),
+                fnmatch.translate("*2004*"),
+            ),
+        ]:
+            assert get_listing_prefixes(regex, "bucket", DATASET_PREFIX) == [
+                DATASET_PREFIX
+            ]
+
+    def test_listing_prefixes_from_file_list(self):
+        files = [
+            f"s3://bucket/{DATASET_PREFIX}{year}/{month:02d}/"
+            f"file_{year}{month:02d}_{day:02d}.nc"
+            for year in (2003, 2004)
+            for month in range(1, 13)
+            for day in range(1, 29)
+        ]
+        regex = "|".join(map(re.escape, files))
+        # too many files: their month folders are listed instead
+        assert get_listing_prefixes(regex, "bucket", DATASET_PREFIX) == [
+            f"{DATASET_PREFIX}{year}/{month:02d}/"
+            for year in (2003, 2004)
+            for month in range(1, 13)
+        ]
+        assert get_listing_prefixes(
+            "|".join(map(re.escape, files[:2])), "bucket", DATASET_PREFIX
+        ) == [file.removeprefix("s3://bucket/") for file in files[:2]]
+
+    def test_partitioned_listing_of_narrowed_prefixes(self):
+        session = FakeSession(KEYS)
+        regex = fnmatch.translate(f"s3://bucket/{DATASET_PREFIX}2003/*")
+        listed_keys = [
+            s3_object["Key"]
+            for contents in _list_objects_partitioned(
+                session,  # type: ignore
+                "bucket",
+                get_listing_prefixes(regex, "bucket", DATASET_PREFIX),
+                15,
+            )
+            for s3_object in contents
+        ]
+        assert sorted(listed_keys) == [
+            key for key in KEYS if re.search(regex, "s3://bucket/" + key)
+        ]
+        assert all(
+            prefix.startswith(DATASET_PREFIX + "2003/")
+            for prefix, _ in session.prefixes_listed
+        )
+
+    def test_direct_download_headers_are_resolved_concurrently(
+        self, tmp_path, monkeypatch
+    ):
+        threads_used = set()
+
+        def get_file_size_last_modified_and_etag(session, bucket, file_in):
+            threads_used.add(threading.get_ident())
+            time.sleep(0.01)
+            if "missing" in file_in:
+                return None
+            return 1, datetime(2023, 1, 1, tzinfo=timezone.utc), '"etag"'
+
+        monkeypatch.setattr(
+            download_original_files,
+            "_get_file_size_last_modified_and_etag",
+            get_file_size_last_modified_and_etag,
+        )
+        files_to_download = [
+            f"dataset_202311/2003/{month:02d}/file_2003{month:02d}.nc"
+            for month in range(1, 13)
+        ] + ["dataset_202311/2003/01/missing.nc"]
+        files_not_found: list[str] = []
+        s3_files = list(
+            download_original_files._download_header_for_direct_download(
+                files_to_download=files_to_download,
+                files_not_found=files_not_found,
+                endpoint_url="https://s3.example.com",
+                bucket="bucket",
+                path=DATASET_PREFIX,
+                sync=False,
+                directory_out=tmp_path,
+                username="username",
+                no_directories=False,
+                overwrite=False,
+                skip_existing=False,
+                local_files_index=LocalFilesIndex(),
+                max_concurrent_requests=4,
+            )
+        )
+        assert files_not_found == ["dataset_202311/2003/01/missing.nc"]
+        assert sorted(s3_file.filename_in for s3_file in s3_files) == [
+            f"s3://bucket/{DATASET_PREFIX}{file_to_download[15:]}"
+            for file_to_download in files_to_download[:-1]
+        ]
+        assert len(threads_used) > 1
@@ -0,0 +1,269 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+from botocore.exceptions import ClientError
+
+from copernicusmarine.core_functions.request_structure import (
+    GetRequest,
+    SubsetRequest,
+)
+from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
+from copernicusmarine.download_functions import (
+    download_original_files,
+    download_sparse,
+    index_files,
+)
+from copernicusmarine.download_functions.index_files import (
+    IndexFilter,
+    get_files_to_download_from_index_files,
+    get_platforms_coverage,
+    read_index_file,
+    select_files_from_index,
+)
+
+DATASET_ROOT = "native/INSITU_PRODUCT/dataset_202311/"
+DATASET_URL = f"https://s3.example.com/bucket/{DATASET_ROOT}history"
+LAST_MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+FTP_ROOT = "ftp://nrt.cmems-du.eu/Core/INSITU_PRODUCT/dataset"
+INDEX_HISTORY = f"""# Title : Dataset index
+# Index update : 20240101
+catalog_id,file_name,geospatial_lat_min,geospatial_lat_max,geospatial_lon_min,geospatial_lon_max,time_coverage_start,time_coverage_end,provider,date_update,data_mode,parameters
+COP-GLOBAL-01,{FTP_ROOT}/history/PF/GL_PR_PF_6901234.nc,10.0,20.0,-30.0,-20.0,2020-01-01T00:00:00Z,2020-06-30T00:00:00Z,Coriolis,2024-01-01T00:00:00Z,R,TEMP PSAL
+COP-GLOBAL-01,{FTP_ROOT}/history/MO/GL_TS_MO_41001.nc,35.0,35.1,-72.0,-71.9,2010-01-01T00:00:00Z,2023-12-31T00:00:00Z,NDBC,2024-01-01T00:00:00Z,R,TEMP
+COP-GLOBAL-01,{FTP_ROOT}/history/MO/GL_TS_MO_51004.nc,17.0,17.5,179.0,179.5,2019-01-01T00:00:00Z,2021-12-31T00:00:00Z,NDBC,2024-01-01T00:00:00Z,R,TEMP
+COP-GLOBAL-01,{FTP_ROOT}/latest/20240101/GL_LATEST_PR_PF_6901234_20240101.nc,15.0,15.0,-25.0,-25.0,2024-01-01T00:00:00Z,2024-01-01T12:00:00Z,Coriolis,2024-01-01T00:00:00Z,R,TEMP
+"""  # noqa: E501
+INDEX_PLATFORM = """# Title : Platforms
+platform_code,creation_date,update_date,wmo_platform_code,data_source,institution,institution_edmo_code,parameter,last_latitude_observation,last_longitude_observation,last_date_observation
+6901234,2020-01-01T00:00:00Z,2024-01-01T00:00:00Z,6901234,PF,Coriolis,123,TEMP,15.0,-25.0,2024-01-01T12:00:00Z
+"""  # noqa: E501
+
+
+@pytest.fixture
+def index_history(tmp_path):
+    index_file = tmp_path / "index_history.txt"
+    index_file.write_text(INDEX_HISTORY)
+    return index_file
+
+
+@pytest.fixture
+def fake_bucket(tmp_path, monkeypatch):
+    """
+    A dataset whose root holds the index files. Returns the listed
+    prefixes and the downloaded keys.
+    """
+    monkeypatch.setattr(
+        index_files, "INDEX_FILES_CACHE_DIRECTORY", tmp_path / "cache"
+    )
+    listed_prefixes = []
+    downloaded_keys = []
+
+    def list_files(username, endpoint_url, bucket, prefix, recursive, *a, **k):
+        listed_prefixes.append((prefix, recursive))
+        for name in ("index_history.txt", "index_platform.txt"):
+            yield (
+                f"s3://{bucket}/{prefix}{name}",
+                10,
+                LAST_MODIFIED,
+                '"a"',
+            )
+
+    def download_file(session, bucket, object_key, file_path, **kwargs):
+        downloaded_keys.append(object_key)
+        with open(file_path, "w") as file:
+            if object_key.endswith("index_history.txt"):
+                file.write(INDEX_HISTORY)
+            elif object_key.endswith("index_platform.txt"):
+                file.write(INDEX_PLATFORM)
+            else:
+                file.write("data")
+
+    monkeypatch.setattr(
+        download_original_files,
+        "_list_files_on_marine_data_lake_s3",
+        list_files,
+    )
+    monkeypatch.setattr(
+        download_original_files,
+        "_get_file_size_last_modified_and_etag",
+        lambda session, bucket, file_in: (4, LAST_MODIFIED, '"b"'),
+    )
+    monkeypatch.setattr(ConfiguredBoto3Session, "download_file", download_file)
+    return listed_prefixes, downloaded_keys
+
+
+def selected_files(index_file, **filters) -> list[str]:
+    index = read_index_file(index_file)
+    return [
+        file_name.split("/")[-1]
+        for file_name in select_files_from_index(index, IndexFilter(**filters))
+    ]
+
+
+class TestIndexFiles:
+    def test_select_by_area(self, index_history):
+        assert selected_files(
+            index_history,
+            minimum_longitude=-80,
+            maximum_longitude=-60,
+            minimum_latitude=30,
+        ) == ["GL_TS_MO_41001.nc"]
+
+    def test_select_across_the_antimeridian(self, index_history):
+        assert selected_files(
+            index_history, minimum_longitude=170, maximum_longitude=190
+        ) == ["GL_TS_MO_51004.nc"]
+
+    def test_select_by_time(self, index_history):
+        assert selected_files(
+            index_history,
+            start_datetime=datetime(2020, 3, 1),
+            end_datetime=datetime(2020, 4, 1, tzinfo=timezone.utc),
+        ) == ["GL_PR_PF_6901234.nc", "GL_TS_MO_41001.nc", "GL_TS_MO_51004.nc"]
+
+    def test_select_by_platform(self, index_history):
+        assert selected_files(
+            index_history, platform_ids=["6901234___PF"]
+        ) == ["GL_PR_PF_6901234.nc", "GL_LATEST_PR_PF_6901234_20240101.nc"]
+
+    def test_platform_code_is_the_whole_field(self, tmp_path):
+        index_file = tmp_path / "index_history.txt"
+        index_file.write_text(
+            INDEX_HISTORY.replace("6901234", "AB_CD").replace("41001", "AB")
+        )
+        assert selected_files(index_file, platform_ids=["AB"]) == [
+            "GL_TS_MO_AB.nc"
+        ]
+        assert selected_files(index_file, platform_ids=["AB_CD"]) == [
+            "GL_PR_PF_AB_CD.nc",
+            "GL_LATEST_PR_PF_AB_CD_20240101.nc",
+        ]
+        assert selected_files(index_file, platform_ids=["CD"]) == []
+
+    def test_index_of_platforms_is_ignored(self, tmp_path):
+        index_file = tmp_path / "index_platform.txt"
+        index_file.write_text(INDEX_PLATFORM)
+        assert read_index_file(index_file) is None
+
+    def test_paths_are_mapped_to_the_dataset_part(self, index_history):
+        assert get_files_to_download_from_index_files(
+            index_files=[index_history],
+            index_filter=IndexFilter(platform_ids=["6901234"]),
+            dataset_id="dataset",
+            bucket="bucket",
+            dataset_root_path=DATASET_ROOT,
+            path=DATASET_ROOT + "history",
+            regex=None,
+        ) == [f"s3://bucket/{DATASET_ROOT}history/PF/GL_PR_PF_6901234.nc"]
+
+    def test_get_does_not_list_the_dataset(self, tmp_path, fake_bucket):
+        listed_prefixes, downloaded_keys = fake_bucket
+
+        def get():
+            return download_original_files.download_original_files(
+                username="username",
+                get_request=GetRequest(
+                    dataset_id="dataset",
+                    username="username",
+                    dataset_url=DATASET_URL,
+                    output_directory=tmp_path / "output",
+                    minimum_latitude=30,
+                ),
+                max_concurrent_requests=2,
+                disable_progress_bar=True,
+                create_file_list=None,
+            )
+
+        response = get()
+        assert listed_prefixes == [(DATASET_ROOT, False)]
+        assert sorted(file.s3_url for file in response.files) == [
+            f"s3://bucket/{DATASET_ROOT}history/MO/GL_TS_MO_41001.nc"
+        ]
+        assert sorted(downloaded_keys) == [
+            f"{DATASET_ROOT}history/MO/GL_TS_MO_41001.nc",
+            f"{DATASET_ROOT}index_history.txt",
+            f"{DATASET_ROOT}index_platform.txt",
+        ]
+
+        # the index files are cached while their ETag does not change
+        downloaded_keys.clear()
+        get()
+        assert downloaded_keys == [
+            f"{DATASET_ROOT}history/MO/GL_TS_MO_41001.nc"
+        ]
+
+    def test_platforms_coverage(self, tmp_path, index_history):
+        index_platform = tmp_path / "index_platform.txt"
+        index_platform.write_text(INDEX_PLATFORM)
+        index_latest = tmp_path / "index_latest.txt"
+        index_latest.write_text(
+            INDEX_HISTORY.replace("-30.0,-20.0", "170.0,-170.0")
+            .replace("-72.0", "")
+            .replace("GL_TS_MO_51004", "GL_TS_MO_52004")
+        )
+        coverage = get_platforms_coverage([index_history, index_platform])
+        assert coverage.loc["6901234"].tolist() == [
+            10.0,
+            20.0,
+            -30.0,
+            -20.0,
+            pd.Timestamp("2020-01-01T00:00:00Z"),
+            pd.Timestamp("2024-01-01T12:00:00Z"),
+        ]
+        assert sorted(coverage.index) == ["41001", "51004", "6901234"]
+        # A box across the antimeridian leaves the longitudes of the
+        # platform unknown, a missing bound leaves this bound unknown
+        coverage = get_platforms_coverage([index_history, index_latest])
+        longitudes = ["geospatial_lon_min", "geospatial_lon_max"]
+        assert coverage.loc["6901234", longitudes].isna().all()
+        assert pd.isna(coverage.loc["41001", "geospatial_lon_min"])
+        assert coverage.loc["41001", "geospatial_lon_max"] == -71.9
+        assert coverage.loc["51004", "geospatial_lon_max"] == 179.5
+        assert coverage.loc["52004", "geospatial_lon_min"] == 179.0
+        assert get_platforms_coverage([index_platform]) is None
+
+    def test_sparse_subset_reads_the_cached_index_files(
+        self, fake_bucket, monkeypatch
+    ):
+        listed_prefixes, downloaded_keys = fake_bucket
+
+        def coverage(**kwargs):
+            return download_sparse._get_platforms_coverage(
+                "username",
+                SubsetRequest(
+                    dataset_id="dataset",
+                    username="username",
+                    **{"prefilter_platforms": True, **kwargs},
+                ),
+                DATASET_URL,
+                True,
+            )
+
+        assert coverage() is None
+        # The pre-filter is opt-in
+        assert coverage(minimum_y=30, prefilter_platforms=False) is None
+        assert listed_prefixes == []
+        assert sorted(coverage(minimum_y=30).index) == [
+            "41001",
+            "51004",
+            "6901234",
+        ]
+        assert listed_prefixes == [(DATASET_ROOT, False)]
+        assert sorted(downloaded_keys) == [
+            f"{DATASET_ROOT}index_history.txt",
+            f"{DATASET_ROOT}index_platform.txt",
+        ]
+        # Cached
+        coverage(minimum_y=30)
+        assert len(downloaded_keys) == 2
+
+        def list_files(*args, **kwargs):
+            raise ClientError({}, "ListObjects")
+
+        monkeypatch.setattr(
+            download_original_files,
+            "_list_files_on_marine_data_lake_s3",
+            list_files,
+        )
+        assert coverage(minimum_y=30) is None
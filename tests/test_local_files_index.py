@@ -0,0 +1,62 @@
+import os
+
+from copernicusmarine.download_functions.local_files_index import (
+    LocalFilesIndex,
+)
+
+
+class TestLocalFilesIndex:
+    def test_existing_files_are_indexed_with_size_and_time(self, tmp_path):
+        file_path = tmp_path / "product" / "dataset" / "2023" / "file.nc"
+        file_path.parent.mkdir(parents=True)
+        file_path.write_bytes(b"12345")
+        os.utime(file_path, (1_000_000, 1_000_000))
+
+        local_files_index = LocalFilesIndex()
+        assert local_files_index.is_file(file_path)
+        assert not local_files_index.is_file(file_path.parent)
+        assert not local_files_index.is_file(tmp_path / "missing.nc")
+        assert local_files_index.get_size_and_modification_time(file_path) == (
+            5,
+            1_000_000,
+        )
+        assert (
+            local_files_index.get_size_and_modification_time(
+                tmp_path / "missing" / "file.nc"
+            )
+            is None
+        )
+
+    def test_unique_filepaths_are_reserved(self, tmp_path):
+        (tmp_path / "file.nc").touch()
+        local_files_index = LocalFilesIndex()
+
+        first_path = local_files_index.get_unique_filepath(
+            tmp_path / "file.nc"
+        )
+        second_path = local_files_index.get_unique_filepath(
+            tmp_path / "file.nc"
+        )
+        other_path = local_files_index.get_unique_filepath(
+            tmp_path / "other.nc"
+        )
+        assert first_path == tmp_path / "file_(1).nc"
+        assert second_path == tmp_path / "file_(2).nc"
+        assert other_path == tmp_path / "other.nc"
+
+    def test_iter_files_is_recursive(self, tmp_path):
+        expected_files = {
+            tmp_path / "a.nc",
+            tmp_path / "2023" / "01" / "b.nc",
+            tmp_path / "2023" / "02" / "c.nc",
+        }
+        for file_path in expected_files:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.touch()
+        # The files of an interrupted download
+        (tmp_path / "a.nc.part").touch()
+        (tmp_path / "a.nc.part.json").touch()
+
+        local_files_index = LocalFilesIndex()
+        assert set(local_files_index.iter_files(tmp_path)) == expected_files
+        assert not list(local_files_index.iter_files(tmp_path / "missing"))
@@ -0,0 +1,249 @@
+import copy
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from copernicusmarine.core_functions.request_structure import SubsetRequest
+from copernicusmarine.download_functions import (
+    download_sparse,
+    platforms_metadata,
+)
+from copernicusmarine.download_functions.download_sparse import (
+    _get_entity_ids_to_subset,
+)
+from copernicusmarine.download_functions.index_files import (
+    get_platforms_coverage,
+)
+from copernicusmarine.download_functions.platforms_metadata import (
+    PlatformsMetadata,
+    get_platforms_metadata,
+)
+from tests.test_index_files import INDEX_HISTORY, INDEX_PLATFORM
+from tests.test_sparse_transform_dataframe import PLATFORMS_METADATA
+
+METADATA_URL = "https://s3.example.com/bucket/platformSeries.json"
+RAW_PLATFORMS_METADATA = {
+    "dicts": {
+        "inst": {"0": "Coriolis"},
+        "doi": {"0": "https://doi.org/10.17882/42182"},
+    },
+    "platforms": {
+        "6901234___PF": {"ptype": "PF", "inst": "0", "doi": "0"},
+        "41001___MO": {"ptype": "MO"},
+    },
+}
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, etag: str):
+        self.status_code = status_code
+        self.headers = {"ETag": etag}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return RAW_PLATFORMS_METADATA
+
+
+class FakeConnection:
+    """
+    The platforms asset has the ETag "1" and answers 304 if it is sent.
+    """
+
+    requests: list[dict] = []
+
+    def __init__(self):
+        self.session = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def get_json_file(self, url):
+        return {"assets": {"platforms": {"href": "platforms.json"}}}
+
+    def get(self, url, headers, params):
+        self.requests.append(headers)
+        if headers.get("If-None-Match") == '"1"':
+            return FakeResponse(304, '"1"')
+        return FakeResponse(200, '"1"')
+
+
+@pytest.fixture
+def fake_connection(monkeypatch, tmp_path):
+    FakeConnection.requests = []
+    monkeypatch.setattr(
+        platforms_metadata, "JsonParserConnection", FakeConnection
+    )
+    monkeypatch.setattr(
+        platforms_metadata, "PLATFORMS_METADATA_CACHE_DIRECTORY", tmp_path
+    )
+    monkeypatch.setattr(platforms_metadata, "_platforms_metadata_by_url", {})
+    return FakeConnection
+
+
+def set_cache(monkeypatch, ttl: str, on_disk: bool):
+    monkeypatch.setattr(
+        platforms_metadata,
+        "COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_TTL",
+        ttl,
+    )
+    monkeypatch.setattr(
+        platforms_metadata,
+        "COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_CACHE",
+        on_disk,
+    )
+
+
+class TestPlatformsMetadata:
+    def test_entities(self):
+        cached = PlatformsMetadata(None, None, RAW_PLATFORMS_METADATA, 0)
+        assert cached.entities == PLATFORMS_METADATA
+        assert cached.entity_ids_by_platform_id == {
+            "6901234": ["6901234___PF"],
+            "41001": ["41001___MO"],
+        }
+
+    def test_kept_for_the_process(self, fake_connection, monkeypatch):
+        set_cache(monkeypatch, "600", False)
+        first = get_platforms_metadata(METADATA_URL)
+        assert get_platforms_metadata(METADATA_URL) is first
+        assert first.platforms_href == (
+            "https://s3.example.com/bucket/platforms.json"
+        )
+        assert fake_connection.requests == [{}]
+
+    def test_revalidated_with_the_etag(self, fake_connection, monkeypatch):
+        set_cache(monkeypatch, "0", False)
+        first = get_platforms_metadata(METADATA_URL)
+        assert get_platforms_metadata(METADATA_URL) is first
+        assert fake_connection.requests == [{}, {"If-None-Match": '"1"'}]
+
+    def test_on_disk(self, fake_connection, monkeypatch, tmp_path):
+        set_cache(monkeypatch, "600", True)
+        get_platforms_metadata(METADATA_URL)
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+        # Another process
+        monkeypatch.setattr(
+            platforms_metadata, "_platforms_metadata_by_url", {}
+        )
+        assert (
+            get_platforms_metadata(METADATA_URL).entities == PLATFORMS_METADATA
+        )
+        assert fake_connection.requests == [{}]
+        # Written through a unique temporary file
+        assert [path.name for path in tmp_path.iterdir()] == [
+            cache_file.name for cache_file in tmp_path.glob("*.json")
+        ]
+
+    def test_invalid_ttl(self, fake_connection, monkeypatch, caplog):
+        set_cache(monkeypatch, "ten minutes", False)
+        first = get_platforms_metadata(METADATA_URL)
+        assert get_platforms_metadata(METADATA_URL) is first
+        assert fake_connection.requests == [{}]
+        assert (
+            caplog.text.count(
+                "Ignoring COPERNICUSMARINE_SPARSE_PLATFORMS_METADATA_TTL"
+            )
+            == 1
+        )
+
+
+def subset_request(**kwargs) -> SubsetRequest:
+    return SubsetRequest(
+        dataset_id="cmems_obs-ins_glo_phybgcwav_mynrt_na_irr",
+        username="username",
+        **kwargs,
+    )
+
+
+class TestPlatformsPrefilter:
+    @pytest.fixture
+    def cached(self) -> PlatformsMetadata:
+        raw_platforms_metadata = copy.deepcopy(RAW_PLATFORMS_METADATA)
+        raw_platforms_metadata["platforms"]["unknown___TG"] = {"ptype": "TG"}
+        return PlatformsMetadata(None, None, raw_platforms_metadata, 0)
+
+    @pytest.fixture
+    def coverage(self, tmp_path) -> pd.DataFrame:
+        index_history = tmp_path / "index_history.txt"
+        index_history.write_text(INDEX_HISTORY)
+        index_platform = tmp_path / "index_platform.txt"
+        index_platform.write_text(INDEX_PLATFORM)
+        return get_platforms_coverage([index_history, index_platform])
+
+    def test_requested_platforms(self, cached, coverage):
+        assert _get_entity_ids_to_subset(
+            subset_request(minimum_y=30), ["6901234___PF"], cached, coverage
+        ) == ["6901234___PF"]
+
+    def test_without_coverage(self, cached):
+        assert (
+            _get_entity_ids_to_subset(
+                subset_request(minimum_y=30), [], cached, None
+            )
+            == []
+        )
+
+    def test_without_platforms_metadata(self, coverage):
+        cached = PlatformsMetadata(None, None, {}, 0)
+        assert (
+            _get_entity_ids_to_subset(
+                subset_request(minimum_y=60), [], cached, coverage
+            )
+            == []
+        )
+
+    def test_platforms_outside_are_left_out(self, cached, coverage):
+        # The platforms missing from the index files are kept
+        assert _get_entity_ids_to_subset(
+            subset_request(minimum_y=30), [], cached, coverage
+        ) == ["41001___MO", "unknown___TG"]
+        assert _get_entity_ids_to_subset(
+            subset_request(start_datetime=datetime(2024, 1, 1, 6)),
+            [],
+            cached,
+            coverage,
+        ) == ["6901234___PF", "unknown___TG"]
+        # All the platforms
+        assert (
+            _get_entity_ids_to_subset(
+                subset_request(minimum_x=-80, maximum_x=0),
+                [],
+                cached,
+                coverage,
+            )
+            == []
+        )
+
+    def test_too_many_platforms(self, cached, coverage, monkeypatch):
+        monkeypatch.setattr(download_sparse, "PREFILTER_MAXIMUM_PLATFORMS", 1)
+        assert (
+            _get_entity_ids_to_subset(
+                subset_request(minimum_y=30), [], cached, coverage
+            )
+            == []
+        )
+
+    def test_no_platform_can_have_data(self, coverage):
+        cached = PlatformsMetadata(None, None, RAW_PLATFORMS_METADATA, 0)
+        assert (
+            _get_entity_ids_to_subset(
+                subset_request(minimum_y=60, maximum_y=70),
+                [],
+                cached,
+                coverage,
+            )
+            is None
+        )
@@ -0,0 +1,141 @@
+import io
+from datetime import datetime, timezone
+
+import pytest
+import requests
+import urllib3
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from urllib3.response import HTTPResponse
+
+from copernicusmarine.core_functions import rate_limiter
+from copernicusmarine.core_functions.rate_limiter import TokenBucket
+from copernicusmarine.core_functions.sessions import (
+    ConfiguredBoto3Session,
+    ConfiguredRequestsSession,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def bytes_bucket(monkeypatch):
+    clock = FakeClock()
+    bucket = TokenBucket(100, clock=clock, sleep=clock.sleep)
+    monkeypatch.setattr(rate_limiter, "_bytes_bucket", bucket)
+    return clock
+
+
+@pytest.fixture
+def requests_bucket(monkeypatch):
+    clock = FakeClock()
+    bucket = TokenBucket(1, clock=clock, sleep=clock.sleep)
+    monkeypatch.setattr(rate_limiter, "_requests_bucket", bucket)
+    return clock
+
+
+class TestTokenBucket:
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+        for _ in range(10):
+            bucket.acquire()
+        assert clock.sleeps == []
+        bucket.acquire()
+        assert clock.sleeps == [pytest.approx(0.1)]
+
+    def test_debt_is_paid_back_by_the_next_callers(self):
+        clock = FakeClock()
+        bucket = TokenBucket(100, clock=clock, sleep=clock.sleep)
+        # more than the capacity of the bucket
+        bucket.acquire(300)
+        assert clock.now == pytest.approx(2)
+        bucket.acquire(100)
+        assert clock.now == pytest.approx(3)
+        clock.now += 10
+        bucket.acquire(100)
+        assert clock.now == pytest.approx(13)
+
+    def test_invalid_rates_are_ignored(self):
+        assert rate_limiter._parse_rate("NAME", "1e6") == 1e6
+        assert rate_limiter._parse_rate("NAME", None) is None
+        assert rate_limiter._parse_rate("NAME", "fast") is None
+        assert rate_limiter._parse_rate("NAME", "-1") is None
+
+
+class TestRateLimitedSessions:
+    def test_get_object_body_is_rate_limited(self, bytes_bucket):
+        content = b"x" * 300
+        with ConfiguredBoto3Session(
+            "https://s3.example.com", ["GetObject"]
+        ) as session:
+            with Stubber(session.s3_client) as stubber:
+                stubber.add_response(
+                    "get_object",
+                    {
+                        "Body": StreamingBody(
+                            io.BytesIO(content), len(content)
+                        ),
+                        "ContentLength": len(content),
+                        "LastModified": datetime(
+                            2024, 1, 1, tzinfo=timezone.utc
+                        ),
+                    },
+                )
+                response = session.get_object("bucket", "file.nc")
+                assert b"".join(response["Body"].iter_chunks(100)) == content
+        # 100 bytes in the bucket, the other 200 bytes at 100 bytes/s
+        assert bytes_bucket.now == pytest.approx(2)
+
+    def test_streamed_response_is_rate_limited(
+        self, bytes_bucket, monkeypatch
+    ):
+        content = b"x" * 300
+
+        def request(*args, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.raw = HTTPResponse(
+                body=io.BytesIO(content), preload_content=False
+            )
+            return response
+
+        monkeypatch.setattr(requests.Session, "request", request)
+        response = ConfiguredRequestsSession().get(
+            "https://s3.example.com/bucket/file.nc", stream=True
+        )
+        assert b"".join(response.iter_content(100)) == content
+        assert bytes_bucket.now == pytest.approx(2)
+
+    def test_retries_are_rate_limited(self, requests_bucket, monkeypatch):
+        attempts = []
+
+        def urlopen(self, method, url, retries=None, **kwargs):
+            attempts.append(requests_bucket.now)
+            if len(attempts) < 3:
+                retries = retries.increment(
+                    method, url, error=urllib3.exceptions.ProtocolError()
+                )
+                retries.sleep()
+                return urlopen(self, method, url, retries=retries, **kwargs)
+            return HTTPResponse(body=io.BytesIO(b""), status=200)
+
+        monkeypatch.setattr(
+            urllib3.connectionpool.HTTPConnectionPool, "urlopen", urlopen
+        )
+        session = ConfiguredRequestsSession(retries=2)
+        session.get_adapter("https://").max_retries.backoff_factor = 0
+        session.get("https://s3.example.com/bucket/file.nc")
+        # One request per second, the first one from the bucket
+        assert attempts == [0, pytest.approx(1), pytest.approx(2)]
@@ -0,0 +1,318 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from copernicusmarine.catalogue_parser.models import (
+    CopernicusMarineService,
+    CopernicusMarineServiceFormat,
+    CopernicusMarineServiceNames,
+    CopernicusMarineVariable,
+    CoperniusMarineServiceShortNames,
+)
+from copernicusmarine.core_functions.request_structure import SubsetRequest
+from copernicusmarine.download_functions import download_sparse
+from copernicusmarine.download_functions.download_sparse import (
+    COLUMNS_ORDER_DEPTH,
+    _dataframe_to_netcdf_per_platform,
+    _datetimes_to_epoch_seconds,
+    _get_number_of_netcdf_processes,
+    _platform_dataframe_to_dataset,
+    _transform_dataframe,
+)
+from tests.test_sparse_transform_dataframe import (
+    PLATFORMS_METADATA,
+    arcosparse_dataframe,
+)
+
+METADATA_COLS = [
+    "platform_id",
+    "platform_type",
+    "institution",
+    "doi",
+    "product_doi",
+]
+
+SERVICE = CopernicusMarineService(
+    service_name=CopernicusMarineServiceNames.PLATFORMSERIES,
+    service_short_name=CoperniusMarineServiceShortNames.PLATFORMSERIES,
+    service_format=CopernicusMarineServiceFormat.SQLITE,
+    uri="https://s3.example.com/bucket/platformSeries.sqlite",
+    variables=[
+        CopernicusMarineVariable(
+            short_name="TEMP",
+            standard_name="sea_water_temperature",
+            units="degrees_C",
+            bbox=None,
+            coordinates=[],
+        )
+    ],
+    platforms_metadata=None,
+    arco_sparse_type="cmemsInsitu",
+)
+
+
+def write_netcdf_files(output_path) -> list[str]:
+    return _dataframe_to_netcdf_per_platform(
+        df=_transform_dataframe(
+            arcosparse_dataframe(),
+            "depth",
+            PLATFORMS_METADATA,
+            "10.48670/moi-00036",
+        ),
+        vertical_axis="depth",
+        output_path=output_path,
+        platforms_metadata=PLATFORMS_METADATA,
+        subset_request=SubsetRequest(
+            dataset_id="cmems_obs-ins_glo_phybgcwav_mynrt_na_irr",
+            username="username",
+        ),
+        product_id="INSITU_GLO_PHYBGCWAV_DISCRETE_MYNRT_013_030",
+        service=SERVICE,
+    )
+
+
+def set_number_of_processes(monkeypatch, number_of_processes: str):
+    monkeypatch.setattr(
+        download_sparse,
+        "COPERNICUSMARINE_SPARSE_NETCDF_PROCESSES",
+        number_of_processes,
+    )
+    monkeypatch.setattr(
+        download_sparse, "NETCDF_MINIMUM_PLATFORMS_PER_PROCESS", 1
+    )
+
+
+class TestSparseNetCDFPerPlatform:
+    def test_processes_write_the_same_files(self, tmp_path, monkeypatch):
+        set_number_of_processes(monkeypatch, "1")
+        sequential = write_netcdf_files(tmp_path / "sequential")
+        set_number_of_processes(monkeypatch, "2")
+        parallel = write_netcdf_files(tmp_path / "parallel")
+
+        assert (
+            sequential
+            == parallel
+            == [
+                "41001.nc",
+                "6901234.nc",
+                "unknown.nc",
+            ]
+        )
+        assert not list(tmp_path.glob("*.*"))
+        for filename in parallel:
+            with xr.open_dataset(
+                tmp_path / "sequential" / filename
+            ) as expected, xr.open_dataset(
+                tmp_path / "parallel" / filename
+            ) as written:
+                for attribute in ["download_date", "history"]:
+                    del expected.attrs[attribute], written.attrs[attribute]
+                xr.testing.assert_identical(written, expected)
+
+    def test_number_of_processes(self, monkeypatch):
+        set_number_of_processes(monkeypatch, "4")
+        assert _get_number_of_netcdf_processes(100) == 4
+        assert _get_number_of_netcdf_processes(2) == 2
+        monkeypatch.setattr(
+            download_sparse, "NETCDF_MINIMUM_PLATFORMS_PER_PROCESS", 8
+        )
+        assert _get_number_of_netcdf_processes(20) == 2
+        assert _get_number_of_netcdf_processes(3) == 1
+
+    def test_single_process_by_default(self, monkeypatch):
+        for number_of_processes in [None, "", "many", "0"]:
+            set_number_of_processes(monkeypatch, number_of_processes)
+            assert _get_number_of_netcdf_processes(100) == 1
+
+
+def platform_dataframe() -> pd.DataFrame:
+    # Two profiles, the second one has no value at 10 m and a repeated
+    # observation at 20 m
+    return pd.DataFrame(
+        {
+            "platform_id": "6901234",
+            "platform_type": "PF",
+            "time": pd.to_datetime(
+                [0, 0, 3600, 3600, 3600, 3600, 3600], unit="s", utc=True
+            ),
+            "longitude": 1.0,
+            "latitude": 2.0,
+            "depth": [0.0, 0.0, 20.0, 10.0, 20.0, 0.0, 20.0],
+            "pressure": [0.0, 0.0, 20.0, 10.0, 20.0, 0.0, 20.0],
+            "is_depth_from_producer": np.int8(1),
+            "value": [1.0, 10.0, np.nan, np.nan, 4.0, 3.0, 5.0],
+            "value_qc": [1.0, 1.0, 2.0, np.nan, 1.0, 1.0, 1.0],
+            "variable": [
+                "TEMP",
+                "PSAL",
+                "TEMP",
+                "TEMP",
+                "TEMP",
+                "TEMP",
+                "TEMP",
+            ],
+            "institution": None,
+            "doi": None,
+            "product_doi": None,
+        }
+    )[COLUMNS_ORDER_DEPTH]
+
+
+class TestPlatformDataframeToDataset:
+    def test_first_values_ranked_by_depth(self):
+        ds = _platform_dataframe_to_dataset(
+            platform_dataframe(),
+            metadata_cols=METADATA_COLS,
+            vertical_axis="depth",
+            arco_sparse_type="cmemsInsitu",
+        )
+        assert dict(ds.sizes) == {"time": 2, "depth_level": 3}
+        assert list(ds.data_vars) == ["PSAL", "TEMP", "PSAL_QC", "TEMP_QC"]
+        assert ds["time"].values.tolist() == [0, 3600]
+        # The depth without any value comes last
+        np.testing.assert_array_equal(
+            ds["depth"].values, [[0, np.nan, np.nan], [0, 20, 10]]
+        )
+        np.testing.assert_array_equal(
+            ds["TEMP"].values, [[1, np.nan, np.nan], [3, 4, np.nan]]
+        )
+        np.testing.assert_array_equal(
+            ds["TEMP_QC"].values, [[1, np.nan, np.nan], [1, 2, np.nan]]
+        )
+
+    def test_altimetry(self):
+        df = platform_dataframe()
+        ds = _platform_dataframe_to_dataset(
+            df[df["depth"] == 0],
+            metadata_cols=["platform_id", "platform_type"],
+            vertical_axis="depth",
+            arco_sparse_type="cmemsAltimetry",
+        )
+        assert dict(ds.sizes) == {"time": 2}
+        assert list(ds.data_vars) == ["PSAL", "TEMP"]
+        np.testing.assert_array_equal(ds["TEMP"].values, [1, 3])
+
+    def test_same_dataset_as_pivot_table(self):
+        # Missing depths and levels without any value, duplicated
+        # (time, depth) observations, and the dtypes of the transformed
+        # dataframes
+        df = pd.concat(
+            [
+                platform_dataframe(),
+                pd.DataFrame(
+                    {
+                        "platform_id": "6901234",
+                        "platform_type": "PF",
+                        "time": pd.to_datetime(
+                            [3600, 3600, 7200, 7200, 7200, 7200, 1800],
+                            unit="s",
+                            utc=True,
+                        ),
+                        "longitude": 1.0,
+                        "latitude": 2.0,
+                        "depth": [np.nan, 5.0, 5.0, 5.0, np.nan, 1.0, 1.0],
+                        "pressure": [np.nan, 5.0, 5.0, np.nan, 3.0, 1.0, 1.0],
+                        "is_depth_from_producer": np.int8(1),
+                        "value": [7.0, np.nan, 2.0, 8.0, 9.0, np.nan, np.nan],
+                        "value_qc": [
+                            1.0,
+                            np.nan,
+                            1.0,
+                            2.0,
+                            1.0,
+                            np.nan,
+                            np.nan,
+                        ],
+                        "variable": [
+                            "TEMP",
+                            "TEMP",
+                            "PSAL",
+                            "PSAL",
+                            "TEMP",
+                            "TEMP",
+                            "TEMP",
+                        ],
+                        "institution": None,
+                        "doi": None,
+                        "product_doi": None,
+                    }
+                )[COLUMNS_ORDER_DEPTH],
+            ],
+            ignore_index=True,
+        )
+        complete_df = df.dropna(subset=["depth", "value"]).astype(
+            {"value_qc": np.int8}
+        )
+        for platform_df, arco_sparse_type in [
+            (df, "cmemsInsitu"),
+            (complete_df, "cmemsInsitu"),
+            (df, "cmemsAltimetry"),
+        ]:
+            ds = _platform_dataframe_to_dataset(
+                platform_df,
+                metadata_cols=METADATA_COLS,
+                vertical_axis="depth",
+                arco_sparse_type=arco_sparse_type,
+            )
+            expected = pivot_table_dataset(platform_df, arco_sparse_type)
+            xr.testing.assert_identical(ds, expected)
+            for name, variable in expected.variables.items():
+                assert ds[name].dtype == variable.dtype, name
+
+
+def pivot_table_dataset(
+    platform_df: pd.DataFrame, arco_sparse_type: str
+) -> xr.Dataset:
+    """
+    The dataset of a platform as built with pivot_table before.
+    """
+    obs_df = platform_df.drop(columns=METADATA_COLS).dropna(axis=1, how="all")
+    non_nans_cols = obs_df.columns.to_list()
+    aux_cols = [
+        col
+        for col in non_nans_cols
+        if col not in ["time", "depth", "variable", "value", "value_qc"]
+    ]
+    if arco_sparse_type != "cmemsAltimetry":
+        pivot_columns = ["time", "depth"]
+        values_columns = ["value", "value_qc"]
+    else:
+        pivot_columns = ["time"]
+        values_columns = ["value"]
+    obs_df = obs_df.sort_values(pivot_columns)
+    pivot = obs_df.pivot_table(
+        index=pivot_columns,
+        columns="variable",
+        values=values_columns,
+        aggfunc="first",
+        observed=True,
+    )
+    pivot.columns = [
+        f"{var}_QC" if metric == "value_qc" else var
+        for metric, var in pivot.columns
+    ]
+    merged = pd.concat(
+        [pivot, obs_df.groupby(pivot_columns)[aux_cols].first()], axis=1
+    ).reset_index()
+    merged["time"] = _datetimes_to_epoch_seconds(merged["time"])
+    if arco_sparse_type != "cmemsAltimetry":
+        merged["depth_level"] = merged.groupby("time").cumcount()
+        merged = merged.set_index(["time", "depth_level"])
+    else:
+        merged = merged.set_index(["time"])
+    merged.loc[merged["is_depth_from_producer"] == 0, "depth"] = np.nan
+    merged = merged.drop(columns=["is_depth_from_producer"])
+    if merged["depth"].isna().all():
+        merged = merged.drop(columns=["depth"])
+    ds = merged.to_xarray()
+    ds = ds.set_coords(
+        [
+            coordinate
+            for coordinate in ["pressure", "latitude", "longitude", "depth"]
+            if coordinate in ds
+        ]
+    )
+    if "depth_level" in ds.coords:
+        ds = ds.drop_vars("depth_level")
+    ds.time.attrs["units"] = "seconds since 1970-01-01T00:00:00Z"
+    return ds
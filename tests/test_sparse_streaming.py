@@ -0,0 +1,316 @@
+import time
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+import xarray as xr
+
+from copernicusmarine.core_functions.models import FileFormat
+from copernicusmarine.core_functions.request_structure import SubsetRequest
+from copernicusmarine.download_functions import download_sparse
+from copernicusmarine.download_functions.download_sparse import (
+    _transform_dataframe,
+)
+from copernicusmarine.download_functions.platforms_metadata import (
+    PlatformsMetadata,
+)
+from copernicusmarine.download_functions.sparse_streaming import (
+    CSVAppender,
+    ParquetAppender,
+    PlatformSpool,
+)
+from tests.test_platforms_metadata import RAW_PLATFORMS_METADATA
+from tests.test_sparse_netcdf_per_platform import SERVICE
+from tests.test_sparse_transform_dataframe import (
+    PLATFORMS_METADATA,
+    arcosparse_dataframe,
+)
+
+
+def transformed_blocks() -> list[pd.DataFrame]:
+    # The blocks have different categories
+    df = arcosparse_dataframe()
+    return [
+        _transform_dataframe(
+            block.reset_index(drop=True),
+            "depth",
+            PLATFORMS_METADATA,
+            "10.48670/moi-00036",
+        )
+        for block in [df.iloc[:2], df.iloc[2:]]
+    ]
+
+
+def mock_arcosparse(monkeypatch):
+    def subset_and_save(output_path, **kwargs):
+        output_path.mkdir(parents=True)
+        df = arcosparse_dataframe()
+        for chunk, block in enumerate([df.iloc[:2], df.iloc[2:]]):
+            block.to_parquet(output_path / f"TEMP_{chunk}.parquet")
+
+    monkeypatch.setattr(
+        download_sparse,
+        "get_platforms_metadata",
+        lambda _: PlatformsMetadata(
+            None, None, RAW_PLATFORMS_METADATA, time.time()
+        ),
+    )
+    monkeypatch.setattr(
+        download_sparse,
+        "subset_and_return_dataframe",
+        lambda **kwargs: arcosparse_dataframe(),
+    )
+    monkeypatch.setattr(download_sparse, "subset_and_save", subset_and_save)
+    monkeypatch.setattr(
+        download_sparse, "_get_user_configuration", lambda _: None
+    )
+
+
+def download(
+    tmp_path, file_format: FileFormat, streaming: bool, monkeypatch, **kwargs
+):
+    return download_sparse.download_sparse(
+        username="username",
+        subset_request=SubsetRequest(
+            dataset_id="cmems_obs-ins_glo_phybgcwav_mynrt_na_irr",
+            username="username",
+            file_format=file_format,
+            output_directory=tmp_path,
+            output_filename=f"{'streaming' if streaming else 'memory'}",
+            streaming=streaming,
+            **kwargs,
+        ),
+        metadata_url="https://s3.example.com/bucket/platformSeries.json",
+        service=SERVICE,
+        axis_coordinate_id_mapping={},
+        product_doi="10.48670/moi-00036",
+        product_id="INSITU_GLO_PHYBGCWAV_DISCRETE_MYNRT_013_030",
+        disable_progress_bar=True,
+    )
+
+
+class TestSparseStreaming:
+    def test_csv_appender(self, tmp_path):
+        csv_appender = CSVAppender(tmp_path / "output.csv")
+        for block in transformed_blocks():
+            csv_appender.append(block)
+        df = pd.read_csv(tmp_path / "output.csv")
+        assert csv_appender.number_of_rows == len(df) == 4
+        assert df["platform_id"].astype(str).tolist() == [
+            "41001",
+            "6901234",
+            "6901234",
+            "unknown",
+        ]
+
+    def test_parquet_appender(self, tmp_path):
+        with ParquetAppender(tmp_path / "output.parquet") as appender:
+            for block in transformed_blocks():
+                appender.append(block)
+        df = pd.read_parquet(tmp_path / "output.parquet")
+        assert appender.number_of_rows == len(df) == 4
+        assert df["institution"].isna().tolist() == [True, False, False, True]
+        assert str(df["time"].dtype) == "datetime64[us, UTC]"
+
+    def test_platform_spool(self, tmp_path):
+        # Every block is spooled to the disk
+        platform_spool = PlatformSpool(tmp_path, buffer_size=1)
+        blocks = transformed_blocks()
+        for block in blocks:
+            platform_spool.add(block)
+        platform_spool.add(blocks[1])
+
+        assert len(platform_spool) == 3
+        platforms = dict(platform_spool.platforms())
+        assert list(platforms) == ["41001", "6901234", "unknown"]
+        assert platforms["6901234"]["depth"].tolist() == [10.0, 5.0, 5.0]
+        assert isinstance(
+            platforms["6901234"]["platform_id"].dtype, pd.CategoricalDtype
+        )
+
+    def test_same_output_as_in_memory(self, tmp_path, monkeypatch):
+        mock_arcosparse(monkeypatch)
+        for file_format in ["csv", "parquet"]:
+            streamed = download(tmp_path, file_format, True, monkeypatch)
+            in_memory = download(tmp_path, file_format, False, monkeypatch)
+            read = pd.read_csv if file_format == "csv" else pd.read_parquet
+            pd.testing.assert_frame_equal(
+                read(streamed.file_path)
+                .sort_values(["platform_id", "time"])
+                .reset_index(drop=True),
+                read(in_memory.file_path)
+                .sort_values(["platform_id", "time"])
+                .reset_index(drop=True),
+                check_categorical=False,
+            )
+
+        streamed = download(tmp_path, "netcdf", True, monkeypatch)
+        in_memory = download(tmp_path, "netcdf", False, monkeypatch)
+        assert streamed.file_names == in_memory.file_names
+        for filename in streamed.file_names:
+            with xr.open_dataset(
+                streamed.file_path / filename
+            ) as written, xr.open_dataset(
+                in_memory.file_path / filename
+            ) as expected:
+                for attribute in ["download_date", "history"]:
+                    del expected.attrs[attribute], written.attrs[attribute]
+                xr.testing.assert_identical(written, expected)
+        # The spooled chunks and platforms are removed
+        assert not list(tmp_path.glob(".*"))
+
+    def test_read_dataframe(self, monkeypatch):
+        mock_arcosparse(monkeypatch)
+        streamed, in_memory = (
+            download_sparse.read_dataframe_sparse(
+                username="username",
+                subset_request=SubsetRequest(
+                    dataset_id="cmems_obs-ins_glo_phybgcwav_mynrt_na_irr",
+                    username="username",
+                    streaming=streaming,
+                ),
+                metadata_url=(
+                    "https://s3.example.com/bucket/platformSeries.json"
+                ),
+                service=SERVICE,
+                product_doi="10.48670/moi-00036",
+                disable_progress_bar=True,
+            )
+            .sort_values(["platform_id", "time"])
+            .reset_index(drop=True)
+            for streaming in [True, False]
+        )
+        pd.testing.assert_frame_equal(
+            streamed, in_memory, check_categorical=False
+        )
+        assert isinstance(streamed["platform_id"].dtype, pd.CategoricalDtype)
+
+    def test_filtered_chunks(self, tmp_path, monkeypatch):
+        mock_arcosparse(monkeypatch)
+        # No value of the first chunk is kept
+        for streaming in [True, False]:
+            response = download(
+                tmp_path,
+                "csv",
+                streaming,
+                monkeypatch,
+                value_ranges={"TEMP": (None, 12)},
+            )
+            df = pd.read_csv(response.file_path)
+            assert df["value"].tolist() == [11.5]
+
+    def test_no_value_kept(self, tmp_path, monkeypatch):
+        mock_arcosparse(monkeypatch)
+        for file_format in ["csv", "parquet", "netcdf"]:
+            for streaming in [True, False]:
+                response = download(
+                    tmp_path,
+                    file_format,
+                    streaming,
+                    monkeypatch,
+                    value_ranges={"TEMP": (None, 0)},
+                )
+                assert not response.file_path.exists()
+        assert not list(tmp_path.iterdir())
+
+
+class TestPartitionedParquet:
+    def test_partitioned_dataset(self, tmp_path):
+        with ParquetAppender(
+            tmp_path / "output.parquet",
+            partition_columns=[
+                "platform_type",
+                "platform_id",
+                "year",
+                "month",
+            ],
+            row_group_size=1,
+            compression="zstd",
+        ) as appender:
+            for block in transformed_blocks():
+                appender.append(block)
+
+        dataset_path = tmp_path / "output.parquet"
+        assert sorted(
+            path.relative_to(dataset_path).as_posix()
+            for path in dataset_path.rglob("*.parquet")
+        ) == [
+            "platform_type=MO/platform_id=41001/year=2023/month=11/"
+            "part-0-0.parquet",
+            "platform_type=PF/platform_id=6901234/year=2023/month=11/"
+            "part-0-0.parquet",
+            "platform_type=PF/platform_id=6901234/year=2023/month=11/"
+            "part-1-0.parquet",
+            "platform_type=TG/platform_id=unknown/year=2023/month=11/"
+            "part-1-0.parquet",
+        ]
+        metadata = pq.read_metadata(dataset_path / "_metadata")
+        assert metadata.num_rows == 4
+        assert metadata.num_row_groups == 4
+        assert "platform_id" not in metadata.schema.names
+        assert metadata.row_group(0).column(0).compression == "ZSTD"
+        for row_group in range(metadata.num_row_groups):
+            assert (
+                dataset_path
+                / metadata.row_group(row_group).column(0).file_path
+            ).exists()
+
+        df = (
+            ds.parquet_dataset(dataset_path / "_metadata", partitioning="hive")
+            .to_table()
+            .to_pandas()
+        )
+        assert sorted(df["platform_id"].astype(str)) == [
+            "41001",
+            "6901234",
+            "6901234",
+            "unknown",
+        ]
+
+    def test_download_partitioned_by_platform(self, tmp_path, monkeypatch):
+        mock_arcosparse(monkeypatch)
+        for streaming in [False, True]:
+            response = download(
+                tmp_path,
+                "parquet",
+                streaming,
+                monkeypatch,
+                parquet_partition_columns=["platform_type", "platform_id"],
+                parquet_row_group_size=1,
+                parquet_compression="zstd",
+            )
+            assert response.file_path.is_dir()
+            assert sorted(
+                path.name for path in response.file_path.iterdir()
+            ) == [
+                "_common_metadata",
+                "_metadata",
+                "platform_type=MO",
+                "platform_type=PF",
+                "platform_type=TG",
+            ]
+            metadata = pq.read_metadata(response.file_path / "_metadata")
+            assert metadata.num_rows == metadata.num_row_groups == 4
+            assert metadata.row_group(0).column(0).compression == "ZSTD"
+
+    @pytest.mark.parametrize(
+        "options, message",
+        [
+            ({"parquet_partition_columns": ["platform_id", "day"]}, "day"),
+            ({"parquet_partition_columns": ["value"]}, "value"),
+            (
+                {"parquet_partition_columns": ["month", "month"]},
+                "only once",
+            ),
+            ({"parquet_row_group_size": 0}, "positive integer"),
+            ({"parquet_compression": "lzo"}, "parquet_compression"),
+        ],
+    )
+    def test_invalid_options(self, options, message):
+        with pytest.raises(ValueError, match=message):
+            SubsetRequest(
+                dataset_id="cmems_obs-ins_glo_phybgcwav_mynrt_na_irr",
+                username="username",
+                **options,
+            )
@@ -12,6 +12,9 @@ from copernicusmarine.download_functions.download_sparse import (
     COLUMNS_ORDER_DEPTH,
     COLUMNS_ORDER_ELEVATION,
 )
+from copernicusmarine.download_functions.platforms_metadata import (
+    PlatformsMetadata,
+)
 from tests.test_utils import execute_in_terminal
 
 BASIC_COMMAND = [
@@ -240,8 +243,9 @@ class TestSparseSubset:
         assert output_path.exists()
 
     @mock.patch(
-        "copernicusmarine.download_functions.download_sparse.get_entities",
-        return_value=[],
+        "copernicusmarine.download_functions.download_sparse."
+        "get_platforms_metadata",
+        return_value=PlatformsMetadata(None, None, {}, 0),
     )
     def test_works_without_platform_metadata(self, mock_get_entities):
         df = read_dataframe(**BASIC_COMMAND_DICT)
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+import pytest
+from arcosparse import Entity
+from click import UsageError
+
+from copernicusmarine.command_line_interface.utils import (
+    parse_qc_flags,
+    parse_value_ranges,
+)
+from copernicusmarine.core_functions.request_structure import SubsetRequest
+from copernicusmarine.download_functions.download_sparse import (
+    COLUMNS_ORDER_DEPTH,
+    _datetimes_to_epoch_seconds,
+    _datetimes_to_isoformat,
+    _epoch_seconds_to_datetimes,
+    _filter_values,
+    _transform_dataframe,
+)
+
+PLATFORMS_METADATA = {
+    "6901234___PF": Entity(
+        entity_id="6901234___PF",
+        entity_type="PF",
+        institution="Coriolis",
+        doi="https://doi.org/10.17882/42182",
+    ),
+    "41001___MO": Entity(
+        entity_id="41001___MO",
+        entity_type="MO",
+        institution=None,
+        doi=None,
+    ),
+}
+
+
+def arcosparse_dataframe() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "platform_id": [
+                "6901234___PF",
+                "41001___MO",
+                "unknown___TG",
+                "6901234___PF",
+            ],
+            "platform_type": ["PF", "MO", "TG", "PF"],
+            "time": [1700000001, 1700000000, 1700000000, 1700000000],
+            "longitude": [1.0, 2.0, 3.0, 1.0],
+            "latitude": [4.0, 5.0, 6.0, 4.0],
+            "depth": [10.0, 0.0, 0.0, 5.0],
+            "pressure": [10.0, np.nan, np.nan, 5.0],
+            "is_approx_elevation": [1, 0, 0, 1],
+            "value": [12.5, 13.5, 14.5, 11.5],
+            "value_qc": [1, 1, 2, 1],
+            "variable": ["TEMP", "TEMP", "TEMP", "TEMP"],
+        }
+    )
+
+
+class TestSparseTransformDataframe:
+    def test_transform_dataframe(self):
+        df = _transform_dataframe(
+            arcosparse_dataframe(),
+            "depth",
+            PLATFORMS_METADATA,
+            "10.48670/moi-00036",
+        )
+        assert list(df.columns) == COLUMNS_ORDER_DEPTH
+        assert df["platform_id"].tolist() == [
+            "41001",
+            "6901234",
+            "6901234",
+            "unknown",
+        ]
+        assert str(df["time"].dtype) == "datetime64[us, UTC]"
+        assert _datetimes_to_isoformat(df["time"]).tolist() == [
+            "2023-11-14T22:13:20Z",
+            "2023-11-14T22:13:20Z",
+            "2023-11-14T22:13:21Z",
+            "2023-11-14T22:13:20Z",
+        ]
+        assert df["institution"].tolist()[1:3] == ["Coriolis", "Coriolis"]
+        assert df["institution"].isna().tolist() == [True, False, False, True]
+        assert df["is_depth_from_producer"].tolist() == [1, 0, 0, 1]
+        assert set(df["product_doi"]) == {"https://doi.org/10.48670/moi-00036"}
+
+    def test_compact_dtypes(self):
+        df = _transform_dataframe(
+            arcosparse_dataframe(),
+            "depth",
+            PLATFORMS_METADATA,
+            "10.48670/moi-00036",
+        )
+        for column in [
+            "platform_id",
+            "platform_type",
+            "variable",
+            "institution",
+            "doi",
+            "product_doi",
+        ]:
+            assert isinstance(df[column].dtype, pd.CategoricalDtype)
+        assert df["platform_id"].cat.categories.tolist() == [
+            "41001",
+            "6901234",
+            "unknown",
+        ]
+        assert df["value_qc"].dtype == np.int8
+        assert df["is_depth_from_producer"].dtype == np.int8
+
+    def test_untyped_platform(self):
+        df = arcosparse_dataframe().iloc[[2]]
+        df["platform_type"] = None
+        df = _transform_dataframe(
+            df, "depth", PLATFORMS_METADATA, "10.48670/moi-00036"
+        )
+        assert df["platform_id"].tolist() == ["unknown"]
+        assert df["platform_type"].isna().all()
+
+    def test_time_round_trip(self):
+        datetimes = pd.Series(
+            _epoch_seconds_to_datetimes(np.array([0, -1.5, 1700000000.25]))
+        )
+        assert _datetimes_to_isoformat(datetimes).tolist() == [
+            "1970-01-01T00:00:00Z",
+            "1969-12-31T23:59:58.500000Z",
+            "2023-11-14T22:13:20.250000Z",
+        ]
+        assert _datetimes_to_epoch_seconds(datetimes).tolist() == [
+            0,
+            -1.5,
+            1700000000.25,
+        ]
+
+
+def filter_values(**kwargs) -> pd.DataFrame:
+    df = arcosparse_dataframe()
+    df.loc[3, "variable"] = "PSAL"
+    return _filter_values(
+        df,
+        SubsetRequest(
+            dataset_id="cmems_obs-ins_glo_phybgcwav_mynrt_na_irr",
+            username="username",
+            **kwargs,
+        ),
+    )
+
+
+class TestSparseFilterValues:
+    def test_without_filters(self):
+        df = arcosparse_dataframe()
+        assert (
+            _filter_values(
+                df, SubsetRequest(dataset_id="dataset", username="username")
+            )
+            is df
+        )
+
+    def test_qc_flags(self):
+        assert filter_values(qc_flags=[1])["value"].tolist() == [
+            12.5,
+            13.5,
+            11.5,
+        ]
+        # The flags of a variable replace the flags of all the variables
+        assert filter_values(qc_flags={"*": [2], "PSAL": [1]})[
+            "value"
+        ].tolist() == [14.5, 11.5]
+
+    def test_value_ranges(self):
+        df = filter_values(value_ranges={"TEMP": (13, None)})
+        assert df["value"].tolist() == [13.5, 14.5, 11.5]
+        assert df.index.tolist() == [0, 1, 2]
+        assert filter_values(
+            qc_flags={"TEMP": [1]}, value_ranges={"TEMP": (None, 13)}
+        )["value"].tolist() == [12.5, 11.5]
+
+    def test_parse_options(self):
+        assert parse_qc_flags(()) is None
+        assert parse_qc_flags(("1", "2", "TEMP:1")) == {
+            "*": [1, 2],
+            "TEMP": [1],
+        }
+        assert parse_value_ranges(("TEMP:-2:35", "PSAL::40")) == {
+            "TEMP": (-2.0, 35.0),
+            "PSAL": (None, 40.0),
+        }
+        with pytest.raises(UsageError):
+            parse_qc_flags(("TEMP:good",))
+        with pytest.raises(UsageError):
+            parse_value_ranges(("TEMP:35",))
@@ -0,0 +1,133 @@
+import pytest
+
+from copernicusmarine.core_functions.request_structure import GetRequest
+from copernicusmarine.download_functions import download_original_files
+from copernicusmarine.download_functions.local_files_index import (
+    LocalFilesIndex,
+)
+from copernicusmarine.download_functions.sync_manifest import (
+    SYNC_MANIFEST_FILENAME,
+    SyncManifest,
+)
+
+DATASET_URL = "https://s3.example.com/bucket/native/PRODUCT/dataset_202311"
+
+
+@pytest.fixture(autouse=True)
+def sync_manifest(remote_files, monkeypatch):
+    remote_files.etags = {f"2023/file_{index}.nc": '"a"' for index in range(3)}
+    monkeypatch.setattr(
+        download_original_files, "COPERNICUSMARINE_SYNC_MANIFEST", True
+    )
+
+
+def downloaded_paths(remote_files) -> list[str]:
+    return [
+        object_key.split("dataset_202311/")[-1]
+        for object_key in remote_files.downloaded
+    ]
+
+
+def sync(output_directory, sync_delete=False):
+    return download_original_files.download_original_files(
+        username="username",
+        get_request=GetRequest(
+            dataset_id="dataset",
+            dataset_version="202311",
+            username="username",
+            dataset_url=DATASET_URL,
+            output_directory=output_directory,
+            sync=True,
+            sync_delete=sync_delete,
+        ),
+        max_concurrent_requests=2,
+        disable_progress_bar=True,
+        create_file_list=None,
+    )
+
+
+class TestSyncManifest:
+    def test_sync_compares_the_etags_of_the_manifest(
+        self, tmp_path, remote_files, monkeypatch
+    ):
+        sync(tmp_path)
+        assert sorted(downloaded_paths(remote_files)) == sorted(
+            remote_files.etags
+        )
+        assert (tmp_path / SYNC_MANIFEST_FILENAME).exists()
+
+        def no_stat(*args):
+            raise AssertionError("The manifest should have been used")
+
+        monkeypatch.setattr(
+            LocalFilesIndex, "get_size_and_modification_time", no_stat
+        )
+        remote_files.downloaded = []
+        response = sync(tmp_path)
+        assert downloaded_paths(remote_files) == []
+        assert response.status == "003"
+
+        # same size and date, the ETag only tells that the file changed
+        remote_files.etags["2023/file_1.nc"] = '"b"'
+        sync(tmp_path)
+        assert downloaded_paths(remote_files) == ["2023/file_1.nc"]
+
+    def test_sync_delete_uses_the_manifest(self, tmp_path, remote_files):
+        sync(tmp_path)
+        del remote_files.etags["2023/file_0.nc"]
+        response = sync(tmp_path, sync_delete=True)
+        dataset_folder = tmp_path / "PRODUCT" / "dataset_202311"
+        assert response.files_deleted == [
+            str(dataset_folder / "2023" / "file_0.nc")
+        ]
+        assert not (dataset_folder / "2023" / "file_0.nc").exists()
+        with SyncManifest(tmp_path) as sync_manifest:
+            assert sorted(
+                entry.local_path
+                for entry in sync_manifest.get_entries_with_prefix(
+                    "s3://bucket/native/PRODUCT/dataset_202311/"
+                )
+            ) == [
+                "PRODUCT/dataset_202311/2023/file_1.nc",
+                "PRODUCT/dataset_202311/2023/file_2.nc",
+            ]
+
+    def test_first_sync_delete_walks_the_folder(
+        self, tmp_path, remote_files, monkeypatch
+    ):
+        # A file downloaded before the manifest was kept
+        sync(tmp_path)
+        dataset_folder = tmp_path / "PRODUCT" / "dataset_202311"
+        (dataset_folder / "2023" / "file_old.nc").write_bytes(b"data")
+        response = sync(tmp_path, sync_delete=True)
+        assert response.files_deleted == [
+            str(dataset_folder / "2023" / "file_old.nc")
+        ]
+
+        def no_walk(*args):
+            raise AssertionError("The manifest should have been used")
+
+        monkeypatch.setattr(LocalFilesIndex, "iter_files", no_walk)
+        del remote_files.etags["2023/file_2.nc"]
+        response = sync(tmp_path, sync_delete=True)
+        assert response.files_deleted == [
+            str(dataset_folder / "2023" / "file_2.nc")
+        ]
+
+    def test_prefetches_are_kept_by_their_callers(self, tmp_path):
+        sync(tmp_path)
+        keys = [
+            f"s3://bucket/native/PRODUCT/dataset_202311/2023/file_{index}.nc"
+            for index in range(3)
+        ]
+        with SyncManifest(tmp_path) as sync_manifest:
+            first_entries = sync_manifest.prefetch(keys[:1] + ["unknown"])
+            # The prefetch of another request of the batch
+            second_entries = sync_manifest.prefetch(keys[1:])
+            assert sync_manifest.get(keys[0], first_entries) == (
+                first_entries[keys[0]]
+            )
+            assert sync_manifest.get("unknown", first_entries) is None
+            assert sorted(second_entries) == keys[1:]
+            assert sync_manifest.get(keys[2]) == second_entries[keys[2]]
+            assert sync_manifest.get(keys[2]) is not None
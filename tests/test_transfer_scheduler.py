@@ -0,0 +1,102 @@
+import threading
+import time
+
+from copernicusmarine.core_functions import resumable_download
+from copernicusmarine.core_functions.adaptive_concurrency import (
+    AdaptiveConcurrencyController,
+)
+from copernicusmarine.core_functions.transfer_scheduler import (
+    MAXIMUM_PART_SIZE,
+    MINIMUM_PART_SIZE,
+    TransferScheduler,
+)
+
+MB = 1024 * 1024
+
+
+class TestTransferScheduler:
+    def test_part_size_depends_on_the_object_size(self):
+        transfer_scheduler = TransferScheduler(max_connections=10)
+        assert transfer_scheduler.get_part_size(1 * MB) == MINIMUM_PART_SIZE
+        assert transfer_scheduler.get_part_size(800 * MB) == 20 * MB
+        assert (
+            transfer_scheduler.get_part_size(100 * 1024 * MB)
+            == MAXIMUM_PART_SIZE
+        )
+        # more connections, smaller parts to keep them all busy
+        assert TransferScheduler(20).get_part_size(800 * MB) == 10 * MB
+
+    def test_budget_has_a_minimum(self):
+        assert TransferScheduler(0).max_connections == 10
+        assert TransferScheduler(50).max_connections == 50
+
+    def test_budget_follows_the_adaptive_limit(self):
+        controller = AdaptiveConcurrencyController(initial_limit=10)
+        transfer_scheduler = TransferScheduler(15, controller)
+        assert transfer_scheduler.max_connections == 64
+        for _ in range(10):
+            assert transfer_scheduler.try_acquire_extra_connection()
+        assert not transfer_scheduler.try_acquire_extra_connection()
+        controller._limit = 12
+        assert transfer_scheduler.try_acquire_extra_connection()
+        assert transfer_scheduler.try_acquire_extra_connection()
+        assert not transfer_scheduler.try_acquire_extra_connection()
+
+    def test_no_extra_connection_while_a_transfer_is_waiting(self):
+        transfer_scheduler = TransferScheduler(10)
+        with transfer_scheduler.transfer():
+            assert transfer_scheduler.try_acquire_extra_connection()
+            transfer_scheduler.release_connection()
+            transfer_scheduler._waiting_transfers = 1
+            assert not transfer_scheduler.try_acquire_extra_connection()
+            transfer_scheduler._waiting_transfers = 0
+
+    def test_transfer_waits_for_a_connection(self):
+        transfer_scheduler = TransferScheduler(10)
+        for _ in range(10):
+            assert transfer_scheduler.try_acquire_extra_connection()
+        assert not transfer_scheduler.try_acquire_extra_connection()
+        started = threading.Event()
+
+        def _transfer():
+            with transfer_scheduler.transfer():
+                started.set()
+
+        thread = threading.Thread(target=_transfer)
+        thread.start()
+        assert not started.wait(0.1)
+        transfer_scheduler.release_connection()
+        assert started.wait(5)
+        thread.join()
+
+    def test_ranges_never_exceed_the_connection_budget(self):
+        transfer_scheduler = TransferScheduler(10)
+        lock = threading.Lock()
+        running_ranges = 0
+        maximum_running_ranges = 0
+        downloaded_ranges = []
+
+        def download_range(start: int, end: int) -> None:
+            nonlocal running_ranges, maximum_running_ranges
+            with lock:
+                running_ranges += 1
+                maximum_running_ranges = max(
+                    maximum_running_ranges, running_ranges
+                )
+            time.sleep(0.01)
+            with lock:
+                running_ranges -= 1
+                downloaded_ranges.append((start, end))
+
+        ranges = [(index, index + 1) for index in range(40)]
+        # another file holds 6 connections of the budget
+        for _ in range(6):
+            transfer_scheduler.try_acquire_extra_connection()
+        with transfer_scheduler.transfer():
+            resumable_download._download_ranges_concurrently(
+                download_range, ranges, 10, transfer_scheduler
+            )
+
+        assert sorted(downloaded_ranges) == ranges
+        assert maximum_running_ranges == 4
+        assert transfer_scheduler._connections_in_use == 6
@@ -1,5 +1,7 @@
+import threading
 from datetime import datetime, timezone
 
+import pytest
 from freezegun import freeze_time
 
 from copernicusmarine.catalogue_parser.models import (
@@ -8,6 +10,8 @@ from copernicusmarine.catalogue_parser.models import (
 from copernicusmarine.core_functions.utils import (
     datetime_parser,
     human_readable_size,
+    iterate_concurrently,
+    run_concurrently_from_iterable,
     timestamp_parser,
 )
 
@@ -122,3 +126,57 @@ class TestUtilityFunctions:
         )
         assert dataset_id_without_version == dataset_id_with_part
         assert dataset_version is None
+
+    def test_run_concurrently_from_iterable_starts_before_the_end(self):
+        first_task_done = threading.Event()
+
+        def arguments_waiting_for_first_task():
+            yield (1,)
+            # the producer only goes on once a task ran
+            assert first_task_done.wait(timeout=10)
+            for value in range(2, 50):
+                yield (value,)
+
+        def task(value: int) -> int:
+            first_task_done.set()
+            return value * 2
+
+        results = run_concurrently_from_iterable(
+            task,
+            arguments_waiting_for_first_task(),
+            max_concurrent_requests=4,
+            tdqm_bar_configuration={"disable": True},
+        )
+        assert sorted(results) == [value * 2 for value in range(1, 50)]
+
+    def test_run_concurrently_from_iterable_without_threads(self):
+        results = run_concurrently_from_iterable(
+            lambda value: value + 1,
+            ((value,) for value in range(10)),
+            max_concurrent_requests=0,
+            tdqm_bar_configuration={"disable": True},
+        )
+        assert results == list(range(1, 11))
+
+    def test_iterate_concurrently_yields_all_items(self):
+        results = iterate_concurrently(
+            [
+                lambda start=start: range(start, start + 100)
+                for start in range(0, 1000, 100)
+            ],
+            max_concurrent_requests=4,
+        )
+        assert sorted(results) == list(range(1000))
+
+    def test_iterate_concurrently_raises_errors(self):
+        def failing_iterable():
+            yield 1
+            raise ValueError("listing failed")
+
+        with pytest.raises(ValueError, match="listing failed"):
+            list(
+                iterate_concurrently(
+                    [lambda: range(10), failing_iterable],
+                    max_concurrent_requests=2,
+                )
+            )